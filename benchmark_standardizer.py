@@ -0,0 +1,147 @@
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+from excel_standardizer_improved import ExcelStandardizer, StreamingWorkbookWriter, OUTPUT_COLUMN_WIDTHS, OUTPUT_HEADER_FORMAT
+
+def make_question_bank(rows, columns, seed=0):
+    """Build a synthetic question bank with text, numeric, missing and non-breaking space values"""
+    rng = np.random.default_rng(seed)
+    words = np.array(['What', 'is', 'the', 'output', 'of', 'this\xa0code', 'Java', 'SQL', 'nan', 'select'], dtype=object)
+    data = {}
+    for i in range(columns):
+        if i % 10 == 0:
+            # Numeric columns such as Score, with some blank cells
+            data[f'Number {i}'] = np.where(rng.random(rows) < 0.1, np.nan, rng.integers(1, 5, rows).astype(float))
+        else:
+            text = words[rng.integers(0, len(words), rows)] + ' ' + words[rng.integers(0, len(words), rows)]
+            text[rng.random(rows) < 0.15] = None
+            data[f'Text {i}'] = text
+    return pd.DataFrame(data)
+
+def legacy_clean_values(df):
+    """The per-column cleaning loop that _clean_values replaced
+
+    astype(str) gave object columns on the pandas the loop was written for, so
+    the non-breaking space replace ran on every column; it does here too.
+    """
+    df = df.copy()
+    for col in df.columns:
+        df[col] = df[col].astype(str)
+        df[col] = df[col].replace('nan', '')
+        df[col] = df[col].str.replace('\xa0', ' ')
+    return df
+
+def time_call(func, *args, repeat=3):
+    """Return the best wall-clock time of several calls"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def benchmark_clean_values(rows=100000, columns=30):
+    """Compare _clean_values with the legacy per-column loop, with and without non-breaking spaces"""
+    standardizer = ExcelStandardizer()
+    df = make_question_bank(rows, columns)
+    frames = [('with non-breaking spaces', df), ('plain spaces', df.replace('\xa0', ' ', regex=True))]
+    for name, frame in frames:
+        legacy = time_call(legacy_clean_values, frame)
+        current = time_call(standardizer._clean_values, frame)
+        print(f"clean_values ({rows} x {columns}, {name}): legacy loop {legacy:.3f}s, _clean_values {current:.3f}s ({legacy / current:.1f}x)")
+
+def benchmark_xlsx_reader(rows=100000, columns=20):
+    """Compare loading a sheet with openpyxl and with the native xlsx reader"""
+    fd, path = tempfile.mkstemp(suffix='.xlsx')
+    os.close(fd)
+    try:
+        make_question_bank(rows, columns).to_excel(path, index=False, engine='xlsxwriter')
+        timings = {}
+        for engine in ('openpyxl', 'native'):
+            def load():
+                # A new standardizer each time so that no parsed sheet is reused
+                standardizer = ExcelStandardizer()
+                sheet = standardizer.get_sheet_names(path, engine=engine)[0]
+                return standardizer._load_sheet(standardizer.get_session(path), sheet)
+            timings[engine] = time_call(load, repeat=1)
+        print(f"xlsx_reader ({rows} x {columns}): openpyxl {timings['openpyxl']:.3f}s, native {timings['native']:.3f}s ({timings['openpyxl'] / timings['native']:.1f}x)")
+    finally:
+        os.remove(path)
+
+def legacy_write_output(df, path):
+    """The DataFrame.to_excel output that StreamingWorkbookWriter replaced"""
+    with pd.ExcelWriter(path, engine='xlsxwriter') as writer:
+        df.to_excel(writer, index=False, sheet_name='Questions')
+        worksheet = writer.sheets['Questions']
+        for column_range, width in OUTPUT_COLUMN_WIDTHS:
+            worksheet.set_column(column_range, width)
+        header_format = writer.book.add_format(OUTPUT_HEADER_FORMAT)
+        for col_num, value in enumerate(df.columns.values):
+            worksheet.write(0, col_num, value, header_format)
+
+def stream_write_output(df, path, profile):
+    """Write the standardized output with StreamingWorkbookWriter"""
+    writer = StreamingWorkbookWriter(path, list(df.columns), profile)
+    writer.write_frame(df)
+    writer.close()
+
+def benchmark_output_writer(rows=100000):
+    """Compare the time and peak memory of writing the standardized output workbook"""
+    standardizer = ExcelStandardizer()
+    df = make_question_bank(rows, 13)
+    df.columns = standardizer.get_standard_columns()[:len(df.columns)]
+    # Question text as long as in real banks
+    df[df.columns[2]] = df[df.columns[2]].fillna('') + ' ' + ' '.join(['Which of the following statements is true?'] * 6)
+    fd, path = tempfile.mkstemp(suffix='.xlsx')
+    os.close(fd)
+    try:
+        writers = [('to_excel', lambda: legacy_write_output(df, path))]
+        writers += [(f"stream {profile}", lambda profile=profile: stream_write_output(df, path, profile)) for profile in ('default', 'fast')]
+        results = []
+        for name, write in writers:
+            elapsed = time_call(write, repeat=1)
+            tracemalloc.start()
+            write()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            results.append(f"{name} {elapsed:.3f}s / {peak / 2 ** 20:.0f} MB")
+        print(f"output_writer ({rows} x {len(df.columns)}): {', '.join(results)}")
+    finally:
+        os.remove(path)
+
+def benchmark_split_writer(rows=100000, topics=300, workers=None):
+    """Compare writing split files serially and across a process pool"""
+    workers = workers or os.cpu_count() or 1
+    standardizer = ExcelStandardizer()
+    df = make_question_bank(rows, 13)
+    df.columns = standardizer.get_standard_columns()[:len(df.columns)]
+    topic_codes = np.random.default_rng(1).integers(0, topics, rows)
+    df['Topics'] = np.array([f'Topic {i}' for i in range(topics)], dtype=object)[topic_codes]
+    order, groups = standardizer._split_groups(df['Topics'])
+    grouped = df.take(order)
+    with tempfile.TemporaryDirectory() as folder:
+        partitions = [(value, os.path.join(folder, f"{standardizer._split_file_stem(value)}.xlsx"), grouped.iloc[start:stop])
+                      for _, value, start, stop in groups]
+        serial = time_call(standardizer._write_split_files, partitions, list(df.columns), 1, repeat=1)
+        parallel = time_call(standardizer._write_split_files, partitions, list(df.columns), workers, repeat=1)
+    print(f"split_writer ({rows} rows, {topics} files): serial {serial:.3f}s, {workers} workers {parallel:.3f}s ({serial / parallel:.1f}x)")
+
+BENCHMARKS = {
+    'clean_values': benchmark_clean_values,
+    'xlsx_reader': benchmark_xlsx_reader,
+    'split_writer': benchmark_split_writer,
+    'output_writer': benchmark_output_writer
+}
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            print(f"Unknown benchmark '{name}'. Available: {', '.join(BENCHMARKS)}")
+            sys.exit(1)
+        BENCHMARKS[name]()
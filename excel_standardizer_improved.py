@@ -1,9 +1,27 @@
 import pandas as pd
+import numpy as np
 import os
+import io
+import re
+import abc
 import json
 import logging
+import hashlib
+import threading
+import zipfile
+import csv
+import shutil
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from collections import OrderedDict
 from datetime import datetime
 import sys
+import argparse
+from xlsx_stream import scan_sheet_extent, XlsxReader
+from header_matcher import match_headers
+from normalization_rules import get_rule_registry
 
 # Configure logging
 logging.basicConfig(
@@ -16,24 +34,1414 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Number of parsed uploads kept in memory per worker so /api/process can reuse the frames parsed by /api/analyze
+WORKBOOK_CACHE_SIZE = int(os.environ.get('WORKBOOK_CACHE_SIZE', 4))
+
+# Number of data rows read for each sheet that is only surveyed, not fully loaded
+SURVEY_SAMPLE_ROWS = 5
+
+# Unicode spaces normalized to a regular space, and zero-width characters removed, in cell values
+WHITESPACE_REPLACEMENTS = dict(
+    [(chr(code), ' ') for code in [0x00a0, 0x1680, *range(0x2000, 0x200b), 0x202f, 0x205f, 0x3000]] +
+    [(chr(code), '') for code in [0x200b, 0x200c, 0x200d, 0x2060, 0xfeff]]
+)
+SPECIAL_WHITESPACE = re.compile('[' + ''.join(WHITESPACE_REPLACEMENTS) + ']')
+
+# Leading bytes of the supported workbook containers
+ZIP_MAGIC = b'PK\x03\x04'
+OLE2_MAGIC = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+PARQUET_MAGIC = b'PAR1'
+
+# Engines for inputs that hold a single table, and the sheet name they are presented under
+FLAT_FILE_ENGINES = ('csv', 'tsv', 'parquet')
+FLAT_FILE_SHEET = 'Sheet1'
+
+# File extensions accepted for upload
+SUPPORTED_EXTENSIONS = ('.xlsx', '.xls', '.csv', '.tsv', '.parquet')
+
+# Reader for xlsx workbooks: 'openpyxl' through pandas, or 'native' to parse the sheet XML directly
+XLSX_ENGINES = ('openpyxl', 'native')
+XLSX_ENGINE = os.environ.get('XLSX_ENGINE', 'openpyxl')
+
+# Process files in fixed-size row chunks instead of loading the whole sheet
+STREAM_PROCESSING = os.environ.get('STREAM_PROCESSING', '0') == '1'
+STREAM_CHUNK_SIZE = int(os.environ.get('STREAM_CHUNK_SIZE', 5000))
+
+# Worker processes used to parse the sheets of a workbook in parallel during analysis (0 or 1 parses serially)
+PARSE_WORKERS = int(os.environ.get('PARSE_WORKERS', 0))
+# Workbooks smaller than this many bytes are always parsed serially, as starting the work costs more than it saves
+PARALLEL_MIN_FILE_SIZE = int(os.environ.get('PARALLEL_MIN_FILE_SIZE', 2 * 1024 * 1024))
+
+# Worker processes used to write split files in parallel (0 or 1 writes serially)
+SPLIT_WORKERS = int(os.environ.get('SPLIT_WORKERS', 0))
+# Splits of fewer rows than this are always written serially
+PARALLEL_MIN_SPLIT_ROWS = int(os.environ.get('PARALLEL_MIN_SPLIT_ROWS', 20000))
+# Name of the split file of rows whose split value is blank or has no character safe in a file name
+UNNAMED_SPLIT_STEM = 'Unspecified'
+
+# Column widths of the standardized output workbook
+OUTPUT_COLUMN_WIDTHS = [
+    ('A:A', 20),  # Question Type
+    ('B:B', 20),  # Difficulty Level
+    ('C:C', 80),  # Question Text
+    ('D:G', 50),  # Options A-D
+    ('H:H', 20),  # Option E
+    ('I:I', 20),  # Correct Answer
+    ('J:J', 80),  # Answer Explanation
+    ('K:K', 15),  # Score
+    ('L:L', 40),  # Topics
+    ('M:Z', 30)   # Other columns
+]
+
+# Format of the header row of the standardized output workbook
+OUTPUT_HEADER_FORMAT = {
+    'bold': True,
+    'text_wrap': True,
+    'valign': 'top',
+    'border': 1
+}
+
+# xlsxwriter options of each write profile for the standardized output. Both keep only
+# the current row in memory; 'fast' also writes text as it is, without turning URLs
+# into hyperlinks, numeric text into numbers or text starting with '=' into formulas
+OUTPUT_WRITE_PROFILES = {
+    'default': {'constant_memory': True},
+    'fast': {'constant_memory': True, 'strings_to_urls': False, 'strings_to_numbers': False, 'strings_to_formulas': False}
+}
+OUTPUT_WRITE_PROFILE = os.environ.get('OUTPUT_WRITE_PROFILE', 'default')
+
+# Header names that are matched to a mapped column name when neither appears verbatim in the other
+COMMON_COLUMN_VARIATIONS = {
+    'question type': ['q type', 'qtype', 'type', 'question', 'q_type'],
+    'difficulty level': ['level', 'difficulty', 'diff level', 'diff', 'difficulty_level'],
+    'question text': ['q text', 'qtext', 'question', 'text', 'q_text', 'question_text'],
+    'option (a)': ['option a', 'option/ answer 1', 'option 1', 'option/answer 1', 'answer 1', 'a'],
+    'option (b)': ['option b', 'option/ answer 2', 'option 2', 'option/answer 2', 'answer 2', 'b'],
+    'option (c)': ['option c', 'option/ answer 3', 'option 3', 'option/answer 3', 'answer 3', 'c'],
+    'option (d)': ['option d', 'option/ answer 4', 'option 4', 'option/answer 4', 'answer 4', 'd'],
+    'option (e)': ['option e', 'option/ answer 5', 'option 5', 'option/answer 5', 'answer 5', 'e'],
+    'option (f)': ['option f', 'option/ answer 6', 'option 6', 'option/answer 6', 'answer 6', 'f'],
+    'correct answer': ['answer', 'correct', 'correct_answer', 'right answer', 'right_answer'],
+    'answer explanation': ['explanation', 'answer_explanation', 'solution', 'rationale'],
+    'score': ['marks', 'points', 'value', 'weight'],
+    'topics': ['topic', 'subject', 'category', 'skill', 'topics_list'],
+    'author': ['author name', 'created by', 'writer', 'author_name', 'author email', 'author\'s email']
+}
+
+# Standard columns that repeat a few values across all rows, stored as categoricals in
+# the standardized frame; normalized, custom-value and unmapped columns always are
+CATEGORICAL_COLUMNS = ('Score', 'Topics', 'Author')
+
+# Correct answers given as option numbers 1-26 (with any leading zeros) stand for options a-z
+OPTION_LETTERS = {str(number): chr(96 + number) for number in range(1, 27)}
+# Sorts ASCII answers into a single number, a comma-separated list or other text;
+# answers with other characters don't match at all
+CORRECT_ANSWER_KINDS = re.compile(r'^(?:(?P<number>[0-9]+)|(?P<list>[\x00-\x7f]*,[\x00-\x7f]*)|(?P<text>[\x00-\x7f]*))$')
+# Parts of a comma-separated list are bounded by commas or the ends of the answer
+OPTION_NUMBER_PART = re.compile(r'(?<![^,])0*(2[0-6]|1[0-9]|[1-9])(?![^,])')
+NUMBER_PART = re.compile(r'(?<![^,])[0-9]+(?![^,])')
+LIST_SEPARATOR = re.compile(r'\s*,\s*')
+
+class WorkbookSession:
+    """Parsed state of one uploaded workbook, shared between analysis and processing"""
+
+    def __init__(self, file_path, key):
+        """Initialize an empty session for the given file"""
+        self.file_path = file_path
+        self.key = key
+        self.sheet_names = None
+        self.engine = None
+        self.delimiter = None
+        self.encoding = None
+        self.read_path = None
+        self.frames = {}
+        self.readers = {}
+        self.surveys = {}
+        self.extents = {}
+        self.errors = {}
+        self.xlsx_engine = XLSX_ENGINE
+        self.native_reader = None
+
+class OutputFileWriter(abc.ABC):
+    """Base of the writers that stream standardized rows to an output file
+
+    output_path is a path or a writable binary file object. Rows must be written
+    in order and only the current block is held in memory. With an OutputArchive
+    the file is written to a temporary file and added to the archive on close,
+    named after output_path, which then becomes the member name.
+    """
+
+    def __init__(self, output_path, columns, archive=None):
+        """Set up the writer; subclasses open the file and write its header"""
+        self.output_path = output_path
+        self.archive = archive
+        # Many split files can be open at once, so they wait for the archive on disk, not in memory
+        self.buffer = tempfile.TemporaryFile() if archive is not None else None
+        self.target = self.buffer if archive is not None else output_path
+        self.columns = list(columns)
+        self.rows = 0
+
+    def column_arrays(self, frame):
+        """Get the writer's columns from a DataFrame as arrays, with None for missing values and columns"""
+        arrays = []
+        for col in self.columns:
+            if col not in frame.columns:
+                arrays.append([None] * len(frame))
+                continue
+            values = frame[col].to_numpy(dtype=object)
+            missing = pd.isna(values)
+            arrays.append(np.where(missing, None, values) if missing.any() else values)
+        return arrays
+
+    @abc.abstractmethod
+    def write_frame(self, frame):
+        """Append the rows of a DataFrame"""
+
+    @abc.abstractmethod
+    def finish(self):
+        """Complete and close the output file"""
+
+    def close(self):
+        """Finish the file and add it to the archive, if there is one"""
+        try:
+            self.finish()
+            if self.archive is not None:
+                self.output_path = self.archive.add(os.path.basename(self.output_path), self.buffer)
+        finally:
+            if self.buffer is not None:
+                self.buffer.close()
+                self.buffer = None
+
+class StreamingWorkbookWriter(OutputFileWriter):
+    """Write a standardized workbook row by row using xlsxwriter's constant memory mode
+
+    profile names the workbook options in OUTPUT_WRITE_PROFILES and defaults to
+    OUTPUT_WRITE_PROFILE.
+    """
+
+    def __init__(self, output_path, columns, profile=None, archive=None):
+        """Create the workbook and write the formatted header row"""
+        import xlsxwriter
+        profile = profile or OUTPUT_WRITE_PROFILE
+        if profile not in OUTPUT_WRITE_PROFILES:
+            raise ValueError(f"Unknown write profile '{profile}'. Available: {', '.join(OUTPUT_WRITE_PROFILES)}")
+        super().__init__(output_path, columns, archive)
+        self.workbook = xlsxwriter.Workbook(self.target, dict(OUTPUT_WRITE_PROFILES[profile]))
+        self.worksheet = self.workbook.add_worksheet('Questions')
+        for column_range, width in OUTPUT_COLUMN_WIDTHS:
+            self.worksheet.set_column(column_range, width)
+        header_format = self.workbook.add_format(OUTPUT_HEADER_FORMAT)
+        for col_num, col_value in enumerate(self.columns):
+            self.worksheet.write(0, col_num, col_value, header_format)
+
+    def write_frame(self, frame):
+        """Append the rows of a DataFrame, reading the writer's columns as arrays
+
+        Columns the frame lacks, and missing values, are left as blank cells.
+        """
+        write_row = self.worksheet.write_row
+        for values in zip(*self.column_arrays(frame)):
+            self.rows += 1
+            write_row(self.rows, 0, values)
+
+    def finish(self):
+        """Finish the workbook, adding an empty row if no data was written"""
+        if self.rows == 0:
+            for col_num in range(len(self.columns)):
+                self.worksheet.write_string(1, col_num, '')
+        self.workbook.close()
+
+class TextOutputWriter(OutputFileWriter):
+    """Base of the writers of UTF-8 text output, one line per row"""
+
+    def __init__(self, output_path, columns, archive=None):
+        """Open the file for writing"""
+        super().__init__(output_path, columns, archive)
+        self.owns_file = isinstance(self.target, (str, os.PathLike))
+        binary = open(self.target, 'wb') if self.owns_file else self.target
+        self.file = io.TextIOWrapper(binary, encoding='utf-8', newline='')
+
+    def finish(self):
+        """Flush the text, closing the file only if the writer opened it"""
+        if self.owns_file:
+            self.file.close()
+        else:
+            self.file.flush()
+            self.file.detach()
+
+class CsvOutputWriter(TextOutputWriter):
+    """Write standardized rows as CSV with a header row; missing values are empty fields"""
+
+    def __init__(self, output_path, columns, profile=None, archive=None):
+        """Open the file and write the header row"""
+        super().__init__(output_path, columns, archive)
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(self.columns)
+
+    def write_frame(self, frame):
+        """Append the rows of a DataFrame"""
+        rows = list(zip(*self.column_arrays(frame)))
+        self.writer.writerows(rows)
+        self.rows += len(rows)
+
+class JsonlOutputWriter(TextOutputWriter):
+    """Write each standardized row as a JSON object keyed by standard column; missing values are null"""
+
+    def __init__(self, output_path, columns, profile=None, archive=None):
+        """Open the file"""
+        super().__init__(output_path, columns, archive)
+        self.keys = [str(col) for col in self.columns]
+
+    def write_frame(self, frame):
+        """Append the rows of a DataFrame"""
+        keys = self.keys
+        lines = [json.dumps(dict(zip(keys, values)), ensure_ascii=False, default=str) + '\n'
+                 for values in zip(*self.column_arrays(frame))]
+        self.file.writelines(lines)
+        self.rows += len(lines)
+
+class ParquetOutputWriter(OutputFileWriter):
+    """Write standardized rows to Parquet as text columns, one row group per block of rows"""
+
+    def __init__(self, output_path, columns, profile=None, archive=None):
+        """Open the file with a schema of nullable text columns"""
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ValueError("Writing Parquet files requires the pyarrow package")
+        super().__init__(output_path, columns, archive)
+        self.pa = pa
+        self.schema = pa.schema([(str(col), pa.string()) for col in self.columns])
+        self.writer = pq.ParquetWriter(self.target, self.schema)
+
+    def write_frame(self, frame):
+        """Append the rows of a DataFrame as a row group"""
+        if len(frame) == 0:
+            return
+        arrays = [self.pa.array([value if value is None or isinstance(value, str) else str(value) for value in values], type=self.pa.string())
+                  for values in self.column_arrays(frame)]
+        self.writer.write_table(self.pa.Table.from_arrays(arrays, schema=self.schema))
+        self.rows += len(frame)
+
+    def finish(self):
+        """Write the Parquet footer"""
+        self.writer.close()
+
+# Writer of each output format, by the extension of its files
+OUTPUT_FORMATS = {
+    'xlsx': StreamingWorkbookWriter,
+    'csv': CsvOutputWriter,
+    'jsonl': JsonlOutputWriter,
+    'parquet': ParquetOutputWriter
+}
+OUTPUT_FORMAT = os.environ.get('OUTPUT_FORMAT', 'xlsx')
+
+# Bytes copied at a time from a finished output file into an archive
+ARCHIVE_COPY_BLOCK_SIZE = 1024 * 1024
+
+class OutputArchive:
+    """ZIP archive that finished output files are written into instead of the output folder
+
+    target is a path or a writable binary file object, which need not be
+    seekable, so an archive can be sent while it is being written. Workbooks and
+    Parquet files are already compressed and are stored as they are; other files
+    are deflated.
+    """
+
+    def __init__(self, target):
+        """Start an empty archive at target"""
+        self.zip = zipfile.ZipFile(target, 'w', zipfile.ZIP_DEFLATED)
+        self.names = []
+        self.lock = threading.Lock()
+
+    def add(self, name, data):
+        """Add a finished file, renaming it if the name is taken; returns its member name
+
+        data is the file's bytes, or a binary file object, which is copied from
+        its start in blocks.
+        """
+        with self.lock:
+            stem, extension = os.path.splitext(name)
+            if not extension and stem.startswith('.'):
+                # splitext takes a name made only of an extension, such as '.xlsx', for a stem
+                stem, extension = '', stem
+            number = 1
+            while name in self.names:
+                number += 1
+                name = f"{stem} ({number}){extension}"
+            info = zipfile.ZipInfo(name, date_time=datetime.now().timetuple()[:6])
+            info.compress_type = zipfile.ZIP_STORED if name.lower().endswith(('.xlsx', '.parquet')) else zipfile.ZIP_DEFLATED
+            info.external_attr = 0o644 << 16
+            if isinstance(data, bytes):
+                self.zip.writestr(info, data)
+            else:
+                data.seek(0, os.SEEK_END)
+                info.file_size = data.tell()
+                data.seek(0)
+                with self.zip.open(info, 'w') as member:
+                    shutil.copyfileobj(data, member, ARCHIVE_COPY_BLOCK_SIZE)
+            self.names.append(name)
+        return name
+
+    def close(self):
+        """Write the archive's directory; no files can be added afterwards"""
+        with self.lock:
+            self.zip.close()
+
+def _write_output_file(target, df, standard_columns, profile=None, output_format='xlsx'):
+    """Write standardized rows in an output format to target, a path or a binary buffer
+
+    Workbooks fall back to simpler writers when formatting fails. Returns None
+    once the file is saved, or the error of the last attempt.
+    """
+    if output_format != 'xlsx':
+        try:
+            writer = OUTPUT_FORMATS[output_format](target, standard_columns, profile)
+            try:
+                writer.write_frame(df)
+            finally:
+                writer.finish()
+        except Exception as e:
+            logger.error(f"Error writing {output_format} file: {str(e)}")
+            return str(e)
+        return None
+
+    def restart():
+        # A failed attempt may have left part of a workbook in the buffer
+        if not isinstance(target, (str, os.PathLike)):
+            target.seek(0)
+            target.truncate()
+
+    try:
+        # Stream the rows in the standard column order, leaving missing columns blank
+        writer = StreamingWorkbookWriter(target, standard_columns, profile)
+        try:
+            writer.write_frame(df)
+        finally:
+            writer.close()
+    except Exception as e:
+        logger.error(f"Error using xlsxwriter: {str(e)}")
+        # Ensure all columns are in the correct order according to standard format
+        df = df.reindex(columns=standard_columns)
+        # First check if the dataframe is empty
+        if len(df) == 0:
+            # Add at least one empty row to avoid errors
+            empty_row = {col: '' for col in df.columns}
+            df = pd.DataFrame([empty_row], columns=df.columns)
+        try:
+            # Try with openpyxl engine
+            restart()
+            df.to_excel(target, index=False, engine='openpyxl', sheet_name='Questions')
+        except Exception as e2:
+            logger.error(f"Error using openpyxl: {str(e2)}")
+            try:
+                # Last resort - try with default engine and minimal formatting
+                restart()
+                df.to_excel(target, index=False)
+            except Exception as e3:
+                logger.error(f"All attempts to save file failed: {str(e3)}")
+                return str(e3)
+    return None
+
+def _write_split_file(output_path, value_df, standard_columns, profile=None, in_memory=False, output_format='xlsx'):
+    """Write the file of one split value, in a worker process when split files are written in parallel
+
+    Returns the save error, or None, and the file's bytes when it is written
+    in memory rather than to output_path.
+    """
+    if not in_memory:
+        return _write_output_file(output_path, value_df, standard_columns, profile, output_format), None
+    buffer = io.BytesIO()
+    error = _write_output_file(buffer, value_df, standard_columns, profile, output_format)
+    return error, None if error else buffer.getvalue()
+
+def _parse_sheet_in_worker(file_path, engine, xlsx_engine, read_path, sheet, load):
+    """Scan or load one sheet in a worker process
+
+    Returns what the session caches for the sheet: its extent, and for a full
+    load the cleaned frame, the reader that worked, or the error raised.
+    """
+    if not load:
+        return {'extent': scan_sheet_extent(file_path, sheet) if engine == 'openpyxl' else None}
+    standardizer = ExcelStandardizer()
+    session = WorkbookSession(file_path, None)
+    session.engine = engine
+    session.xlsx_engine = xlsx_engine
+    session.read_path = read_path
+    result = {}
+    try:
+        result['frame'] = standardizer._load_sheet(session, sheet)
+        result['reader'] = session.readers.get(sheet)
+        result['read_path'] = session.read_path
+    except Exception as e:
+        result['error'] = ValueError(str(e))
+    result['extent'] = session.extents.get(sheet)
+    return result
+
+class ColumnResolver:
+    """Resolve mapped column names against one input header
+
+    The header is indexed once, so resolving every standard column of a mapping
+    costs a dictionary lookup per column. Names that match neither exactly nor
+    through a common variation are matched together by similarity with
+    match_headers, each to a different header column.
+    """
+
+    def __init__(self, columns):
+        """Index the header by normalized name and by common variation group"""
+        self.columns = list(columns)
+        self.column_set = set(self.columns)
+        self.normalized = [self.normalize(col) for col in self.columns]
+        # Later duplicates win, as they did with the per-column lookup dicts
+        self.lookup = dict(zip(self.normalized, self.columns))
+
+        # First header column of each variation group, and the groups each name belongs to
+        first_position = {}
+        for position, name in enumerate(self.normalized):
+            first_position.setdefault(name, position)
+        self.group_matches = {}
+        self.name_groups = {}
+        for standard_col, variations in COMMON_COLUMN_VARIATIONS.items():
+            names = [standard_col] + variations
+            positions = [first_position[name] for name in names if name in first_position]
+            self.group_matches[standard_col] = self.columns[min(positions)] if positions else None
+            for name in names:
+                groups = self.name_groups.setdefault(name, [])
+                if standard_col not in groups:
+                    groups.append(standard_col)
+        self.cache = {}
+
+    @staticmethod
+    def normalize(name):
+        """Lowercase and strip a column name, treating non-breaking spaces as spaces"""
+        if not isinstance(name, str):
+            return str(name).lower().strip()
+        return name.lower().strip().replace('\xa0', ' ')
+
+    def resolve(self, input_col):
+        """Find the input column for a mapped column name using exact, case-insensitive and fuzzy matching"""
+        if not input_col:
+            # Column not mapped
+            return None
+        if not isinstance(input_col, str):
+            # Only a header name that is not text, such as a number, can match it
+            return input_col if input_col in self.columns else None
+        if input_col not in self.cache:
+            actual_input_col = self._match_known(input_col)
+            if actual_input_col is None:
+                actual_input_col = self._match_similar([input_col], self.columns).get(input_col)
+            self.cache[input_col] = actual_input_col
+        return self.cache[input_col]
+
+    def _match_known(self, input_col):
+        """Match a mapped column name exactly, case-insensitively or through a common variation"""
+        # Try exact match first, then try with stripped whitespace
+        if input_col in self.column_set:
+            logger.info(f"Using exact column match: '{input_col}'")
+            return input_col
+        input_col_lower = self.normalize(input_col)
+        if input_col_lower in self.lookup:
+            actual_input_col = self.lookup[input_col_lower]
+            logger.info(f"Using case-insensitive column match: '{input_col}' -> '{actual_input_col}'")
+            return actual_input_col
+
+        # Try common variations, where the last group with a matching header column wins
+        best_match = None
+        for standard_col in self.name_groups.get(input_col_lower, []):
+            if self.group_matches[standard_col] is not None:
+                best_match = self.group_matches[standard_col]
+                logger.info(f"Found match through common variations: '{input_col}' -> '{best_match}'")
+        return best_match
+
+    def _match_similar(self, names, columns):
+        """Match the remaining names to distinct columns by header similarity"""
+        suggestions = match_headers(names, columns)
+        matches = {}
+        for name in names:
+            if name in suggestions:
+                matches[name] = suggestions[name]['column']
+                logger.info(f"Using fuzzy column match: '{name}' -> '{matches[name]}' (score: {suggestions[name]['confidence']:.2f})")
+            else:
+                # No good match found
+                logger.warning(f"No match found for column '{name}'. Available columns: {self.columns}")
+        return matches
+
+    def resolve_question_column(self, question_col):
+        """Find the question text column used to identify rows in error messages
+
+        Only exact and case-insensitive matches are used, so error messages never
+        quote a column that was merely similar.
+        """
+        if not question_col:
+            return None
+        if not isinstance(question_col, str):
+            return question_col if question_col in self.columns else None
+        if question_col in self.column_set:
+            return question_col
+        if self.normalize(question_col) in self.lookup:
+            actual_question_col = self.lookup[self.normalize(question_col)]
+            logger.info(f"Using case-insensitive match for question column: '{question_col}' -> '{actual_question_col}'")
+            return actual_question_col
+        return None
+
+    def build_plan(self, mapping_config, standard_columns, custom_values=None):
+        """Resolve every mapped standard column and the question column in one pass
+
+        Names without an exact or variation match are fuzzy-matched in one batch
+        against the header columns no other standard column has claimed. Returns
+        the mapping plan, from standard column to input column (or None), and the
+        question column.
+        """
+        mapping_plan = {}
+        pending = {}
+        for std_col in standard_columns:
+            # Columns with a custom value don't read from the input
+            if custom_values and std_col in custom_values and custom_values[std_col]:
+                continue
+            input_col = mapping_config.get(std_col)
+            if not input_col or not isinstance(input_col, str) or input_col in self.cache:
+                mapping_plan[std_col] = self.resolve(input_col)
+                continue
+            mapping_plan[std_col] = self._match_known(input_col)
+            if mapping_plan[std_col] is None:
+                pending[std_col] = input_col
+            else:
+                self.cache[input_col] = mapping_plan[std_col]
+
+        if pending:
+            claimed = {col for col in mapping_plan.values() if col is not None}
+            names = list(dict.fromkeys(pending.values()))
+            matches = self._match_similar(names, [col for col in self.columns if col not in claimed])
+            for std_col, input_col in pending.items():
+                mapping_plan[std_col] = self.cache[input_col] = matches.get(input_col)
+        return mapping_plan, self.resolve_question_column(mapping_config.get('Question Text'))
+
+class ErrorLog:
+    """Errors found while processing a file, kept as columns and formatted only when rendered
+
+    Each error records the spreadsheet row it was found on (0 when it concerns a
+    whole column or file), the standard column, an error code, the raw value and
+    the question text of its row. Row errors are added a whole mask at a time.
+    Iterating, indexing and len() work on the formatted messages, like the list
+    of strings the log replaces.
+    """
+
+    # Message of each error code, filled in with the error's column, value and detail
+    MESSAGES = {
+        'unknown_question_type': "Unknown Question Type: '{value}'",
+        'unknown_difficulty_level': "Unknown Difficulty Level: '{value}'",
+        'invalid_correct_answer': "Invalid Correct Answer format: '{value}'",
+        'missing_column': "Required column '{column}' not mapped or not found",
+        'missing_split_column': "Split column '{column}' not found in input file",
+        'save_failed': "Failed to save file for {column}='{value}': {detail}"
+    }
+
+    def __init__(self):
+        """Create an empty log"""
+        self.batches = []
+        self._messages = None
+
+    def add(self, code, column=None, value=None, row=0, question='', detail=None):
+        """Record a single error, such as a column missing from the whole file"""
+        self.add_rows(code, column, [row], [value], [question], detail)
+
+    def add_rows(self, code, column, rows, values, questions, detail=None):
+        """Record one error per spreadsheet row from matching arrays of rows, raw values and questions"""
+        if code not in self.MESSAGES:
+            raise ValueError(f"Unknown error code '{code}'")
+        rows = np.asarray(rows, dtype=np.int64)
+        if len(rows):
+            self.batches.append({
+                'code': code,
+                'column': column,
+                'detail': detail,
+                'rows': rows,
+                'values': np.asarray(values, dtype=object),
+                'questions': np.asarray(questions, dtype=object)
+            })
+            self._messages = None
+
+    def extend(self, other):
+        """Append the errors of another log, such as the one of a processed chunk"""
+        self.batches.extend(other.batches)
+        self._messages = None
+
+    def __len__(self):
+        return sum(len(batch['rows']) for batch in self.batches)
+
+    def __iter__(self):
+        return iter(self.messages())
+
+    def __getitem__(self, index):
+        return self.messages()[index]
+
+    def messages(self):
+        """Format the message of every error, once"""
+        if self._messages is None:
+            messages = []
+            for batch in self.batches:
+                # Format the batch's constant parts once, then join them with each value
+                message = self.MESSAGES[batch['code']].format(column=batch['column'], value='\x00', detail=batch['detail'])
+                if '\x00' in message:
+                    prefix, suffix = message.split('\x00', 1)
+                    messages.extend((prefix + batch['values'].astype(str).astype(object) + suffix).tolist())
+                else:
+                    messages.extend([message] * len(batch['rows']))
+            self._messages = messages
+        return self._messages
+
+    def questions(self):
+        """Format the row and question text that identify each error"""
+        questions = []
+        for batch in self.batches:
+            labels = 'Row ' + batch['rows'].astype(str).astype(object) + ': ' + batch['questions'].astype(str).astype(object)
+            # Errors that concern a whole column or file have no row
+            labels[batch['rows'] == 0] = "Row 0 (N/A)"
+            questions.extend(labels.tolist())
+        return questions
+
+    def to_frame(self):
+        """Get the errors as a DataFrame with Row, Column, Code, Value and Question columns"""
+        if not self.batches:
+            return pd.DataFrame(columns=['Row', 'Column', 'Code', 'Value', 'Question'])
+        sizes = [len(batch['rows']) for batch in self.batches]
+        return pd.DataFrame({
+            'Row': np.concatenate([batch['rows'] for batch in self.batches]),
+            'Column': np.repeat(np.array([batch['column'] for batch in self.batches], dtype=object), sizes),
+            'Code': np.repeat(np.array([batch['code'] for batch in self.batches], dtype=object), sizes),
+            'Value': np.concatenate([batch['values'] for batch in self.batches]),
+            'Question': np.concatenate([batch['questions'] for batch in self.batches])
+        })
+
 class ExcelStandardizer:
     """Class to standardize Excel files to a specific format"""
 
+    # Standard columns that may be left unmapped without reporting an error
+    OPTIONAL_COLUMNS = ['Recording Time Limit:(Upto 5 mins)',
+                        'Retake Allowed:(Upto 5 mins)',
+                        'Set Prep Time (0.5 to 5 mins)',
+                        'Proofreading Status',
+                        'Editor Email',
+                        'Differential Scoring',
+                        'Answer Explanation',
+                        'Topics']  # Topics is no longer mandatory
+
     def __init__(self):
         """Initialize the standardizer"""
         self.log_entries = []
         self.standard_format_path = os.path.join(os.environ.get('STANDARD_FORMAT_DIR', 'Standard-Format'), 'iMocha Standard Format.xlsx')
         self.output_dir = os.environ.get('OUTPUT_FOLDER', 'Processed-Files')
 
+        # Synonym tables of the normalizers, reloaded when the rule file changes
+        self.rules = get_rule_registry()
+
         # Create output directory if it doesn't exist
         os.makedirs(self.output_dir, exist_ok=True)
 
-    def analyze_file(self, file_path, sheet_name=None):
-        """Analyze an Excel file and return column information"""
+        # Parsed workbooks keyed by (upload filename, content hash), least recently used first
+        self._sessions = OrderedDict()
+        self._sessions_lock = threading.Lock()
+        # Session key of each file path, with the size and modification time it was hashed at
+        self._file_keys = {}
+
+        # Process pools for parallel sheet parsing and split writing, started on first use
+        self._pools = {}
+
+    def _hash_file(self, file_path):
+        """Return the SHA-1 hex digest of a file's contents"""
+        digest = hashlib.sha1()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def _session_key(self, file_path):
+        """Key of a file's session, hashing its contents only when the file is new or changed"""
+        stat = os.stat(file_path)
+        signature = (stat.st_size, stat.st_mtime_ns)
+        path = os.path.abspath(file_path)
+        with self._sessions_lock:
+            cached = self._file_keys.get(path)
+        if cached and cached[0] == signature:
+            return cached[1]
+        key = (os.path.basename(file_path), self._hash_file(file_path))
+        with self._sessions_lock:
+            self._file_keys[path] = (signature, key)
+        return key
+
+    def get_session(self, file_path):
+        """Get the cached workbook session for a file, creating it if needed"""
+        key = self._session_key(file_path)
+        with self._sessions_lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = WorkbookSession(file_path, key)
+                self._sessions[key] = session
+                # Evict the least recently used sessions beyond the cache size
+                while len(self._sessions) > max(WORKBOOK_CACHE_SIZE, 1):
+                    evicted_key, _ = self._sessions.popitem(last=False)
+                    for evicted_path in [p for p, (_, k) in self._file_keys.items() if k == evicted_key]:
+                        del self._file_keys[evicted_path]
+                    logger.info(f"Evicted workbook session for '{evicted_key[0]}'")
+            else:
+                self._sessions.move_to_end(key)
+                logger.info(f"Reusing parsed workbook session for '{key[0]}'")
+            session.file_path = file_path
+        return session
+
+    def get_sheet_names(self, file_path, engine=None):
+        """Get the sheet names of a file, reading them only once per upload"""
+        session = self.get_session(file_path)
+        self._set_xlsx_engine(session, engine)
+        return self._get_sheet_names(session)
+
+    def _get_sheet_names(self, session):
+        """Get the sheet names of a session's workbook"""
+        if session.sheet_names is None:
+            session.engine = self._detect_engine(session.file_path)
+            if session.engine in FLAT_FILE_ENGINES:
+                # CSV, TSV and Parquet files hold a single table
+                session.sheet_names = [FLAT_FILE_SHEET]
+            elif self._uses_native_reader(session):
+                session.sheet_names = self._get_native_reader(session).sheet_names
+            else:
+                xl = pd.ExcelFile(session.file_path, engine=session.engine)
+                session.sheet_names = xl.sheet_names
+        return session.sheet_names
+
+    def _set_xlsx_engine(self, session, engine):
+        """Select the reader used for an xlsx upload, keeping the current one if engine is None"""
+        if engine is None:
+            return
+        if engine not in XLSX_ENGINES:
+            raise ValueError(f"Unknown engine '{engine}'. Available engines: {', '.join(XLSX_ENGINES)}")
+        session.xlsx_engine = engine
+
+    def _uses_native_reader(self, session):
+        """Check whether a session's sheets are read with the native xlsx reader"""
+        return session.engine == 'openpyxl' and session.xlsx_engine == 'native'
+
+    def _get_native_reader(self, session):
+        """Get the native xlsx reader of a session, creating it on first use"""
+        if session.native_reader is None:
+            session.native_reader = XlsxReader(session.file_path, clean=self._clean_text)
+        return session.native_reader
+
+    def _clean_text(self, text):
+        """Normalize the Unicode spaces of a single string, as _clean_values does for frames"""
+        if SPECIAL_WHITESPACE.search(text):
+            return SPECIAL_WHITESPACE.sub(lambda match: WHITESPACE_REPLACEMENTS[match.group()], text)
+        return text
+
+    def _detect_engine(self, file_path):
+        """Detect the workbook container from its leading bytes and return the pandas engine for it"""
+        with open(file_path, 'rb') as f:
+            magic = f.read(8)
+        extension = os.path.splitext(file_path)[1].lower()
+
+        if magic.startswith(ZIP_MAGIC):
+            # Office Open XML and OpenDocument are both zip packages, tell them apart by their parts
+            with zipfile.ZipFile(file_path) as zf:
+                names = set(zf.namelist())
+            if 'xl/workbook.xml' in names:
+                engine = 'openpyxl'
+            elif 'xl/workbook.bin' in names:
+                engine = 'pyxlsb'
+            elif 'content.xml' in names:
+                engine = 'odf'
+            else:
+                raise ValueError(f"File {os.path.basename(file_path)} is a zip archive but not an Excel workbook")
+        elif magic == OLE2_MAGIC:
+            # Legacy binary .xls workbook
+            engine = 'xlrd'
+        elif magic.startswith(PARQUET_MAGIC):
+            engine = 'parquet'
+        elif extension == '.csv':
+            engine = 'csv'
+        elif extension in ('.tsv', '.tab'):
+            engine = 'tsv'
+        else:
+            raise ValueError(f"File {os.path.basename(file_path)} is not a recognized Excel workbook")
+
+        logger.info(f"Detected engine '{engine}' for {os.path.basename(file_path)}")
+        return engine
+
+    def _sniff_text_format(self, session):
+        """Detect the encoding and delimiter of a CSV or TSV upload from its first bytes"""
+        if session.encoding is not None:
+            return
+        with open(session.file_path, 'rb') as f:
+            head = f.read(64 * 1024)
+        # Exports from authoring tools are UTF-8 (often with a BOM) or Windows-1252
+        try:
+            sample = head.decode('utf-8-sig')
+            session.encoding = 'utf-8-sig'
+        except UnicodeDecodeError as e:
+            if e.start >= len(head) - 3:
+                # Only a multi-byte character cut off by the sample boundary
+                sample = head[:e.start].decode('utf-8-sig')
+                session.encoding = 'utf-8-sig'
+            else:
+                sample = head.decode('cp1252', errors='replace')
+                session.encoding = 'cp1252'
+        if session.engine == 'tsv':
+            session.delimiter = '\t'
+        else:
+            try:
+                session.delimiter = csv.Sniffer().sniff(sample.split('\n', 1)[0], delimiters=',;\t|').delimiter
+            except csv.Error:
+                session.delimiter = ','
+        logger.info(f"Reading {os.path.basename(session.file_path)} as {session.encoding} with delimiter {session.delimiter!r}")
+
+    def _read_flat_file(self, session, chunksize=None, usecols=None, nrows=None):
+        """Read a CSV, TSV or Parquet upload, or an iterator of chunks when chunksize is given
+
+        All values are read as text, and only empty fields count as missing. usecols
+        restricts the read to the columns at the given positions.
+        """
+        if session.engine == 'parquet':
+            try:
+                import pyarrow.parquet as pq
+            except ImportError:
+                raise ValueError("Reading Parquet files requires the pyarrow package")
+            parquet_file = pq.ParquetFile(session.file_path)
+            names = parquet_file.schema_arrow.names
+            columns = [names[i] for i in usecols] if usecols is not None else None
+            if nrows == 0:
+                return pd.DataFrame(columns=names)
+            if nrows is not None:
+                # A sample only needs the first batch
+                batch = next(parquet_file.iter_batches(batch_size=nrows, columns=columns), None)
+                return batch.to_pandas() if batch is not None else pd.DataFrame(columns=columns or names)
+            if chunksize is None:
+                return pq.read_table(session.file_path, columns=columns).to_pandas()
+            return (batch.to_pandas() for batch in parquet_file.iter_batches(batch_size=chunksize, columns=columns))
+
+        self._sniff_text_format(session)
+        return pd.read_csv(session.file_path, sep=session.delimiter, encoding=session.encoding,
+                           dtype=str, keep_default_na=False, chunksize=chunksize, usecols=usecols, nrows=nrows)
+
+    def _count_flat_file_rows(self, session):
+        """Count the data rows of a CSV, TSV or Parquet upload without loading it"""
+        if session.engine == 'parquet':
+            import pyarrow.parquet as pq
+            return pq.ParquetFile(session.file_path).metadata.num_rows
+        # Only the first column is parsed, a chunk at a time
+        return sum(len(chunk) for chunk in self._read_flat_file(session, chunksize=STREAM_CHUNK_SIZE, usecols=[0]))
+
+    def _get_sheet_frame(self, session, sheet):
+        """Get the cleaned DataFrame for a sheet, parsing it only once per upload"""
+        if sheet in session.errors:
+            raise session.errors[sheet]
+        if sheet not in session.frames:
+            try:
+                session.frames[sheet] = self._load_sheet(session, sheet)
+            except Exception as e:
+                session.errors[sheet] = e
+                raise
+        return session.frames[sheet]
+
+    def _get_sheet_extent(self, session, sheet):
+        """Get the real data extent of an xlsx sheet, scanning it only once per upload
+
+        Returns None for other formats, or if the sheet could not be scanned, in
+        which case loading is not bounded.
+        """
+        if session.engine != 'openpyxl':
+            return None
+        if sheet not in session.extents:
+            try:
+                extent = scan_sheet_extent(session.file_path, sheet)
+                if extent['declared_range'] and extent['declared_range'] != extent['data_range']:
+                    logger.info(f"Sheet '{sheet}' declares range {extent['declared_range']} but holds data in {extent['data_range']}")
+            except Exception as e:
+                logger.warning(f"Could not scan the extent of sheet '{sheet}': {str(e)}")
+                extent = None
+            session.extents[sheet] = extent
+        return session.extents[sheet]
+
+    def _read_header(self, session, sheet):
+        """Get the cleaned column names of a sheet without loading its rows"""
+        if sheet in session.frames:
+            return session.frames[sheet].columns.tolist()
+        if sheet in session.surveys:
+            return session.surveys[sheet]['df'].columns.tolist()
+        if session.engine in FLAT_FILE_ENGINES:
+            names = self._read_flat_file(session, nrows=0).columns.tolist()
+        else:
+            names = pd.read_excel(session.file_path, sheet_name=sheet, engine=session.engine, nrows=0).columns.tolist()
+        return self._clean_column_names(names)
+
+    def _get_sheet_columns(self, session, sheet, columns):
+        """Get the cleaned values of only the given columns of a sheet
+
+        A sheet already parsed in the session is just narrowed; otherwise only the
+        requested columns are read from the file. Partial frames are not cached.
+        """
+        if sheet in session.frames or not columns:
+            df = self._get_sheet_frame(session, sheet)
+            return df[columns] if columns else df
+
+        header = self._read_header(session, sheet)
+        positions = sorted(header.index(col) for col in columns)
+        df = self._load_sheet(session, sheet, usecols=positions)
+        # Name the columns from the full header, so deduplicated names stay the same
+        df.columns = [header[i] for i in positions]
+        return df
+
+    def _iter_sheet_chunks(self, session, sheet, chunk_size, columns=None):
+        """Yield the cleaned rows of a sheet as DataFrames of at most chunk_size rows
+
+        Sheets already parsed in the session are sliced; otherwise the rows are
+        streamed with openpyxl in read-only mode, or by the CSV/Parquet reader,
+        so the sheet is never fully in memory. When columns is given only those
+        columns are kept.
+        """
+        if session.engine in FLAT_FILE_ENGINES and sheet not in session.frames:
+            # Flat files are read in chunks directly by their reader
+            header = self._read_header(session, sheet)
+            positions = sorted(header.index(col) for col in columns) if columns else None
+            names = [header[i] for i in positions] if positions else header
+            start = 0
+            for chunk in self._read_flat_file(session, chunksize=chunk_size, usecols=positions):
+                chunk.columns = names
+                yield start, self._clean_values(chunk.reset_index(drop=True))
+                start += len(chunk)
+            return
+
+        if sheet in session.frames or session.engine != 'openpyxl':
+            df = self._get_sheet_columns(session, sheet, columns)
+            for start in range(0, len(df), chunk_size):
+                yield start, df.iloc[start:start + chunk_size].reset_index(drop=True)
+            return
+
+        import openpyxl
+        extent = self._get_sheet_extent(session, sheet)
+        wb = openpyxl.load_workbook(session.file_path, read_only=True, data_only=True)
+        try:
+            if extent:
+                # Stop at the last row and column holding data instead of the declared dimension
+                if not extent['rows']:
+                    return
+                rows = wb[sheet].iter_rows(max_row=extent['rows'], max_col=extent['columns'], values_only=True)
+            else:
+                rows = wb[sheet].iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return
+            # Drop trailing unnamed columns, which only carry formatting
+            header = list(header)
+            while header and header[-1] is None:
+                header.pop()
+            width = len(header)
+            header = self._clean_column_names(self._mangle_duplicate_names(
+                [col if col is not None else f"Unnamed: {i}" for i, col in enumerate(header)]))
+            positions = sorted(header.index(col) for col in columns) if columns else list(range(width))
+            names = [header[i] for i in positions]
+
+            start = 0
+            buffer = []
+            blank_rows = 0
+            for row in rows:
+                # Blank rows are judged on the whole row, not only on the kept columns
+                if not any(value is not None and value != '' for value in row[:width]):
+                    # Hold back blank rows so that trailing ones are dropped
+                    blank_rows += 1
+                    continue
+                buffer.extend([[''] * len(positions)] * blank_rows)
+                blank_rows = 0
+                buffer.append(['' if i >= len(row) or row[i] is None else row[i] for i in positions])
+                if len(buffer) >= chunk_size:
+                    yield start, self._clean_values(pd.DataFrame(buffer, columns=names))
+                    start += len(buffer)
+                    buffer = []
+            if buffer:
+                yield start, self._clean_values(pd.DataFrame(buffer, columns=names))
+        finally:
+            wb.close()
+
+    def _load_sheet(self, session, sheet, usecols=None):
+        """Read a sheet with the detected engine and clean it
+
+        If the plain read fails, more tolerant readers are tried in turn. The reader
+        that worked is remembered on the session, so later sheets of the same file
+        start with it instead of failing through the same readers again.
+
+        With usecols only the columns at those positions are read, and the caller
+        is left to name them.
+        """
+        file_path = session.file_path
+        engine = session.engine
+
+        # Bound xlsx reads to the real data, so formatting applied to whole rows or columns is not loaded
+        nrows = None
+        max_col = None
+        read_cols = usecols
+        extent = self._get_sheet_extent(session, sheet)
+        if extent and extent['rows']:
+            nrows = extent['rows'] - 1
+            max_col = extent['columns']
+            if read_cols is None:
+                read_cols = list(range(max_col))
+
+        if engine in FLAT_FILE_ENGINES:
+            session.readers[sheet] = engine
+            temp_df = self._read_flat_file(session, usecols=usecols)
+            return self._clean_values(temp_df) if usecols is not None else self._clean_sheet_frame(temp_df)
+
+        # Only empty cells are missing values; text such as "nan" or "NA" is kept as written
+        def read_default():
+            return pd.read_excel(file_path, sheet_name=sheet, engine=engine, keep_default_na=False, usecols=read_cols, nrows=nrows)
+
+        def read_converters():
+            # Create a converter that converts everything to string
+            converters = {i: str for i in range(len(read_cols) if read_cols is not None else 100)}  # Handle up to 100 columns
+            return pd.read_excel(file_path, sheet_name=sheet, engine=engine, converters=converters, keep_default_na=False,
+                                 usecols=read_cols, nrows=nrows)
+
+        def read_native():
+            # Parse the sheet XML directly; the reader returns text that is already cleaned
+            positions, header, columns = self._get_native_reader(session).read_columns(
+                sheet, max_row=nrows + 1 if nrows is not None else None, max_col=max_col, usecols=usecols)
+            temp_df = pd.DataFrame(dict(enumerate(columns)))
+            temp_df.columns = self._mangle_duplicate_names([col if col is not None else f"Unnamed: {i}" for i, col in zip(positions, header)])
+            return temp_df
+
+        def read_raw_openpyxl():
+            # Direct openpyxl access bypasses pandas' type inference
+            import openpyxl
+            wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+            try:
+                max_row = nrows + 1 if nrows is not None else None
+                data = [list(row) for row in wb[sheet].iter_rows(max_row=max_row, max_col=max_col, values_only=True)]
+            finally:
+                wb.close()
+            if data and usecols is not None:
+                data = [[row[i] if i < len(row) else None for i in usecols] for row in data]
+            if data:
+                return pd.DataFrame(data[1:], columns=data[0])
+            return pd.DataFrame()
+
+        readers = [('default', read_default), ('converters', read_converters)]
+        if engine == 'openpyxl':
+            readers.append(('raw', read_raw_openpyxl))
+            if self._uses_native_reader(session):
+                # The pandas readers remain as fallbacks
+                readers.insert(0, ('native', read_native))
+
+        # Start with the reader that last worked for this file
+        names = [name for name, _ in readers]
+        start = names.index(session.read_path) if session.read_path in names else 0
+
+        first_error = None
+        for name, reader in readers[start:]:
+            try:
+                temp_df = reader()
+                break
+            except Exception as e:
+                if first_error is None:
+                    first_error = e
+                logger.warning(f"Reading sheet '{sheet}' with the {name} reader failed: {str(e)}")
+        else:
+            # If all attempts fail, raise the original error
+            logger.error(f"All attempts to read sheet '{sheet}' failed")
+            raise first_error
+
+        label = name if name == 'native' else (f"{engine}:{name}" if name != 'default' else engine)
+        if name != session.read_path:
+            logger.info(f"Using the {name} reader ({label}) for {os.path.basename(file_path)}")
+            session.read_path = name
+        session.readers[sheet] = label
+
+        if name == 'native':
+            if usecols is None:
+                temp_df.columns = self._clean_column_names(temp_df.columns.tolist())
+            return temp_df
+        if usecols is not None:
+            return self._clean_values(temp_df)
+        return self._clean_sheet_frame(temp_df)
+
+    def _clean_sheet_frame(self, temp_df):
+        """Clean column names and convert all values of a freshly read sheet to strings"""
+        temp_df.columns = self._clean_column_names(temp_df.columns.tolist())
+        return self._clean_values(temp_df)
+
+    def _clean_column_names(self, original_columns):
+        """Strip whitespace and special characters from column names and make them unique"""
+        # Clean column names by stripping whitespace and handling special characters
+        cleaned_columns = []
+        for col in original_columns:
+            if isinstance(col, str):
+                # Strip whitespace and replace problematic characters
+                cleaned_col = col.strip()
+                # Replace non-breaking spaces with regular spaces
+                cleaned_col = cleaned_col.replace('\xa0', ' ').strip()
+                # Log if cleaning changed the column name
+                if cleaned_col != col:
+                    logger.info(f"Cleaned column name: '{col}' -> '{cleaned_col}'")
+                cleaned_columns.append(cleaned_col)
+            else:
+                # Convert non-string columns to string
+                try:
+                    cleaned_col = str(col).strip()
+                    logger.info(f"Converted non-string column to string: {type(col).__name__} -> '{cleaned_col}'")
+                    cleaned_columns.append(cleaned_col)
+                except Exception:
+                    # If conversion fails, use a placeholder name
+                    placeholder = f"Column_{len(cleaned_columns)}"
+                    logger.warning(f"Could not convert column of type {type(col).__name__} to string, using placeholder: '{placeholder}'")
+                    cleaned_columns.append(placeholder)
+
+        # Check for duplicate column names after cleaning
+        if len(cleaned_columns) != len(set(cleaned_columns)):
+            # Handle duplicate column names by adding suffixes
+            seen = {}
+            for i, col in enumerate(cleaned_columns):
+                if col in seen:
+                    seen[col] += 1
+                    cleaned_columns[i] = f"{col}_{seen[col]}"
+                    logger.warning(f"Renamed duplicate column: '{col}' -> '{cleaned_columns[i]}'")
+                else:
+                    seen[col] = 0
+
+        return cleaned_columns
+
+    def _mangle_duplicate_names(self, names):
+        """Suffix repeated header names with .1, .2, ... as the pandas readers do"""
+        seen = {}
+        mangled = []
+        for name in names:
+            count = seen.get(name, 0)
+            seen[name] = count + 1
+            mangled.append(f"{name}.{count}" if count else name)
+        return mangled
+
+    def _clean_values(self, temp_df):
+        """Convert all values to strings, one column at a time
+
+        Missing values become empty strings while genuine "nan" text is kept, and
+        non-breaking and other Unicode spaces are normalized to regular spaces.
+        """
+        if temp_df.empty:
+            return temp_df.astype(object)
+
+        columns = {}
+        for position in range(temp_df.shape[1]):
+            column = temp_df.iloc[:, position]
+            # Blank only the cells that were really missing, not the text "nan"
+            values = column.astype(str).astype(object).where(column.notna(), '')
+            # One search of the whole column finds the special spaces it holds, usually none
+            joined = '\x00'.join(values.to_numpy())
+            if SPECIAL_WHITESPACE.search(joined):
+                for char, replacement in WHITESPACE_REPLACEMENTS.items():
+                    if char in joined:
+                        values = values.str.replace(char, replacement, regex=False)
+            columns[position] = values.to_numpy(dtype=object)
+
+        df = pd.DataFrame(columns, index=temp_df.index)
+        df.columns = temp_df.columns
+        return df
+
+    def _survey_sheet_native(self, session, sheet):
+        """Survey an xlsx sheet from its extent and first rows with the native reader"""
+        extent = self._get_sheet_extent(session, sheet)
+        if extent is None:
+            raise ValueError("the sheet extent could not be scanned")
+        if extent['rows']:
+            # Columns holding data only below the sample rows are kept, as a full load keeps them
+            positions, header, columns = self._get_native_reader(session).read_columns(
+                sheet, max_row=min(extent['rows'], 1 + SURVEY_SAMPLE_ROWS), max_col=extent['columns'],
+                usecols=range(extent['columns']))
+            sample_df = pd.DataFrame(dict(enumerate(columns)))
+            sample_df.columns = self._mangle_duplicate_names([col if col is not None else f"Unnamed: {i}" for i, col in zip(positions, header)])
+            rows = max(extent['rows'] - 1, len(sample_df))
+        else:
+            sample_df = pd.DataFrame()
+            rows = 0
+        return {
+            'columns': len(sample_df.columns),
+            'rows': rows,
+            'df': self._clean_sheet_frame(sample_df)
+        }
+
+    def _survey_flat_file(self, session):
+        """Survey a CSV, TSV or Parquet upload from its header, first rows and row count"""
+        sample_df = self._read_flat_file(session, nrows=SURVEY_SAMPLE_ROWS)
+        rows = len(sample_df) if len(sample_df) < SURVEY_SAMPLE_ROWS else self._count_flat_file_rows(session)
+        return {
+            'columns': len(sample_df.columns),
+            'rows': rows,
+            'df': self._clean_sheet_frame(sample_df)
+        }
+
+    def _survey_sheets(self, session, sheets):
+        """Read the dimensions, header and a few sample rows of each sheet without loading it fully"""
+        pending = [sheet for sheet in sheets if sheet not in session.frames and sheet not in session.surveys]
+        if pending and session.engine in FLAT_FILE_ENGINES:
+            # Flat files are read in chunks when processed, so they are surveyed rather than loaded
+            for sheet in pending:
+                if sheet in session.errors:
+                    continue
+                try:
+                    session.surveys[sheet] = self._survey_flat_file(session)
+                except Exception as e:
+                    logger.warning(f"Could not survey sheet '{sheet}', it will be loaded fully: {str(e)}")
+            pending = []
+        if pending and self._uses_native_reader(session):
+            # The native reader stops at the sample rows instead of opening the workbook with openpyxl
+            for sheet in pending:
+                if sheet in session.errors:
+                    continue
+                try:
+                    session.surveys[sheet] = self._survey_sheet_native(session, sheet)
+                except Exception as e:
+                    logger.warning(f"Could not survey sheet '{sheet}', it will be loaded fully: {str(e)}")
+            pending = []
+        if pending:
+            wb = None
+            # Only xlsx workbooks can be surveyed; other formats fall back to loading the sheets fully
+            if session.engine == 'openpyxl':
+                try:
+                    import openpyxl
+                    wb = openpyxl.load_workbook(session.file_path, read_only=True, data_only=True)
+                except Exception as e:
+                    logger.info(f"Sheet survey not available, loading sheets fully: {str(e)}")
+            try:
+                for sheet in pending:
+                    if wb is None or sheet in session.errors:
+                        continue
+                    try:
+                        ws = wb[sheet]
+                        extent = self._get_sheet_extent(session, sheet)
+                        if extent is not None:
+                            # Count rows up to the last one holding data, not the declared dimension
+                            last_row = extent['rows']
+                            data = list(ws.iter_rows(min_row=1, max_row=min(last_row, 1 + SURVEY_SAMPLE_ROWS),
+                                                     max_col=extent['columns'], values_only=True)) if last_row else []
+                            # Columns holding data only below the sample rows are kept, as a full load keeps them
+                            width = extent['columns'] if last_row else 0
+                        else:
+                            # The declared dimensions are only missing when the writer omitted them
+                            if ws.max_row is None or ws.max_column is None:
+                                continue
+                            last_row = ws.max_row
+                            data = list(ws.iter_rows(min_row=1, max_row=1 + SURVEY_SAMPLE_ROWS, values_only=True))
+                            # Drop trailing columns that are empty in the header and all sample rows
+                            width = 0
+                            for row in data:
+                                for i, value in enumerate(row):
+                                    if value is not None and i >= width:
+                                        width = i + 1
+                        if data and width:
+                            data = [tuple(row[:width]) + (None,) * (width - len(row)) for row in data]
+                            header = self._mangle_duplicate_names([col if col is not None else f"Unnamed: {i}" for i, col in enumerate(data[0])])
+                            sample_df = pd.DataFrame(data[1:], columns=header)
+                            rows = max(last_row - 1, len(sample_df))
+                        else:
+                            sample_df = pd.DataFrame()
+                            rows = 0
+                        session.surveys[sheet] = {
+                            'columns': len(sample_df.columns),
+                            'rows': rows,
+                            'df': self._clean_sheet_frame(sample_df)
+                        }
+                    except Exception as e:
+                        logger.warning(f"Could not survey sheet '{sheet}', it will be loaded fully: {str(e)}")
+            finally:
+                if wb is not None:
+                    wb.close()
+
+        surveys = {}
+        for sheet in sheets:
+            if sheet in session.frames:
+                df = session.frames[sheet]
+                surveys[sheet] = {'columns': len(df.columns), 'rows': len(df), 'df': df}
+            elif sheet in session.surveys:
+                surveys[sheet] = session.surveys[sheet]
+        return surveys
+
+    def _get_process_pool(self, purpose, workers):
+        """Get the process pool used for a purpose, restarting it if the worker count changed"""
+        with self._sessions_lock:
+            pool, pool_workers = self._pools.get(purpose, (None, 0))
+            if pool is None or pool_workers != workers:
+                if pool is not None:
+                    pool.shutdown(wait=False)
+                # Spawned workers don't inherit locks held by other threads of the web server
+                pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+                self._pools[purpose] = (pool, workers)
+            return pool
+
+    def _discard_process_pool(self, purpose, pool):
+        """Forget a pool whose worker died, so that a fresh one is started next time"""
+        with self._sessions_lock:
+            if self._pools.get(purpose, (None, 0))[0] is pool:
+                del self._pools[purpose]
+
+    def _parse_sheets_parallel(self, session, sheets, survey, workers):
+        """Scan or load the pending sheets of a workbook across a process pool
+
+        xlsx sheets that will be surveyed only need their extent scanned; sheets of
+        other formats are loaded fully. The results are merged into the session,
+        where the serial analysis finds them. Small workbooks are left to it.
+        """
+        surveyed = survey and session.engine == 'openpyxl'
+        if surveyed:
+            pending = [sheet for sheet in sheets if sheet not in session.frames and sheet not in session.extents]
+        else:
+            pending = [sheet for sheet in sheets if sheet not in session.frames and sheet not in session.errors]
+        if workers <= 1 or len(pending) < 2 or os.path.getsize(session.file_path) < PARALLEL_MIN_FILE_SIZE:
+            return
+
+        logger.info(f"Parsing {len(pending)} sheets of {os.path.basename(session.file_path)} with {workers} worker processes")
+        pool = self._get_process_pool('parse', workers)
+        futures = OrderedDict(
+            (sheet, pool.submit(_parse_sheet_in_worker, session.file_path, session.engine, session.xlsx_engine,
+                                 session.read_path, sheet, not surveyed))
+            for sheet in pending
+        )
+        for sheet, future in futures.items():
+            try:
+                result = future.result()
+            except Exception as e:
+                # The serial analysis will parse this sheet itself
+                logger.warning(f"Parallel parsing of sheet '{sheet}' failed, parsing it serially: {str(e)}")
+                if isinstance(e, BrokenProcessPool):
+                    self._discard_process_pool('parse', pool)
+                continue
+            if result.get('extent') is not None:
+                session.extents[sheet] = result['extent']
+            if 'frame' in result:
+                session.frames[sheet] = result['frame']
+                session.readers[sheet] = result['reader']
+                if result['read_path'] != session.read_path:
+                    session.read_path = result['read_path']
+            elif 'error' in result:
+                session.errors[sheet] = result['error']
+
+    def analyze_file(self, file_path, sheet_name=None, survey=True, load=None, workers=None, engine=None):
+        """Analyze an Excel file and return column information
+
+        With survey enabled only the sheet that is selected is loaded fully; the
+        other sheets are described from their dimensions and a few sample rows.
+        With load disabled the selected sheet is described from its survey too,
+        so that streamed processing never holds the whole sheet; load defaults to
+        loading the sheet unless STREAM_PROCESSING is enabled.
+        With more than one worker the sheets are parsed across a process pool;
+        workers defaults to PARSE_WORKERS. engine selects the xlsx reader, one of
+        XLSX_ENGINES, and defaults to XLSX_ENGINE.
+        """
+        if load is None:
+            load = not STREAM_PROCESSING
         try:
-            # Get sheet names first
-            xl = pd.ExcelFile(file_path)
-            sheet_names = xl.sheet_names
+            # Get sheet names first, reusing the parsed upload if it was seen before
+            session = self.get_session(file_path)
+            self._set_xlsx_engine(session, engine)
+            sheet_names = self._get_sheet_names(session)
+
+            # Parse independent sheets in parallel when enabled, before the serial pass below
+            self._parse_sheets_parallel(session, sheet_names, survey, PARSE_WORKERS if workers is None else workers)
 
             # Create a case-insensitive lookup dictionary for sheet names
             sheet_name_lookup = {name.lower().strip(): name for name in sheet_names}
@@ -42,95 +1450,13 @@ class ExcelStandardizer:
 
             # Collect information about all sheets
             sheet_info = {}
+            surveys = self._survey_sheets(session, sheet_names) if survey else {}
             for sheet in sheet_names:
+                if sheet in surveys:
+                    sheet_info[sheet] = dict(surveys[sheet])
+                    continue
                 try:
-                    # Try to read the sheet with different engines and options if one fails
-                    try:
-                        # First try with default settings
-                        temp_df = pd.read_excel(file_path, sheet_name=sheet)
-                    except Exception as first_error:
-                        try:
-                            # Try with openpyxl engine
-                            logger.warning(f"First attempt to read sheet '{sheet}' failed, trying with openpyxl engine")
-                            temp_df = pd.read_excel(file_path, sheet_name=sheet, engine='openpyxl')
-                        except Exception:
-                            try:
-                                # Try with converters to handle mixed data types
-                                logger.warning(f"Second attempt to read sheet '{sheet}' failed, trying with converters")
-                                # Create a converter that converts everything to string
-                                converters = {i: str for i in range(100)}  # Handle up to 100 columns
-                                temp_df = pd.read_excel(file_path, sheet_name=sheet, converters=converters)
-                            except Exception:
-                                try:
-                                    # Try with direct openpyxl access
-                                    logger.warning(f"Third attempt to read sheet '{sheet}' failed, trying with direct openpyxl access")
-                                    import openpyxl
-                                    wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
-                                    ws = wb[sheet]
-                                    data = []
-                                    for row in ws.rows:
-                                        data.append([cell.value for cell in row])
-                                    if data:
-                                        temp_df = pd.DataFrame(data[1:], columns=data[0])
-                                    else:
-                                        temp_df = pd.DataFrame()
-                                except Exception:
-                                    # If all attempts fail, raise the original error
-                                    logger.error(f"All attempts to read sheet '{sheet}' failed")
-                                    raise first_error
-
-                    # Clean column names by stripping whitespace and handling special characters
-                    original_columns = temp_df.columns.tolist()
-                    cleaned_columns = []
-                    for col in original_columns:
-                        if isinstance(col, str):
-                            # Strip whitespace and replace problematic characters
-                            cleaned_col = col.strip()
-                            # Replace non-breaking spaces with regular spaces
-                            cleaned_col = cleaned_col.replace('\xa0', ' ').strip()
-                            # Log if cleaning changed the column name
-                            if cleaned_col != col:
-                                logger.info(f"Cleaned column name: '{col}' -> '{cleaned_col}'")
-                            cleaned_columns.append(cleaned_col)
-                        else:
-                            # Convert non-string columns to string
-                            try:
-                                cleaned_col = str(col).strip()
-                                logger.info(f"Converted non-string column to string: {type(col).__name__} -> '{cleaned_col}'")
-                                cleaned_columns.append(cleaned_col)
-                            except Exception:
-                                # If conversion fails, use a placeholder name
-                                placeholder = f"Column_{len(cleaned_columns)}"
-                                logger.warning(f"Could not convert column of type {type(col).__name__} to string, using placeholder: '{placeholder}'")
-                                cleaned_columns.append(placeholder)
-
-                    # Check for duplicate column names after cleaning
-                    if len(cleaned_columns) != len(set(cleaned_columns)):
-                        # Handle duplicate column names by adding suffixes
-                        seen = {}
-                        for i, col in enumerate(cleaned_columns):
-                            if col in seen:
-                                seen[col] += 1
-                                cleaned_columns[i] = f"{col}_{seen[col]}"
-                                logger.warning(f"Renamed duplicate column: '{col}' -> '{cleaned_columns[i]}'")
-                            else:
-                                seen[col] = 0
-
-                    # Assign cleaned column names
-                    temp_df.columns = cleaned_columns
-
-                    # Convert all data to strings to handle mixed data types
-                    for col in temp_df.columns:
-                        try:
-                            # Convert column to string, handling NaN values
-                            temp_df[col] = temp_df[col].astype(str)
-                            # Replace 'nan' strings with empty strings
-                            temp_df[col] = temp_df[col].replace('nan', '')
-                            # Replace non-breaking spaces with regular spaces
-                            if temp_df[col].dtype == 'object':
-                                temp_df[col] = temp_df[col].str.replace('\xa0', ' ')
-                        except Exception as e:
-                            logger.warning(f"Error converting column '{col}' to string: {str(e)}")
+                    temp_df = self._get_sheet_frame(session, sheet)
 
                     sheet_info[sheet] = {
                         'columns': len(temp_df.columns),
@@ -204,11 +1530,10 @@ class ExcelStandardizer:
                         best_sheet = None
                         max_columns = 0
                     else:
-                        temp_df = sheet_info['Sheet1']['df']
                         # Verify it has data
-                        if len(temp_df.columns) > 0 and len(temp_df) > 0:
+                        if sheet_info['Sheet1']['columns'] > 0 and sheet_info['Sheet1']['rows'] > 0:
                             sheet_name = 'Sheet1'
-                            df = temp_df
+                            df = sheet_info['Sheet1']['df']
                         else:
                             # If Sheet1 exists but is empty, try other sheets
                             best_sheet = None
@@ -238,11 +1563,22 @@ class ExcelStandardizer:
                         sheet_name = sheet_names[0]
                         df = sheet_info[sheet_name]['df']
 
+            # Load the selected sheet fully if it was only surveyed
+            if load and sheet_name in surveys and 'error' not in sheet_info[sheet_name] and sheet_name not in session.frames:
+                try:
+                    df = self._get_sheet_frame(session, sheet_name)
+                except Exception as e:
+                    raise ValueError(f"Error reading sheet '{sheet_name}': {str(e)}")
+                sheet_info[sheet_name].update({'columns': len(df.columns), 'rows': len(df), 'df': df})
+
             # Check if we found a valid sheet
             if df is None or len(df.columns) == 0:
                 # No valid sheet found, raise an error
                 raise ValueError("Could not find a valid sheet in the Excel file. All sheets are either empty or have errors.")
 
+            # A surveyed sheet counts its rows from its extent, not from the sample rows
+            shape = (sheet_info[sheet_name]['rows'], len(df.columns))
+
             # Get column information
             columns_info = []
             for col in df.columns:
@@ -257,7 +1593,7 @@ class ExcelStandardizer:
             self.log_entries.append({
                 'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
                 'action': 'File Analysis',
-                'details': f'Analyzed file {os.path.basename(file_path)} (sheet: {sheet_name}) with {len(df)} rows and {len(df.columns)} columns'
+                'details': f'Analyzed file {os.path.basename(file_path)} (sheet: {sheet_name}) with {shape[0]} rows and {shape[1]} columns'
             })
 
             # Remove the dataframe from sheet_info to make it JSON serializable
@@ -265,10 +1601,17 @@ class ExcelStandardizer:
             for sheet, info in sheet_info.items():
                 sheet_info_clean[sheet] = {
                     'columns': info['columns'],
-                    'rows': info['rows']
+                    'rows': info['rows'],
+                    # Reader that loaded the sheet, or the detected engine if it was only surveyed
+                    'engine': session.readers.get(sheet, session.engine)
                 }
+                # Range the sheet declares and the range that actually holds data, for scanned xlsx sheets
+                extent = session.extents.get(sheet)
+                if extent:
+                    sheet_info_clean[sheet]['declared_range'] = extent['declared_range']
+                    sheet_info_clean[sheet]['data_range'] = extent['data_range']
 
-            return columns_info, df.shape, sheet_names, sheet_name, sheet_info_clean
+            return columns_info, shape, sheet_names, sheet_name, sheet_info_clean
         except Exception as e:
             logger.error(f"Error analyzing file: {str(e)}")
             self.log_entries.append({
@@ -292,108 +1635,84 @@ class ExcelStandardizer:
             })
             raise
 
-    def process_file(self, input_file, mapping_config, split_config=None, custom_values=None, sheet_name=None):
-        """Process an Excel file with the given mapping configuration"""
+    def suggest_mapping(self, columns, standard_columns=None):
+        """Suggest an input column with a confidence for each standard column
+
+        Every standard column, with its common variations, is scored against every
+        input column at once, and each input column is suggested at most once.
+        Returns {standard column: {'column': ..., 'confidence': ...}}.
+        """
+        if standard_columns is None:
+            standard_columns = self.get_standard_columns()
+        aliases = {std_col: COMMON_COLUMN_VARIATIONS.get(std_col.lower().strip(), []) for std_col in standard_columns}
+        return match_headers(standard_columns, columns, aliases)
+
+    def process_file(self, input_file, mapping_config, split_config=None, custom_values=None, sheet_name=None, streaming=None, chunk_size=None, engine=None, split_workers=None, write_profile=None, archive=None, output_format=None):
+        """Process an Excel file with the given mapping configuration
+
+        With streaming enabled the sheet is read, mapped and written in chunks of
+        chunk_size rows, so memory use does not grow with the number of rows.
+        engine selects the xlsx reader as in analyze_file; streaming always reads
+        the rows with openpyxl. split_config names the column to split the output
+        by, and with 'case_insensitive' set, values that differ only in case are
+        written to the same file. Without streaming, split files are written
+        across split_workers processes, defaulting to SPLIT_WORKERS. The errors
+        found are returned as an ErrorLog, along with the sheet processed and its
+        cleaned header. write_profile selects the xlsxwriter options of the output
+        workbooks, one of OUTPUT_WRITE_PROFILES, and defaults to OUTPUT_WRITE_PROFILE.
+        output_format is the file type of the outputs, one of OUTPUT_FORMATS, and
+        defaults to OUTPUT_FORMAT. With an OutputArchive each finished file is
+        added to it instead of the output folder, and output_files lists the member names; the caller closes
+        the archive. The processing log is always written to the output folder.
+        """
+        if streaming is None:
+            streaming = STREAM_PROCESSING
+        write_profile = write_profile or OUTPUT_WRITE_PROFILE
+        if write_profile not in OUTPUT_WRITE_PROFILES:
+            raise ValueError(f"Unknown write profile '{write_profile}'. Available: {', '.join(OUTPUT_WRITE_PROFILES)}")
+        output_format = (output_format or OUTPUT_FORMAT).lower().lstrip('.')
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format '{output_format}'. Available: {', '.join(OUTPUT_FORMATS)}")
+        if output_format == 'parquet':
+            try:
+                import pyarrow.parquet
+            except ImportError:
+                raise ValueError("Writing Parquet files requires the pyarrow package")
         try:
             # Use the analyze_file method to get sheet information and handle errors
-            _, _, _, selected_sheet, _ = self.analyze_file(input_file, sheet_name)
+            _, _, _, selected_sheet, _ = self.analyze_file(input_file, sheet_name, load=False, engine=engine)
 
             # Use the selected sheet from analyze_file
             sheet_name = selected_sheet
             logger.info(f"Using sheet '{sheet_name}' for processing")
+            session = self.get_session(input_file)
 
-            # Load the Excel file directly with the selected sheet using the same robust approach as in analyze_file
+            # Get standard columns
+            standard_columns = self.get_standard_columns()
+
+            # Resolve the mapping against the header before reading any rows
             try:
-                # Try different methods to load the sheet
-                try:
-                    # First try with default settings
-                    df = pd.read_excel(input_file, sheet_name=sheet_name)
-                except Exception as first_error:
-                    try:
-                        # Try with openpyxl engine
-                        logger.warning(f"First attempt to read sheet '{sheet_name}' failed, trying with openpyxl engine")
-                        df = pd.read_excel(input_file, sheet_name=sheet_name, engine='openpyxl')
-                    except Exception:
-                        try:
-                            # Try with converters to handle mixed data types
-                            logger.warning(f"Second attempt to read sheet '{sheet_name}' failed, trying with converters")
-                            # Create a converter that converts everything to string
-                            converters = {i: str for i in range(100)}  # Handle up to 100 columns
-                            df = pd.read_excel(input_file, sheet_name=sheet_name, converters=converters)
-                        except Exception:
-                            try:
-                                # Try with direct openpyxl access
-                                logger.warning(f"Third attempt to read sheet '{sheet_name}' failed, trying with direct openpyxl access")
-                                import openpyxl
-                                wb = openpyxl.load_workbook(input_file, read_only=True, data_only=True)
-                                ws = wb[sheet_name]
-                                data = []
-                                for row in ws.rows:
-                                    data.append([cell.value for cell in row])
-                                if data:
-                                    df = pd.DataFrame(data[1:], columns=data[0])
-                                else:
-                                    df = pd.DataFrame()
-                            except Exception:
-                                # If all attempts fail, raise the original error
-                                logger.error(f"All attempts to read sheet '{sheet_name}' failed")
-                                raise first_error
-
-                # Clean column names by stripping whitespace and handling special characters
-                original_columns = df.columns.tolist()
-                cleaned_columns = []
-                for col in original_columns:
-                    if isinstance(col, str):
-                        # Strip whitespace and replace problematic characters
-                        cleaned_col = col.strip()
-                        # Replace non-breaking spaces with regular spaces
-                        cleaned_col = cleaned_col.replace('\xa0', ' ').strip()
-                        # Log if cleaning changed the column name
-                        if cleaned_col != col:
-                            logger.info(f"Cleaned column name: '{col}' -> '{cleaned_col}'")
-                        cleaned_columns.append(cleaned_col)
-                    else:
-                        # Convert non-string columns to string
-                        try:
-                            cleaned_col = str(col).strip()
-                            logger.info(f"Converted non-string column to string: {type(col).__name__} -> '{cleaned_col}'")
-                            cleaned_columns.append(cleaned_col)
-                        except Exception:
-                            # If conversion fails, use a placeholder name
-                            placeholder = f"Column_{len(cleaned_columns)}"
-                            logger.warning(f"Could not convert column of type {type(col).__name__} to string, using placeholder: '{placeholder}'")
-                            cleaned_columns.append(placeholder)
-
-                # Check for duplicate column names after cleaning
-                if len(cleaned_columns) != len(set(cleaned_columns)):
-                    # Handle duplicate column names by adding suffixes
-                    seen = {}
-                    for i, col in enumerate(cleaned_columns):
-                        if col in seen:
-                            seen[col] += 1
-                            cleaned_columns[i] = f"{col}_{seen[col]}"
-                            logger.warning(f"Renamed duplicate column: '{col}' -> '{cleaned_columns[i]}'")
-                        else:
-                            seen[col] = 0
+                header = self._read_header(session, sheet_name)
+            except Exception as e:
+                logger.error(f"Error loading sheet '{sheet_name}': {str(e)}")
+                raise ValueError(f"Error loading sheet '{sheet_name}': {str(e)}")
+            mapping_plan, question_col = ColumnResolver(header).build_plan(mapping_config, standard_columns, custom_values)
 
-                # Assign cleaned column names
-                df.columns = cleaned_columns
+            # Only the mapped columns, the question column and the split column are read
+            split_column = split_config.get('column') if split_config else None
+            needed = set(mapping_plan.values()) | {question_col, split_column}
+            columns = [col for col in header if col in needed]
 
-                # Convert all data to strings to handle mixed data types
-                for col in df.columns:
-                    try:
-                        # Convert column to string, handling NaN values
-                        df[col] = df[col].astype(str)
-                        # Replace 'nan' strings with empty strings
-                        df[col] = df[col].replace('nan', '')
-                        # Replace non-breaking spaces with regular spaces
-                        if df[col].dtype == 'object':
-                            df[col] = df[col].str.replace('\xa0', ' ')
-                    except Exception as e:
-                        logger.warning(f"Error converting column '{col}' to string: {str(e)}")
+            if streaming:
+                return self._process_file_streaming(input_file, sheet_name, standard_columns, header, columns, mapping_plan,
+                                                    question_col, split_config, custom_values, chunk_size or STREAM_CHUNK_SIZE, write_profile, archive, output_format)
+
+            # Reuse the sheet parsed during analysis instead of reading the file again
+            try:
+                df = self._get_sheet_columns(session, sheet_name, columns)
 
                 # Log column information
-                logger.info(f"Processing file with {len(df)} rows and {len(df.columns)} columns")
+                logger.info(f"Processing file with {len(df)} rows and {len(df.columns)} of {len(header)} columns")
                 logger.info(f"Columns: {df.columns.tolist()}")
             except Exception as e:
                 logger.error(f"Error loading sheet '{sheet_name}': {str(e)}")
@@ -414,197 +1733,7 @@ class ExcelStandardizer:
                 'details': f'Loaded file {input_filename} with {len(df)} rows and {len(df.columns)} columns'
             })
 
-            # Get standard columns
-            standard_columns = self.get_standard_columns()
-
-            # Create result dataframe with standard columns
-            result_df = pd.DataFrame(columns=standard_columns)
-
-            # Track errors and error questions
-            errors = []
-            error_questions = []
-
-            # Apply mapping
-            for std_col in standard_columns:
-                # Check if this column has a custom value
-                if custom_values and std_col in custom_values and custom_values[std_col]:
-                    # Use the custom value for all rows
-                    result_df[std_col] = custom_values[std_col]
-                    continue
-
-                # Check if this column is mapped
-                input_col = mapping_config.get(std_col)
-
-                # Create a case-insensitive column lookup to handle columns with trailing spaces
-                column_lookup = {col.lower().strip().replace('\xa0', ' ') if isinstance(col, str) else str(col).lower().strip(): col for col in df.columns}
-
-                # Try exact match first, then try with stripped whitespace
-                if input_col and input_col in df.columns:
-                    # Use the column as is
-                    actual_input_col = input_col
-                    logger.info(f"Using exact column match: '{input_col}'")
-                elif input_col and isinstance(input_col, str) and input_col.lower().strip().replace('\xa0', ' ') in column_lookup:
-                    # Use the actual column name from the lookup
-                    actual_input_col = column_lookup[input_col.lower().strip().replace('\xa0', ' ')]
-                    logger.info(f"Using case-insensitive column match: '{input_col}' -> '{actual_input_col}'")
-                # Try fuzzy matching for column names
-                elif input_col and isinstance(input_col, str):
-                    # Find the closest match based on similarity
-                    best_match = None
-                    best_score = 0
-                    input_col_lower = input_col.lower().strip().replace('\xa0', ' ')
-
-                    # Try common variations first
-                    common_variations = {
-                        'question type': ['q type', 'qtype', 'type', 'question', 'q_type'],
-                        'difficulty level': ['level', 'difficulty', 'diff level', 'diff', 'difficulty_level'],
-                        'question text': ['q text', 'qtext', 'question', 'text', 'q_text', 'question_text'],
-                        'option (a)': ['option a', 'option/ answer 1', 'option 1', 'option/answer 1', 'answer 1', 'a'],
-                        'option (b)': ['option b', 'option/ answer 2', 'option 2', 'option/answer 2', 'answer 2', 'b'],
-                        'option (c)': ['option c', 'option/ answer 3', 'option 3', 'option/answer 3', 'answer 3', 'c'],
-                        'option (d)': ['option d', 'option/ answer 4', 'option 4', 'option/answer 4', 'answer 4', 'd'],
-                        'option (e)': ['option e', 'option/ answer 5', 'option 5', 'option/answer 5', 'answer 5', 'e'],
-                        'option (f)': ['option f', 'option/ answer 6', 'option 6', 'option/answer 6', 'answer 6', 'f'],
-                        'correct answer': ['answer', 'correct', 'correct_answer', 'right answer', 'right_answer'],
-                        'answer explanation': ['explanation', 'answer_explanation', 'solution', 'rationale'],
-                        'score': ['marks', 'points', 'value', 'weight'],
-                        'topics': ['topic', 'subject', 'category', 'skill', 'topics_list'],
-                        'author': ['author name', 'created by', 'writer', 'author_name', 'author email', 'author\'s email']
-                    }
-
-                    # Check if input_col matches any common variation
-                    for standard_col, variations in common_variations.items():
-                        if input_col_lower == standard_col or input_col_lower in variations:
-                            # Try to find this standard column or its variations in the dataframe
-                            for col in df.columns:
-                                col_lower = col.lower().strip().replace('\xa0', ' ')
-                                if col_lower == standard_col or col_lower in variations:
-                                    best_match = col
-                                    best_score = 1.0  # Perfect match through variations
-                                    logger.info(f"Found match through common variations: '{input_col}' -> '{best_match}'")
-                                    break
-
-                    # If no match found through common variations, try fuzzy matching
-                    if best_match is None:
-                        for col in df.columns:
-                            if not isinstance(col, str):
-                                col_str = str(col)
-                            else:
-                                col_str = col
-
-                            col_lower = col_str.lower().strip().replace('\xa0', ' ')
-
-                            # Check if one is a substring of the other
-                            if col_lower in input_col_lower or input_col_lower in col_lower:
-                                score = 0.8  # High score for substring match
-                            else:
-                                # Count matching characters
-                                common_chars = set(col_lower) & set(input_col_lower)
-                                score = len(common_chars) / max(len(col_lower), len(input_col_lower))
-
-                            if score > best_score:
-                                best_score = score
-                                best_match = col
-
-                    if best_score > 0.5:  # Lower threshold to catch more matches
-                        actual_input_col = best_match
-                        logger.info(f"Using fuzzy column match: '{input_col}' -> '{actual_input_col}' (score: {best_score:.2f})")
-                    else:
-                        # No good match found
-                        actual_input_col = None
-                        logger.warning(f"No match found for column '{input_col}'. Available columns: {df.columns.tolist()}")
-                else:
-                    # Column not found, skip to the else block below
-                    actual_input_col = None
-
-                if actual_input_col:
-                    # Copy the column data
-                    result_df[std_col] = df[actual_input_col]
-
-                    # Apply standardization for specific columns
-                    if std_col == 'Question Type':
-                        # Get the question text column for error tracking
-                        question_col = mapping_config.get('Question Text')
-
-                        # Apply the same case-insensitive matching for the question column
-                        if question_col and question_col in df.columns:
-                            actual_question_col = question_col
-                        elif question_col and isinstance(question_col, str) and question_col.lower().strip() in column_lookup:
-                            actual_question_col = column_lookup[question_col.lower().strip()]
-                            logger.info(f"Using case-insensitive match for question column: '{question_col}' -> '{actual_question_col}'")
-                        else:
-                            actual_question_col = None
-
-                        question_texts = df[actual_question_col].tolist() if actual_question_col else [''] * len(df)
-
-                        # Apply standardization with error tracking
-                        for i, value in enumerate(result_df[std_col]):
-                            std_value, has_error = self._standardize_question_type(value)
-                            result_df.at[i, std_col] = std_value
-                            if has_error:
-                                errors.append(f"Unknown Question Type: '{value}'")
-                                error_questions.append(f"Row {i+2}: {question_texts[i] if i < len(question_texts) else 'Unknown'}")
-
-                    elif std_col == 'Difficulty Level':
-                        # Get the question text column for error tracking
-                        question_col = mapping_config.get('Question Text')
-
-                        # Apply the same case-insensitive matching for the question column
-                        if question_col and question_col in df.columns:
-                            actual_question_col = question_col
-                        elif question_col and isinstance(question_col, str) and question_col.lower().strip() in column_lookup:
-                            actual_question_col = column_lookup[question_col.lower().strip()]
-                            logger.info(f"Using case-insensitive match for question column: '{question_col}' -> '{actual_question_col}'")
-                        else:
-                            actual_question_col = None
-
-                        question_texts = df[actual_question_col].tolist() if actual_question_col else [''] * len(df)
-
-                        # Apply standardization with error tracking
-                        for i, value in enumerate(result_df[std_col]):
-                            std_value, has_error = self._standardize_difficulty_level(value)
-                            result_df.at[i, std_col] = std_value
-                            if has_error:
-                                errors.append(f"Unknown Difficulty Level: '{value}'")
-                                error_questions.append(f"Row {i+2}: {question_texts[i] if i < len(question_texts) else 'Unknown'}")
-
-                    elif std_col == 'Correct Answer':
-                        # Get the question text column for error tracking
-                        question_col = mapping_config.get('Question Text')
-
-                        # Apply the same case-insensitive matching for the question column
-                        if question_col and question_col in df.columns:
-                            actual_question_col = question_col
-                        elif question_col and isinstance(question_col, str) and question_col.lower().strip() in column_lookup:
-                            actual_question_col = column_lookup[question_col.lower().strip()]
-                            logger.info(f"Using case-insensitive match for question column: '{question_col}' -> '{actual_question_col}'")
-                        else:
-                            actual_question_col = None
-
-                        question_texts = df[actual_question_col].tolist() if actual_question_col else [''] * len(df)
-
-                        # Apply standardization with error tracking
-                        for i, value in enumerate(result_df[std_col]):
-                            std_value, has_error = self._standardize_correct_answer(value)
-                            result_df.at[i, std_col] = std_value
-                            if has_error:
-                                errors.append(f"Invalid Correct Answer format: '{value}'")
-                                error_questions.append(f"Row {i+2}: {question_texts[i] if i < len(question_texts) else 'Unknown'}")
-                else:
-                    # Column not mapped or not found - ensure it exists but is empty
-                    result_df[std_col] = None
-
-                    # Only report errors for required fields
-                    if std_col not in ['Recording Time Limit:(Upto 5 mins)',
-                                      'Retake Allowed:(Upto 5 mins)',
-                                      'Set Prep Time (0.5 to 5 mins)',
-                                      'Proofreading Status',
-                                      'Editor Email',
-                                      'Differential Scoring',
-                                      'Answer Explanation',
-                                      'Topics']:  # Topics is no longer mandatory
-                        errors.append(f"Required column '{std_col}' not mapped or not found")
-                        error_questions.append("Row 0 (N/A)")  # Used when column is missing entirely
+            result_df, errors = self._apply_mapping(df, standard_columns, mapping_plan, question_col, custom_values)
 
             # Log the mapping process
             self.log_entries.append({
@@ -612,139 +1741,26 @@ class ExcelStandardizer:
                 'action': 'Mapping Applied',
                 'details': f'Applied mapping configuration'
             })
+            self._log_custom_values(standard_columns, custom_values)
 
             # Process file splitting if configured
             output_files = []
             if split_config and split_config.get('column'):
                 split_column = split_config['column']
                 if split_column in df.columns:
-                    # Get unique values in the split column
-                    unique_values = df[split_column].dropna().unique()
-
-                    for value in unique_values:
-                        # Filter rows for this value
-                        try:
-                            # First try with exact matching
-                            value_mask = df[split_column] == value
-                            filtered_indices = df.index[value_mask]
-
-                            # Check if we got any matches
-                            if len(filtered_indices) == 0:
-                                # Try case-insensitive matching for string values
-                                if isinstance(value, str):
-                                    # Convert column to string and do case-insensitive comparison
-                                    value_mask = df[split_column].astype(str).str.lower() == value.lower()
-                                    filtered_indices = df.index[value_mask]
-
-                            # Create a copy of the filtered result dataframe
-                            value_df = result_df.loc[filtered_indices].copy()
-
-                            # If still no matches, log a warning but continue
-                            if len(value_df) == 0:
-                                logger.warning(f"No rows found for {split_column}='{value}'. This may indicate a data issue.")
-                                # Create an empty dataframe with the same columns
-                                value_df = pd.DataFrame(columns=result_df.columns)
-                        except Exception as e:
-                            logger.error(f"Error filtering rows for {split_column}='{value}': {str(e)}")
-                            # Create an empty dataframe with the same columns as a fallback
-                            value_df = pd.DataFrame(columns=result_df.columns)
-
-                        # Create a safe filename
-                        safe_value = str(value).replace('/', '_').replace('\\', '_')
-                        safe_value = ''.join(c for c in safe_value if c.isalnum() or c in '._- ')
-
-                        # Save to file in the output folder
-                        output_filename = f"{safe_value}.xlsx"
-                        output_path = os.path.join(output_folder, output_filename)
-                        try:
-                            # Ensure all columns are in the correct order according to standard format
-                            # Make a copy to avoid modifying the original DataFrame
-                            value_df_copy = value_df.copy()
-                            # Check if all standard columns exist in the DataFrame
-                            missing_columns = [col for col in standard_columns if col not in value_df_copy.columns]
-                            if missing_columns:
-                                # Add missing columns with empty values
-                                for col in missing_columns:
-                                    value_df_copy[col] = None
-                            # Reorder columns according to standard format
-                            value_df_copy = value_df_copy[standard_columns]
-
-                            # Use xlsxwriter for better formatting control
-                            try:
-                                with pd.ExcelWriter(output_path, engine='xlsxwriter') as writer:
-                                    # First check if the dataframe is empty
-                                    if len(value_df_copy) == 0:
-                                        # Add at least one empty row to avoid errors
-                                        empty_row = {col: '' for col in value_df_copy.columns}
-                                        value_df_copy = pd.DataFrame([empty_row], columns=value_df_copy.columns)
-
-                                    # Write the dataframe to Excel
-                                    value_df_copy.to_excel(writer, index=False, sheet_name='Questions')
-
-                                    # Get the xlsxwriter workbook and worksheet objects
-                                    workbook = writer.book
-                                    worksheet = writer.sheets['Questions']
-
-                                    # Set column widths for better readability - increased widths for all columns
-                                    worksheet.set_column('A:A', 20)  # Question Type
-                                    worksheet.set_column('B:B', 20)  # Difficulty Level
-                                    worksheet.set_column('C:C', 80)  # Question Text
-                                    worksheet.set_column('D:G', 50)  # Options A-D
-                                    worksheet.set_column('H:H', 20)  # Option E
-                                    worksheet.set_column('I:I', 20)  # Correct Answer
-                                    worksheet.set_column('J:J', 80)  # Answer Explanation
-                                    worksheet.set_column('K:K', 15)  # Score
-                                    worksheet.set_column('L:L', 40)  # Topics
-                                    worksheet.set_column('M:Z', 30)  # Other columns
-
-                                    # Add a header format
-                                    header_format = workbook.add_format({
-                                        'bold': True,
-                                        'text_wrap': True,
-                                        'valign': 'top',
-                                        'border': 1
-                                    })
-
-                                    # Write the column headers with the defined format
-                                    for col_num, col_value in enumerate(value_df_copy.columns.values):
-                                        worksheet.write(0, col_num, col_value, header_format)
-                            except Exception as e:
-                                logger.error(f"Error using xlsxwriter: {str(e)}")
-                                # Try with a simpler approach
-                                try:
-                                    # First check if the dataframe is empty
-                                    if len(value_df_copy) == 0:
-                                        # Add at least one empty row to avoid errors
-                                        empty_row = {col: '' for col in value_df_copy.columns}
-                                        value_df_copy = pd.DataFrame([empty_row], columns=value_df_copy.columns)
-
-                                    # Try with openpyxl engine
-                                    value_df_copy.to_excel(output_path, index=False, engine='openpyxl', sheet_name='Questions')
-                                except Exception as e2:
-                                    logger.error(f"Error using openpyxl: {str(e2)}")
-                                    # Last resort - try with default engine
-                                    value_df_copy.to_excel(output_path, index=False, sheet_name='Questions')
-                        except Exception as e:
-                            logger.error(f"Error saving file {output_filename}: {str(e)}")
-                            # Try with a different approach as fallback
-                            try:
-                                # First check if the dataframe is empty
-                                if len(value_df) == 0:
-                                    # Add at least one empty row to avoid errors
-                                    empty_row = {col: '' for col in result_df.columns}
-                                    value_df = pd.DataFrame([empty_row], columns=result_df.columns)
-
-                                # Try with openpyxl engine
-                                value_df.to_excel(output_path, index=False, engine='openpyxl')
-                            except Exception as e2:
-                                logger.error(f"Fallback error with openpyxl: {str(e2)}")
-                                try:
-                                    # Last resort - try with default engine and minimal formatting
-                                    value_df.to_excel(output_path, index=False)
-                                except Exception as e3:
-                                    logger.error(f"All attempts to save file failed: {str(e3)}")
-                                    # Add to errors list
-                                    errors.append(f"Failed to save file for {split_column}='{value}': {str(e3)}")
+                    # Group the rows by split value in one pass, then write each group as a slice
+                    order, groups = self._split_groups(df[split_column], split_config.get('case_insensitive', False))
+                    grouped_df = result_df.take(order)
+                    taken = set()
+                    partitions = [(value, self._split_file_path(output_folder, value, output_format, taken), grouped_df.iloc[start:stop])
+                                  for _, value, start, stop in groups]
+
+                    # Results come back in the order of the split values, however the files are written
+                    results = self._write_split_files(partitions, standard_columns, SPLIT_WORKERS if split_workers is None else split_workers,
+                                                      write_profile, archive, output_format)
+                    for (value, _, value_df), (save_error, output_path) in zip(partitions, results):
+                        if save_error:
+                            errors.add('save_failed', split_column, value, detail=save_error)
                         output_files.append(output_path)
 
                         self.log_entries.append({
@@ -753,71 +1769,22 @@ class ExcelStandardizer:
                             'details': f'Created split file for {split_column}="{value}" with {len(value_df)} rows'
                         })
                 else:
-                    errors.append(f"Split column '{split_column}' not found in input file")
+                    errors.add('missing_split_column', split_column)
             else:
-                # Save the entire result to a single file in the output folder
+                # Save the entire result to a single file in the output folder, or the archive
                 # Keep the same name format for non-split files
-                output_filename = f"processed_{os.path.basename(input_file)}"
+                output_filename = f"processed_{os.path.splitext(os.path.basename(input_file))[0]}.{output_format}"
                 output_path = os.path.join(output_folder, output_filename)
+                target = tempfile.TemporaryFile() if archive is not None else output_path
                 try:
-                    # Ensure all columns are in the correct order according to standard format
-                    # Make a copy to avoid modifying the original DataFrame
-                    result_df_copy = result_df.copy()
-                    # Check if all standard columns exist in the DataFrame
-                    missing_columns = [col for col in standard_columns if col not in result_df_copy.columns]
-                    if missing_columns:
-                        # Add missing columns with empty values
-                        for col in missing_columns:
-                            result_df_copy[col] = None
-                    # Reorder columns according to standard format
-                    result_df_copy = result_df_copy[standard_columns]
-
-                    # Use xlsxwriter for better formatting control
-                    with pd.ExcelWriter(output_path, engine='xlsxwriter') as writer:
-                        result_df_copy.to_excel(writer, index=False, sheet_name='Questions')
-
-                        # Get the xlsxwriter workbook and worksheet objects
-                        workbook = writer.book
-                        worksheet = writer.sheets['Questions']
-
-                        # Set column widths for better readability - increased widths for all columns
-                        worksheet.set_column('A:A', 20)  # Question Type
-                        worksheet.set_column('B:B', 20)  # Difficulty Level
-                        worksheet.set_column('C:C', 80)  # Question Text
-                        worksheet.set_column('D:G', 50)  # Options A-D
-                        worksheet.set_column('H:H', 20)  # Option E
-                        worksheet.set_column('I:I', 20)  # Correct Answer
-                        worksheet.set_column('J:J', 80)  # Answer Explanation
-                        worksheet.set_column('K:K', 15)  # Score
-                        worksheet.set_column('L:L', 40)  # Topics
-                        worksheet.set_column('M:Z', 30)  # Other columns
-
-                        # Add a header format
-                        header_format = workbook.add_format({
-                            'bold': True,
-                            'text_wrap': True,
-                            'valign': 'top',
-                            'border': 1
-                        })
-
-                        # Write the column headers with the defined format
-                        for col_num, value in enumerate(result_df_copy.columns.values):
-                            worksheet.write(0, col_num, value, header_format)
-                except Exception as e:
-                    import traceback
-                    error_traceback = traceback.format_exc()
-                    logger.error(f"Error saving file {output_filename}: {str(e)}\n{error_traceback}")
-                    # Try with a different engine as fallback
-                    try:
-                        result_df_copy.to_excel(output_path, index=False, engine='openpyxl')
-                    except Exception as e2:
-                        logger.error(f"Second attempt failed: {str(e2)}")
-                        try:
-                            # Last resort - basic Excel output
-                            result_df.to_excel(output_path, index=False)
-                        except Exception as e3:
-                            logger.error(f"All attempts failed: {str(e3)}")
-                            raise Exception(f"Could not save file {output_filename} after multiple attempts")
+                    save_error = _write_output_file(target, result_df, standard_columns, write_profile, output_format)
+                    if save_error:
+                        raise Exception(f"Could not save file {output_filename} after multiple attempts")
+                    if archive is not None:
+                        output_path = archive.add(output_filename, target)
+                finally:
+                    if archive is not None:
+                        target.close()
                 output_files.append(output_path)
 
                 self.log_entries.append({
@@ -827,33 +1794,15 @@ class ExcelStandardizer:
                 })
 
             # Save log file in the output folder
-            log_filename = f"log_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-            log_path = os.path.join(output_folder, log_filename)
-            with open(log_path, 'w') as f:
-                json.dump({
-                    'file_name': os.path.basename(input_file),
-                    'processing_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                    'entries': self.log_entries,
-                    'errors': errors
-                }, f, indent=2)
-
-            # Apply custom values if provided
-            if custom_values:
-                for column, value in custom_values.items():
-                    if column in result_df.columns:
-                        result_df[column] = value
-                        self.log_entries.append({
-                            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                            'action': 'Custom Value Applied',
-                            'details': f'Applied custom value "{value}" to column "{column}"'
-                        })
+            log_path = self._write_processing_log(input_file, output_folder, errors)
 
             # Return the result
             return {
                 'output_files': output_files,
                 'log_file': log_path,
                 'errors': errors,
-                'error_questions': error_questions
+                'sheet_name': sheet_name,
+                'header': header
             }
         except Exception as e:
             logger.error(f"Error processing file: {str(e)}")
@@ -864,25 +1813,300 @@ class ExcelStandardizer:
             })
             raise
 
+    def _log_custom_values(self, standard_columns, custom_values):
+        """Record the custom values that were applied to standard columns"""
+        for column, value in (custom_values or {}).items():
+            if column in standard_columns and value:
+                self.log_entries.append({
+                    'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                    'action': 'Custom Value Applied',
+                    'details': f'Applied custom value "{value}" to column "{column}"'
+                })
+
+    def _write_processing_log(self, input_file, output_folder, errors):
+        """Save the processing log as JSON in the output folder and return its path"""
+        log_filename = f"log_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        log_path = os.path.join(output_folder, log_filename)
+        with open(log_path, 'w') as f:
+            json.dump({
+                'file_name': os.path.basename(input_file),
+                'processing_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'entries': self.log_entries,
+                'errors': list(errors)
+            }, f, indent=2)
+        return log_path
+
+    def _split_groups(self, values, case_insensitive=False):
+        """Group the rows of a split column by value in a single pass
+
+        Missing (NaN) values belong to no group. Blank values, as cleaned frames
+        hold empty cells, form a group of their own, whose file is named
+        UNNAMED_SPLIT_STEM. With case_insensitive, text values that differ only
+        in case share a group, which takes the first spelling seen.
+        Returns the row positions ordered by group and, for each group in order of
+        first appearance, (key, value, start, stop) where order[start:stop] are its
+        rows in their original order.
+        """
+        codes, uniques = pd.factorize(values)
+        if case_insensitive and len(uniques):
+            # Fold each distinct value once, then regroup the values by their folded key
+            folded = pd.Series([value.lower() if isinstance(value, str) else value for value in uniques], dtype=object)
+            unique_groups, keys = pd.factorize(folded)
+            _, first = np.unique(unique_groups, return_index=True)
+            names = [uniques[i] for i in first]
+            codes = np.where(codes >= 0, unique_groups[np.maximum(codes, 0)], -1)
+        else:
+            keys = names = list(uniques)
+
+        rows = np.flatnonzero(codes >= 0)
+        order = rows[np.argsort(codes[rows], kind='stable')]
+        stops = np.cumsum(np.bincount(codes[rows], minlength=len(names)))
+        starts = stops - np.bincount(codes[rows], minlength=len(names))
+        return order, [(keys[i], names[i], int(starts[i]), int(stops[i])) for i in range(len(names))]
+
+    def _write_split_files(self, partitions, standard_columns, workers, profile=None, archive=None, output_format='xlsx'):
+        """Write the split file of each (value, output path, rows) partition
+
+        With more than one worker the files are written across a process pool,
+        with a few partitions queued per worker at a time. Files a worker could not
+        write are written serially, as are small splits. With an OutputArchive the
+        files are added to it, in the order of the partitions, instead of being
+        written to their paths. Returns (save error or None, path or member name)
+        for each partition, in the order of the partitions.
+        """
+        results = []
+        in_memory = archive is not None
+
+        def finish(position, save_error, data):
+            output_path = partitions[position][1]
+            if in_memory and data is not None:
+                output_path = archive.add(os.path.basename(output_path), data)
+            results.append((save_error, output_path))
+
+        def write_serially(position):
+            _, output_path, rows = partitions[position]
+            finish(position, *_write_split_file(output_path, rows, standard_columns, profile, in_memory, output_format))
+
+        position = 0
+        if workers > 1 and len(partitions) > 1 and sum(len(rows) for _, _, rows in partitions) >= PARALLEL_MIN_SPLIT_ROWS:
+            logger.info(f"Writing {len(partitions)} split files with {workers} worker processes")
+            pool = self._get_process_pool('write', workers)
+            futures = OrderedDict()
+
+            def collect():
+                done, future = futures.popitem(last=False)
+                try:
+                    finish(done, *future.result())
+                except Exception as e:
+                    logger.warning(f"Parallel writing of {os.path.basename(partitions[done][1])} failed, writing it serially: {str(e)}")
+                    if isinstance(e, BrokenProcessPool):
+                        self._discard_process_pool('write', pool)
+                    write_serially(done)
+
+            while position < len(partitions):
+                _, output_path, rows = partitions[position]
+                try:
+                    futures[position] = pool.submit(_write_split_file, output_path, rows, standard_columns, profile, in_memory, output_format)
+                except BrokenProcessPool as e:
+                    # A worker died, so the rest of the files are written serially
+                    logger.warning(f"Parallel writing stopped, writing the remaining split files serially: {str(e)}")
+                    self._discard_process_pool('write', pool)
+                    break
+                position += 1
+                # Bound the partitions copied to the workers but not yet written
+                while len(futures) > 2 * workers:
+                    collect()
+            while futures:
+                collect()
+
+        for remaining in range(position, len(partitions)):
+            write_serially(remaining)
+        return results
+
+    def _split_file_stem(self, value):
+        """Name of the split file of a value, without the characters unsafe in file names
+
+        Values left without a name, such as blank ones, get UNNAMED_SPLIT_STEM.
+        """
+        safe_value = str(value).replace('/', '_').replace('\\', '_')
+        stem = ''.join(c for c in safe_value if c.isalnum() or c in '._- ')
+        return stem if stem.strip() else UNNAMED_SPLIT_STEM
+
+    def _split_file_path(self, output_folder, value, output_format, taken):
+        """Path of the split file of a value, numbered if another value of the run has the same file name
+
+        taken holds the file names already given out and is updated.
+        """
+        stem = self._split_file_stem(value)
+        name = f"{stem}.{output_format}"
+        number = 1
+        while name in taken:
+            number += 1
+            name = f"{stem} ({number}).{output_format}"
+        taken.add(name)
+        return os.path.join(output_folder, name)
+
+    def _process_file_streaming(self, input_file, sheet_name, standard_columns, header, columns, mapping_plan, question_col, split_config, custom_values, chunk_size, write_profile=None, archive=None, output_format='xlsx'):
+        """Map, standardize and write a sheet chunk by chunk with bounded memory"""
+        session = self.get_session(input_file)
+
+        # Create a folder for output files based on the original filename
+        input_filename = os.path.basename(input_file)
+        output_folder = os.path.join(self.output_dir, os.path.splitext(input_filename)[0])
+        os.makedirs(output_folder, exist_ok=True)
+
+        split_column = split_config.get('column') if split_config else None
+
+        errors = ErrorLog()
+        if not header:
+            raise ValueError(f"Sheet '{sheet_name}' has no header row")
+        if split_column and split_column not in header:
+            errors.add('missing_split_column', split_column)
+            split_column = None
+            split_config = None
+
+        writers = OrderedDict()
+        # Spelling of each split value first seen, which names its file
+        split_values = {}
+        # File names given to split values so far
+        taken = set()
+        writer_class = OUTPUT_FORMATS[output_format]
+        total_rows = 0
+        chunks = 0
+        try:
+            if not split_column:
+                # The single output file is written even when the sheet has no data rows
+                output_filename = f"processed_{os.path.splitext(os.path.basename(input_file))[0]}.{output_format}"
+                writers[None] = writer_class(os.path.join(output_folder, output_filename), standard_columns, write_profile, archive)
+
+            for row_offset, chunk in self._iter_sheet_chunks(session, sheet_name, chunk_size, columns):
+                chunks += 1
+                result_chunk, chunk_errors = self._apply_mapping(
+                    chunk, standard_columns, mapping_plan, question_col, custom_values,
+                    row_offset=row_offset, report_missing=row_offset == 0)
+                errors.extend(chunk_errors)
+                total_rows += len(chunk)
+
+                if split_column:
+                    # Route each group of rows to the writer of its split value, opening writers on first sight
+                    order, groups = self._split_groups(chunk[split_column], split_config.get('case_insensitive', False))
+                    grouped_chunk = result_chunk.take(order)
+                    for key, value, start, stop in groups:
+                        if key not in writers:
+                            split_values[key] = value
+                            writers[key] = writer_class(self._split_file_path(output_folder, value, output_format, taken), standard_columns, write_profile, archive)
+                        writers[key].write_frame(grouped_chunk.iloc[start:stop])
+                else:
+                    writers[None].write_frame(result_chunk)
+
+                logger.info(f"Processed rows {row_offset + 2}-{row_offset + len(chunk) + 1} of sheet '{sheet_name}'")
+
+            if not chunks:
+                # Without data rows, map an empty block so that unmapped required columns are still reported
+                _, chunk_errors = self._apply_mapping(pd.DataFrame(columns=columns), standard_columns, mapping_plan,
+                                                      question_col, custom_values, report_missing=True)
+                errors.extend(chunk_errors)
+        finally:
+            for writer in writers.values():
+                writer.close()
+
+        output_files = []
+        for key, writer in writers.items():
+            output_files.append(writer.output_path)
+            if split_column:
+                self.log_entries.append({
+                    'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                    'action': 'File Split',
+                    'details': f'Created split file for {split_column}="{split_values[key]}" with {writer.rows} rows'
+                })
+        if not split_config or not split_config.get('column'):
+            self.log_entries.append({
+                'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'action': 'File Saved',
+                'details': f'Saved processed file with {total_rows} rows'
+            })
+
+        self._log_custom_values(standard_columns, custom_values)
+        log_path = self._write_processing_log(input_file, output_folder, errors)
+        return {
+            'output_files': output_files,
+            'log_file': log_path,
+            'errors': errors,
+            'sheet_name': sheet_name,
+            'header': header
+        }
+
+    def _apply_mapping(self, df, standard_columns, mapping_plan, question_col, custom_values=None, row_offset=0, report_missing=True):
+        """Build the standardized DataFrame for a block of input rows
+
+        row_offset is the position of the block's first row in the sheet, so that
+        error messages refer to the right spreadsheet row when processing in chunks.
+        """
+        # Prepare one array per standard column, then build the result frame once
+        row_count = len(df)
+        columns = {}
+        question_texts = None
+
+        # Track errors with their rows and questions
+        errors = ErrorLog()
+
+        # Column normalizers and the error code of values they reject; each one
+        # standardizes the distinct values of a column once through _standardize_distinct
+        series_normalizers = {
+            'Question Type': (self._standardize_question_types, 'unknown_question_type'),
+            'Difficulty Level': (self._standardize_difficulty_levels, 'unknown_difficulty_level'),
+            'Correct Answer': (self._standardize_correct_answers, 'invalid_correct_answer')
+        }
+
+        # Apply mapping
+        for std_col in standard_columns:
+            # Check if this column has a custom value
+            if custom_values and std_col in custom_values and custom_values[std_col]:
+                # Use the custom value for all rows, stored once as the only category
+                columns[std_col] = pd.Categorical.from_codes(np.zeros(row_count, dtype=np.int8), categories=[custom_values[std_col]])
+                continue
+
+            actual_input_col = mapping_plan.get(std_col)
+            if actual_input_col:
+                values = df[actual_input_col]
+
+                # Apply standardization for specific columns
+                if std_col in series_normalizers:
+                    normalizer, error_code = series_normalizers[std_col]
+                    original = values.to_numpy(dtype=object)
+                    values, error_mask = normalizer(values, categorical=True)
+                    error_rows = np.flatnonzero(error_mask)
+                    if len(error_rows):
+                        if question_texts is None:
+                            question_texts = df[question_col].to_numpy(dtype=object) if question_col else np.full(row_count, '', dtype=object)
+                        errors.add_rows(error_code, std_col, row_offset + error_rows + 2, original[error_rows], question_texts[error_rows])
+                if isinstance(values.dtype, pd.CategoricalDtype):
+                    columns[std_col] = values.array
+                elif std_col in CATEGORICAL_COLUMNS:
+                    columns[std_col] = pd.Categorical(values.to_numpy(dtype=object))
+                else:
+                    columns[std_col] = values.to_numpy(dtype=object)
+            else:
+                # Column not mapped or not found - ensure it exists but is empty
+                columns[std_col] = pd.Categorical.from_codes(np.full(row_count, -1, dtype=np.int8), categories=[])
+
+                # Only report errors for required fields
+                if report_missing and std_col not in self.OPTIONAL_COLUMNS:
+                    errors.add('missing_column', std_col)
+
+        result_df = pd.DataFrame(columns, index=df.index, columns=standard_columns)
+        return result_df, errors
+
     def _standardize_question_type(self, value):
         """Standardize Question Type values"""
         if pd.isna(value):
             return None, True
 
         value = str(value).strip().lower()
-
-        if value in ['mcq', 'single', 'one answer', 'single choice', 'single select']:
-            return 'MCQ', False
-        elif value in ['maq', 'multiple', 'multiple answers', 'multiple choice', 'multi select']:
-            return 'MAQ', False
-        elif value in ['true/false', 'true or false', 'yes or no', 't/f', 'yes/no']:
-            return 'True/False', False
-        elif value in ['fib', 'fill in the blank', 'fill in blank', 'fill blank', 'fill-in-the-blank']:
-            return 'FIB', False
-        elif value in ['desc', 'descriptive', 'long answer', 'essay', 'paragraph', 'long', 'descriptive question']:
-            return 'DESC', False
-        else:
-            return value, True
+        lookup = self.rules.lookup('question_type')
+        if value in lookup:
+            return lookup[value], False
+        return value, True
 
     def _standardize_difficulty_level(self, value):
         """Standardize Difficulty Level values"""
@@ -890,15 +2114,68 @@ class ExcelStandardizer:
             return None, True
 
         value = str(value).strip().lower()
-
-        if value in ['easy', 'beginner', 'basic', 'e']:
-            return 'Easy', False
-        elif value in ['medium', 'intermediate', 'moderate', 'm']:
-            return 'Medium', False
-        elif value in ['hard', 'difficult', 'advanced', 'expert', 'h']:
-            return 'Hard', False
+        lookup = self.rules.lookup('difficulty_level')
+        if value in lookup:
+            return lookup[value], False
+        return value, True
+
+    def _standardize_distinct(self, series, normalizer, categorical=False):
+        """Normalize each distinct value of a Series once and spread the results to every row
+
+        normalizer takes a Series of distinct values, as text and never missing,
+        and returns their standardized values and error mask. Values are told apart
+        by their text, since values such as 1 and 1.0 are equal but standardize
+        differently. Missing values become None and are errors. A value normalizer
+        such as _standardize_question_type can be passed through _per_value.
+
+        With categorical the values come back as a categorical Series over the
+        distinct standardized values, with missing values as NaN.
+        """
+        missing = series.isna().to_numpy()
+        codes, uniques = pd.factorize(series.astype(str).astype(object))
+        if len(uniques) == 0:
+            # Every value is missing, so no code indexes the normalized values
+            if categorical:
+                values = pd.Series(pd.Categorical.from_codes(codes, categories=[]), index=series.index)
+            else:
+                values = pd.Series([None] * len(series), index=series.index, dtype=object)
+            return values, np.ones(len(series), dtype=bool)
+        unique_values, unique_errors = normalizer(pd.Series(uniques, dtype=object))
+        unique_values = np.asarray(unique_values, dtype=object)
+        if categorical:
+            # Several distinct inputs can standardize to the same value, so factorize again
+            value_codes, categories = pd.factorize(unique_values)
+            row_codes = value_codes[codes]
+            row_codes[missing] = -1
+            values = pd.Series(pd.Categorical.from_codes(row_codes, categories=categories), index=series.index)
         else:
-            return value, True
+            values = pd.Series(unique_values[codes], index=series.index, dtype=object)
+            values[missing] = None
+        error_mask = np.asarray(unique_errors, dtype=bool)[codes]
+        error_mask[missing] = True
+        return values, error_mask
+
+    def _per_value(self, normalizer):
+        """Turn a value normalizer returning (value, has_error) into one for _standardize_distinct"""
+        def normalize(series):
+            results = [normalizer(value) for value in series]
+            return [value for value, _ in results], [has_error for _, has_error in results]
+        return normalize
+
+    def _lookup_distinct(self, series, lookup):
+        """Standardize distinct values through a synonym lookup, leaving unmatched ones lowercased and stripped"""
+        keys = series.str.strip().str.lower().astype(object)
+        standardized = keys.map(lookup)
+        error_mask = standardized.isna().to_numpy()
+        return standardized.astype(object).where(~error_mask, keys), error_mask
+
+    def _standardize_question_types(self, series, categorical=False):
+        """Standardize a Series of Question Type values, returning (values, error_mask)"""
+        return self._standardize_distinct(series, lambda values: self._lookup_distinct(values, self.rules.lookup('question_type')), categorical)
+
+    def _standardize_difficulty_levels(self, series, categorical=False):
+        """Standardize a Series of Difficulty Level values, returning (values, error_mask)"""
+        return self._standardize_distinct(series, lambda values: self._lookup_distinct(values, self.rules.lookup('difficulty_level')), categorical)
 
     def _standardize_correct_answer(self, value):
         """Standardize Correct Answer values"""
@@ -936,14 +2213,57 @@ class ExcelStandardizer:
 
         return value, False
 
+    def _standardize_correct_answers(self, series, categorical=False):
+        """Standardize a Series of Correct Answer values, returning (values, error_mask)
+
+        Gives the same results as _standardize_correct_answer: option numbers
+        become letters, alone or in comma-separated lists, and numbers outside
+        1-26 are errors. ASCII values are sorted and converted with compiled
+        patterns; the rare values with other characters, whose digits may not be
+        ASCII, go through the scalar function.
+        """
+        return self._standardize_distinct(series, self._correct_answers_distinct, categorical)
+
+    def _correct_answers_distinct(self, series):
+        """Standardize distinct Correct Answer values"""
+        keys = series.str.strip().str.lower().astype(object)
+        values = keys.copy()
+        error_mask = np.zeros(len(keys), dtype=bool)
+        kinds = keys.str.extract(CORRECT_ANSWER_KINDS)
+
+        # A single number is an option when it is within 1-26
+        digit_rows = kinds['number'].notna().to_numpy()
+        if digit_rows.any():
+            letters = kinds['number'][digit_rows].str.lstrip('0').map(OPTION_LETTERS)
+            values[digit_rows] = letters.where(letters.notna(), keys[digit_rows])
+            error_mask[digit_rows] = letters.isna().to_numpy()
+
+        # In comma-separated lists each part is stripped and numbered parts are converted
+        list_rows = kinds['list'].notna().to_numpy()
+        if list_rows.any():
+            parts = keys[list_rows].str.replace(LIST_SEPARATOR, ',', regex=True)
+            converted = parts.str.replace(OPTION_NUMBER_PART, lambda match: OPTION_LETTERS[match.group(1)], regex=True)
+            values[list_rows] = converted
+            error_mask[list_rows] = converted.str.contains(NUMBER_PART).to_numpy(dtype=bool)
+
+        other_rows = kinds.isna().all(axis=1).to_numpy()
+        for i in np.flatnonzero(other_rows):
+            values.iat[i], error_mask[i] = self._standardize_correct_answer(series.iat[i])
+        return values, error_mask
+
 def main():
     """Command-line interface for the Excel Standardizer"""
-    if len(sys.argv) < 2:
-        print("Usage: python excel_standardizer.py <input_file> [mapping_file]")
-        sys.exit(1)
-
-    input_file = sys.argv[1]
-    mapping_file = sys.argv[2] if len(sys.argv) > 2 else None
+    parser = argparse.ArgumentParser(description="Standardize a question file to the iMocha format")
+    parser.add_argument('input_file')
+    parser.add_argument('mapping_file', nargs='?', help="JSON mapping of standard columns to input columns")
+    parser.add_argument('--sheet', help="Sheet to process, defaulting to the best match")
+    parser.add_argument('--split-column', help="Write one file per value of this input column")
+    parser.add_argument('--output-format', choices=list(OUTPUT_FORMATS), default=OUTPUT_FORMAT)
+    parser.add_argument('--write-profile', choices=list(OUTPUT_WRITE_PROFILES), default=OUTPUT_WRITE_PROFILE)
+    args = parser.parse_args()
+
+    input_file = args.input_file
+    mapping_file = args.mapping_file
 
     standardizer = ExcelStandardizer()
 
@@ -953,21 +2273,20 @@ def main():
             with open(mapping_file, 'r') as f:
                 mapping_config = json.load(f)
         else:
-            # Otherwise, try to auto-map columns
-            columns_info, _ = standardizer.analyze_file(input_file)
-            standard_columns = standardizer.get_standard_columns()
+            # Otherwise, auto-map columns with the suggested mapping
+            columns_info, _, _, _, _ = standardizer.analyze_file(input_file, args.sheet)
+            suggestions = standardizer.suggest_mapping([col_info['name'] for col_info in columns_info])
 
             mapping_config = {}
-            for std_col in standard_columns:
-                for col_info in columns_info:
-                    col_name = col_info['name']
-                    if (col_name.lower() in std_col.lower() or
-                        std_col.lower() in col_name.lower()):
-                        mapping_config[std_col] = col_name
-                        break
+            print("Suggested mapping:")
+            for std_col, match in suggestions.items():
+                mapping_config[std_col] = match['column']
+                print(f"- {std_col} <- {match['column']} ({match['confidence']:.0%})")
 
         # Process the file
-        result = standardizer.process_file(input_file, mapping_config)
+        split_config = {'column': args.split_column} if args.split_column else None
+        result = standardizer.process_file(input_file, mapping_config, split_config, sheet_name=args.sheet,
+                                           write_profile=args.write_profile, output_format=args.output_format)
 
         # Print results
         print(f"\nProcessing complete!")
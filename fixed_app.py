@@ -7,7 +7,10 @@ import logging
 import time
 import zipfile
 import io
-from excel_standardizer_improved import ExcelStandardizer
+import queue
+import threading
+from excel_standardizer_improved import ExcelStandardizer, OutputArchive, SUPPORTED_EXTENSIONS
+from mapping_profiles import ProfileStore, header_fingerprint
 from werkzeug.utils import secure_filename
 
 # Initialize Flask app with the original templates folder
@@ -45,6 +48,9 @@ logger = logging.getLogger(__name__)
 UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER', 'uploads')
 OUTPUT_FOLDER = os.environ.get('OUTPUT_FOLDER', 'Processed-Files')  # Match the folder used by ExcelStandardizer
 
+# Chunks of a streamed ZIP download held between the processing thread and the client
+ARCHIVE_STREAM_QUEUE_SIZE = int(os.environ.get('ARCHIVE_STREAM_QUEUE_SIZE', 64))
+
 # Create folders if they don't exist
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(OUTPUT_FOLDER, exist_ok=True)
@@ -52,6 +58,9 @@ os.makedirs(OUTPUT_FOLDER, exist_ok=True)
 # Create standardizer
 standardizer = ExcelStandardizer()
 
+# Confirmed mappings, looked up by the header of each new upload
+profiles = ProfileStore()
+
 # Original index route - now redirects to the main app
 @app.route('/old-index')
 def old_index():
@@ -74,25 +83,26 @@ def test_upload():
     """Render the test upload page"""
     return render_template('test_upload.html')
 
-@app.route('/api/analyze', methods=['POST'])
-def analyze_file():
-    """Analyze an uploaded Excel file and return column information"""
-    logger.info(f"Analyze file request received: {request.files}")
+def save_upload():
+    """Validate and save the file of an upload request
 
+    Returns (original filename, unique filename, saved path, None), or an error
+    response in place of the last item if the upload is not valid.
+    """
     if 'file' not in request.files:
         logger.error("No file part in request")
-        return jsonify({'error': 'No file part'}), 400
+        return None, None, None, (jsonify({'error': 'No file part'}), 400)
 
     file = request.files['file']
     logger.info(f"File received: {file.filename}")
 
     if file.filename == '':
         logger.error("Empty filename")
-        return jsonify({'error': 'No selected file'}), 400
+        return None, None, None, (jsonify({'error': 'No selected file'}), 400)
 
-    if not file.filename.endswith(('.xlsx', '.xls')):
+    if not file.filename.lower().endswith(SUPPORTED_EXTENSIONS):
         logger.error(f"Invalid file type: {file.filename}")
-        return jsonify({'error': 'File must be an Excel file (.xlsx or .xls)'}), 400
+        return None, None, None, (jsonify({'error': f"File must be an Excel, CSV, TSV or Parquet file ({', '.join(SUPPORTED_EXTENSIONS)})"}), 400)
 
     # Save the uploaded file
     filename = secure_filename(file.filename)
@@ -100,17 +110,32 @@ def analyze_file():
     unique_filename = f"{timestamp}_{filename}"
     file_path = os.path.join(UPLOAD_FOLDER, unique_filename)
     file.save(file_path)
+    return filename, unique_filename, file_path, None
+
+@app.route('/api/analyze', methods=['POST'])
+def analyze_file():
+    """Analyze an uploaded Excel file and return column information"""
+    logger.info(f"Analyze file request received: {request.files}")
+
+    filename, unique_filename, file_path, error_response = save_upload()
+    if error_response:
+        return error_response
 
     try:
         # Get sheet name if provided
         sheet_name = request.form.get('sheet_name')
         logger.info(f"Sheet name from request: {sheet_name}")
-
-        # First, try to open the file with pandas to check if it's valid
+        engine = request.form.get('engine')  # None uses the server default (XLSX_ENGINE)
+        # Files that will be processed in streaming mode are only surveyed, so the
+        # selected sheet is never held in memory whole; None uses STREAM_PROCESSING
+        streaming = request.form.get('streaming')
+        load = None if streaming is None else streaming.lower() not in ('1', 'true', 'yes')
+
+        # First, check the file is a valid workbook. This opens the upload's shared
+        # session, so the sheets parsed here are reused by analysis and processing
         try:
             logger.info(f"Checking if file is valid: {file_path}")
-            xl = pd.ExcelFile(file_path)
-            available_sheets = xl.sheet_names
+            available_sheets = standardizer.get_sheet_names(file_path, engine=engine)
             logger.info(f"File is valid. Available sheets: {available_sheets}")
 
             # If a sheet name is provided, check if it exists
@@ -133,42 +158,22 @@ def analyze_file():
             logger.error(f"Traceback: {error_traceback}")
             return jsonify({'error': f"Error checking file: {str(e)}"}), 500
 
-        # Now try to read the specific sheet to check if it's readable
-        if sheet_name:
-            try:
-                logger.info(f"Checking if sheet '{sheet_name}' is readable")
-                df = pd.read_excel(file_path, sheet_name=sheet_name)
-                logger.info(f"Sheet '{sheet_name}' is readable. Shape: {df.shape}, Columns: {df.columns.tolist()}")
-
-                # Check for problematic values
-                for col in df.columns:
-                    try:
-                        # Check for mixed data types
-                        if df[col].dtype == 'object':
-                            types = df[col].apply(lambda x: type(x).__name__ if not pd.isna(x) else 'nan').unique()
-                            if len(types) > 1 and 'nan' in types:
-                                types = [t for t in types if t != 'nan']
-                            if len(types) > 1:
-                                logger.warning(f"Column '{col}' has mixed data types: {', '.join(types)}")
-                    except Exception as e:
-                        logger.warning(f"Error checking column '{col}': {str(e)}")
-            except Exception as e:
-                logger.error(f"Error reading sheet '{sheet_name}': {str(e)}")
-                import traceback
-                error_traceback = traceback.format_exc()
-                logger.error(f"Traceback: {error_traceback}")
-                # Don't return an error here, let the standardizer try to handle it
-
         # Analyze the file with the standardizer
         logger.info(f"Analyzing file with standardizer: {file_path}, sheet: {sheet_name}")
         try:
-            columns_info, file_shape, sheet_names, selected_sheet, sheet_info = standardizer.analyze_file(file_path, sheet_name)
+            columns_info, file_shape, sheet_names, selected_sheet, sheet_info = standardizer.analyze_file(file_path, sheet_name, load=load, engine=engine)
             logger.info(f"File analyzed successfully. Found {len(columns_info)} columns, {file_shape[0]} rows, {len(sheet_names)} sheets, selected sheet: {selected_sheet}")
 
             # Get standard columns
             standard_columns = standardizer.get_standard_columns()
             logger.info(f"Got {len(standard_columns)} standard columns")
 
+            # Look up the configuration confirmed for an earlier file with this header
+            fingerprint = header_fingerprint([col['name'] for col in columns_info])
+            profile = profiles.get(fingerprint)
+            if profile:
+                logger.info(f"Found mapping profile {fingerprint} for this header")
+
             # Prepare response
             response_data = {
                 'filename': unique_filename,
@@ -178,7 +183,11 @@ def analyze_file():
                 'standard_columns': standard_columns,
                 'sheet_names': sheet_names,
                 'selected_sheet': selected_sheet,
-                'sheet_info': sheet_info
+                'sheet_info': sheet_info,
+                'engine': sheet_info.get(selected_sheet, {}).get('engine'),
+                'suggested_mapping': standardizer.suggest_mapping([col['name'] for col in columns_info], standard_columns),
+                'header_fingerprint': fingerprint,
+                'profile': profile
             }
             logger.info(f"Sending response with {len(columns_info)} columns and {len(sheet_names)} sheets")
             return jsonify(response_data)
@@ -239,6 +248,224 @@ def analyze_file():
             'silent_error': f"Unhandled error: {str(e)}"
         })
 
+def write_warnings_workbook(errors, target):
+    """Write the errors of a processed upload to a formatted workbook at target, a path or a binary buffer"""
+    # Create a DataFrame with the warnings
+    warnings_df = pd.DataFrame({
+        'Question': errors.questions(),
+        'Warning/Error': errors.messages()
+    })
+
+    # Save the warnings file with optimized formatting
+    try:
+        # Use xlsxwriter for better formatting
+        with pd.ExcelWriter(target, engine='xlsxwriter') as writer:
+            warnings_df.to_excel(writer, index=False, sheet_name='Warnings')
+
+            # Get the xlsxwriter workbook and worksheet objects
+            workbook = writer.book
+            worksheet = writer.sheets['Warnings']
+
+            # Set column widths for better readability - increased widths
+            worksheet.set_column('A:A', 80)  # Question column
+            worksheet.set_column('B:B', 70)  # Warning/Error column
+
+            # Add a header format
+            header_format = workbook.add_format({
+                'bold': True,
+                'text_wrap': True,
+                'valign': 'top',
+                'bg_color': '#FFC107',  # Yellow background for warnings
+                'border': 1
+            })
+
+            # Add a row format for better readability
+            row_format = workbook.add_format({
+                'text_wrap': True,
+                'valign': 'top'
+            })
+
+            # Write the column headers with the defined format
+            for col_num, value in enumerate(warnings_df.columns.values):
+                worksheet.write(0, col_num, value, header_format)
+
+            # Apply row format to all data rows
+            for row_num in range(1, len(warnings_df) + 1):
+                worksheet.set_row(row_num, None, row_format)
+    except Exception as e:
+        # Fallback to basic Excel output if formatting fails
+        print(f"Warning: Could not apply formatting to warnings file: {e}")
+        if not isinstance(target, str):
+            target.seek(0)
+            target.truncate()
+        warnings_df.to_excel(target, index=False)
+
+def build_process_response(filename, result, archive=None, archive_path=None):
+    """Describe the output and warnings files of a processed upload, writing the warnings workbook
+
+    With an archive the warnings workbook is added to it and the archive is
+    closed; the archive at archive_path is then the only output file listed, and
+    its members are listed under 'archive_members'.
+    """
+    # Get relative paths for output files
+    output_files = []
+    if archive is None:
+        for path in result['output_files']:
+            rel_path = os.path.relpath(path, OUTPUT_FOLDER)
+            output_files.append({
+                'path': rel_path,
+                'name': os.path.basename(path),
+                'size': f"{os.path.getsize(path) / 1024:.1f} KB"
+            })
+
+    log_file = os.path.relpath(result['log_file'], OUTPUT_FOLDER)
+
+    # Get output folder name
+    output_folder = None
+    if archive is not None:
+        output_folder = os.path.dirname(os.path.relpath(archive_path, OUTPUT_FOLDER))
+    elif result['output_files']:
+        output_folder = os.path.dirname(os.path.relpath(result['output_files'][0], OUTPUT_FOLDER))
+
+    # Create Excel file with warnings if there are any
+    warnings_file = None
+    warnings_filename = f"error_{os.path.splitext(filename)[0]}.xlsx"
+    if result['errors'] and archive is not None:
+        buffer = io.BytesIO()
+        write_warnings_workbook(result['errors'], buffer)
+        warnings_file = {
+            'name': archive.add(warnings_filename, buffer.getvalue()),
+            'archive': os.path.relpath(archive_path, OUTPUT_FOLDER)
+        }
+    elif result['errors']:
+        # Make sure we have a valid output folder
+        if output_folder:
+            warnings_folder = os.path.join(OUTPUT_FOLDER, output_folder)
+            os.makedirs(warnings_folder, exist_ok=True)
+            warnings_path = os.path.join(warnings_folder, warnings_filename)
+        else:
+            warnings_path = os.path.join(OUTPUT_FOLDER, warnings_filename)
+        write_warnings_workbook(result['errors'], warnings_path)
+
+        # Add to output files
+        rel_warnings_path = os.path.relpath(warnings_path, OUTPUT_FOLDER)
+        warnings_file = {
+            'path': rel_warnings_path,
+            'name': warnings_filename,
+            'size': f"{os.path.getsize(warnings_path) / 1024:.1f} KB"
+        }
+        output_files.append(warnings_file)
+
+    response_data = {
+        'success': True,
+        'output_files': output_files,
+        'log_file': log_file,
+        'errors': result['errors'].messages(),
+        'warnings_file': warnings_file,
+        'output_folder': output_folder
+    }
+    if archive is not None:
+        archive.close()
+        response_data['archive_members'] = list(archive.names)
+        output_files.append({
+            'path': os.path.relpath(archive_path, OUTPUT_FOLDER),
+            'name': os.path.basename(archive_path),
+            'size': f"{os.path.getsize(archive_path) / 1024:.1f} KB"
+        })
+    return response_data
+
+def save_mapping_profile(result, mapping_config, custom_values, split_config):
+    """Store the confirmed configuration of a processed upload, returning the header fingerprint"""
+    try:
+        return profiles.save(result['header'], mapping_config, custom_values, split_config, result['sheet_name'])['fingerprint']
+    except Exception as e:
+        logger.error(f"Could not save mapping profile: {str(e)}")
+        return None
+
+class QueueWriter(io.RawIOBase):
+    """Unseekable binary file that hands everything written to it to a queue of chunks"""
+
+    def __init__(self, chunks, cancelled):
+        self.chunks = chunks
+        self.cancelled = cancelled
+        self.abandoned = False
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        # Output of a failed archive is dropped
+        if self.abandoned:
+            return len(data)
+        # Wait for the client to read, unless it went away
+        while not self.cancelled.is_set():
+            try:
+                self.chunks.put(bytes(data), timeout=1)
+                return len(data)
+            except queue.Full:
+                continue
+        raise OSError("The client stopped reading the archive")
+
+def stream_process_archive(filename, save_profile, process_args, process_kwargs):
+    """Process an upload in a background thread, sending the ZIP archive of its outputs as it is written
+
+    Each workbook is sent once it is finished, followed by the warnings workbook
+    and the archive's directory. Errors raised before the first workbook is
+    finished are returned as a JSON error instead.
+    """
+    chunks = queue.Queue(maxsize=ARCHIVE_STREAM_QUEUE_SIZE)
+    cancelled = threading.Event()
+    failure = []
+
+    def produce():
+        writer = QueueWriter(chunks, cancelled)
+        archive = OutputArchive(writer)
+        try:
+            result = standardizer.process_file(*process_args, archive=archive, **process_kwargs)
+            logger.info(f"File processed successfully. Archive members: {result['output_files']}")
+            if result['errors']:
+                buffer = io.BytesIO()
+                write_warnings_workbook(result['errors'], buffer)
+                archive.add(f"error_{os.path.splitext(filename)[0]}.xlsx", buffer.getvalue())
+            archive.close()
+            if save_profile:
+                save_mapping_profile(result, process_args[1], process_args[3], process_args[2])
+        except Exception as e:
+            import traceback
+            if cancelled.is_set():
+                logger.info(f"Stopped processing {filename}: the client stopped reading the archive")
+            else:
+                logger.error(f"Error streaming processed file: {str(e)}\n{traceback.format_exc()}")
+            failure.append(e)
+            writer.abandoned = True
+            archive.close()
+        finally:
+            # Mark the end of the archive, unless nobody is reading it anymore
+            while not cancelled.is_set():
+                try:
+                    chunks.put(None, timeout=1)
+                    break
+                except queue.Full:
+                    continue
+
+    threading.Thread(target=produce, daemon=True).start()
+    first = chunks.get()
+    if first is None and failure:
+        return jsonify({'error': f'Error processing file: {str(failure[0])}'}), 500
+
+    def generate():
+        try:
+            chunk = first
+            while chunk is not None:
+                yield chunk
+                chunk = chunks.get()
+        finally:
+            cancelled.set()
+
+    zip_filename = f"zip_{os.path.splitext(filename)[0]}.zip"
+    return Response(generate(), mimetype='application/zip',
+                    headers={'Content-Disposition': f'attachment; filename="{zip_filename}"'})
+
 @app.route('/api/process', methods=['POST'])
 def process_file():
     """Process an Excel file with the given mapping configuration"""
@@ -252,6 +479,15 @@ def process_file():
     custom_values = data.get('custom_values', {})
     split_config = data.get('split_config')
     sheet_name = data.get('sheet_name')
+    streaming = data.get('streaming')  # None uses the server default (STREAM_PROCESSING)
+    engine = data.get('engine')  # None uses the server default (XLSX_ENGINE)
+    write_profile = data.get('write_profile')  # None uses the server default (OUTPUT_WRITE_PROFILE)
+    output_format = data.get('output_format')  # None uses the server default (OUTPUT_FORMAT)
+    # None writes the output files to the output folder; 'file' writes them into a ZIP
+    # archive there, and 'stream' sends the ZIP archive as the response while it is written
+    archive_mode = data.get('archive')
+    if archive_mode not in (None, 'file', 'stream'):
+        return jsonify({'error': f"Unknown archive mode '{archive_mode}'. Use 'file' or 'stream'"}), 400
 
     file_path = os.path.join(UPLOAD_FOLDER, filename)
     if not os.path.exists(file_path):
@@ -261,9 +497,8 @@ def process_file():
         # First, verify the file and sheet
         logger.info(f"Verifying file and sheet before processing: {file_path}, sheet: {sheet_name}")
         try:
-            # Check if the file is valid
-            xl = pd.ExcelFile(file_path)
-            available_sheets = xl.sheet_names
+            # Check if the file is valid, reusing the session opened by /api/analyze
+            available_sheets = standardizer.get_sheet_names(file_path, engine=engine)
             logger.info(f"File is valid. Available sheets: {available_sheets}")
 
             # If a sheet name is provided, check if it exists
@@ -289,10 +524,24 @@ def process_file():
 
         # Process the file
         logger.info(f"Processing file: {file_path}, sheet: {sheet_name}, mapping: {mapping_config}")
+        process_args = (file_path, mapping_config, split_config, custom_values, sheet_name)
+        process_kwargs = {'streaming': streaming, 'engine': engine, 'write_profile': write_profile, 'output_format': output_format}
+        if archive_mode == 'stream':
+            return stream_process_archive(filename, data.get('save_profile', True), process_args, process_kwargs)
+
+        archive = None
+        archive_path = None
         try:
-            result = standardizer.process_file(file_path, mapping_config, split_config, custom_values, sheet_name)
+            if archive_mode == 'file':
+                archive_folder = os.path.join(OUTPUT_FOLDER, os.path.splitext(filename)[0])
+                os.makedirs(archive_folder, exist_ok=True)
+                archive_path = os.path.join(archive_folder, f"zip_{os.path.splitext(filename)[0]}.zip")
+                archive = OutputArchive(archive_path)
+            result = standardizer.process_file(*process_args, archive=archive, **process_kwargs)
             logger.info(f"File processed successfully. Output files: {result['output_files']}")
         except Exception as e:
+            if archive is not None:
+                archive.close()
             logger.error(f"Error in standardizer.process_file: {str(e)}")
             import traceback
             error_traceback = traceback.format_exc()
@@ -333,107 +582,106 @@ def process_file():
                 'silent_error': True  # Flag to indicate silent error
             })
 
-        # Get relative paths for output files
-        output_files = []
-        for path in result['output_files']:
-            rel_path = os.path.relpath(path, OUTPUT_FOLDER)
-            output_files.append({
-                'path': rel_path,
-                'name': os.path.basename(path),
-                'size': f"{os.path.getsize(path) / 1024:.1f} KB"
-            })
+        response_data = build_process_response(filename, result, archive, archive_path)
 
-        log_file = os.path.relpath(result['log_file'], OUTPUT_FOLDER)
+        # Remember the confirmed configuration for the next file with this header
+        if data.get('save_profile', True):
+            response_data['header_fingerprint'] = save_mapping_profile(result, mapping_config, custom_values, split_config)
+        return jsonify(response_data)
+    except Exception as e:
+        import traceback
+        error_traceback = traceback.format_exc()
+        logger.error(f"Error processing file: {str(e)}\n{error_traceback}")
+        return jsonify({'error': f'Error processing file: {str(e)}'}), 500
 
-        # Get output folder name
-        output_folder = None
-        if result['output_files']:
-            output_folder = os.path.dirname(os.path.relpath(result['output_files'][0], OUTPUT_FOLDER))
+@app.route('/api/analyze-and-process', methods=['POST'])
+def analyze_and_process_file():
+    """Process an upload in one call with the profile stored for its header
 
-        # Create Excel file with warnings if there are any
-        warnings_file = None
-        if result['errors']:
-            # Create a DataFrame with the warnings
-            warnings_df = pd.DataFrame({
-                'Question': result.get('error_questions', ['']*len(result['errors'])),
-                'Warning/Error': result['errors']
-            })
+    The selected sheet's header is read from its survey and fingerprinted. When
+    a profile matches, the file is processed with it straight away and the
+    response is that of /api/process; otherwise the file is analyzed fully and
+    the response is that of /api/analyze. 'processed' tells which it was.
+    """
+    logger.info(f"Analyze and process request received: {request.files}")
 
-            # Save to Excel file
-            warnings_filename = f"error_{os.path.splitext(filename)[0]}.xlsx"
+    filename, unique_filename, file_path, error_response = save_upload()
+    if error_response:
+        return error_response
 
-            # Make sure we have a valid output folder
-            if output_folder:
-                warnings_folder = os.path.join(OUTPUT_FOLDER, output_folder)
-                os.makedirs(warnings_folder, exist_ok=True)
-                warnings_path = os.path.join(warnings_folder, warnings_filename)
-            else:
-                warnings_path = os.path.join(OUTPUT_FOLDER, warnings_filename)
+    sheet_name = request.form.get('sheet_name') or None
+    engine = request.form.get('engine')  # None uses the server default (XLSX_ENGINE)
+    output_format = request.form.get('output_format')  # None uses the server default (OUTPUT_FORMAT)
+    streaming = request.form.get('streaming')
+    if streaming is not None:
+        streaming = streaming.lower() in ('1', 'true', 'yes')
 
-            # Save the warnings file with optimized formatting
-            try:
-                # Use xlsxwriter for better formatting
-                with pd.ExcelWriter(warnings_path, engine='xlsxwriter') as writer:
-                    warnings_df.to_excel(writer, index=False, sheet_name='Warnings')
-
-                    # Get the xlsxwriter workbook and worksheet objects
-                    workbook = writer.book
-                    worksheet = writer.sheets['Warnings']
-
-                    # Set column widths for better readability - increased widths
-                    worksheet.set_column('A:A', 80)  # Question column
-                    worksheet.set_column('B:B', 70)  # Warning/Error column
-
-                    # Add a header format
-                    header_format = workbook.add_format({
-                        'bold': True,
-                        'text_wrap': True,
-                        'valign': 'top',
-                        'bg_color': '#FFC107',  # Yellow background for warnings
-                        'border': 1
-                    })
-
-                    # Add a row format for better readability
-                    row_format = workbook.add_format({
-                        'text_wrap': True,
-                        'valign': 'top'
-                    })
-
-                    # Write the column headers with the defined format
-                    for col_num, value in enumerate(warnings_df.columns.values):
-                        worksheet.write(0, col_num, value, header_format)
-
-                    # Apply row format to all data rows
-                    for row_num in range(1, len(warnings_df) + 1):
-                        worksheet.set_row(row_num, None, row_format)
-            except Exception as e:
-                # Fallback to basic Excel output if formatting fails
-                print(f"Warning: Could not apply formatting to warnings file: {e}")
-                warnings_df.to_excel(warnings_path, index=False)
-
-            # Add to output files
-            rel_warnings_path = os.path.relpath(warnings_path, OUTPUT_FOLDER)
-            warnings_file = {
-                'path': rel_warnings_path,
-                'name': warnings_filename,
-                'size': f"{os.path.getsize(warnings_path) / 1024:.1f} KB"
-            }
-            output_files.append(warnings_file)
+    try:
+        # Only the header is needed to find a profile, so the sheet is surveyed, not loaded
+        columns_info, _, _, selected_sheet, _ = standardizer.analyze_file(file_path, sheet_name, load=False, engine=engine)
+        fingerprint = header_fingerprint([col['name'] for col in columns_info])
+        profile = profiles.get(fingerprint)
+
+        if not profile:
+            logger.info(f"No mapping profile for header {fingerprint}, analyzing file for manual mapping")
+            columns_info, file_shape, sheet_names, selected_sheet, sheet_info = standardizer.analyze_file(file_path, selected_sheet, load=None if streaming is None else not streaming, engine=engine)
+            standard_columns = standardizer.get_standard_columns()
+            return jsonify({
+                'processed': False,
+                'filename': unique_filename,
+                'original_filename': filename,
+                'columns': columns_info,
+                'rows': file_shape[0],
+                'standard_columns': standard_columns,
+                'sheet_names': sheet_names,
+                'selected_sheet': selected_sheet,
+                'sheet_info': sheet_info,
+                'engine': sheet_info.get(selected_sheet, {}).get('engine'),
+                'suggested_mapping': standardizer.suggest_mapping([col['name'] for col in columns_info], standard_columns),
+                'header_fingerprint': fingerprint,
+                'profile': None
+            })
 
-        return jsonify({
-            'success': True,
-            'output_files': output_files,
-            'log_file': log_file,
-            'errors': result['errors'],
-            'warnings_file': warnings_file,
-            'output_folder': output_folder
+        logger.info(f"Processing file: {file_path}, sheet: {selected_sheet}, with mapping profile {fingerprint}")
+        result = standardizer.process_file(file_path, profile['mapping'], profile.get('split_config'), profile.get('custom_values'),
+                                           selected_sheet, streaming=streaming, engine=engine, output_format=output_format)
+        logger.info(f"File processed successfully. Output files: {result['output_files']}")
+
+        response_data = build_process_response(unique_filename, result)
+        try:
+            profile = profiles.save(result['header'], profile['mapping'], profile.get('custom_values'), profile.get('split_config'), result['sheet_name'])
+        except Exception as e:
+            logger.error(f"Could not update mapping profile: {str(e)}")
+        response_data.update({
+            'processed': True,
+            'filename': unique_filename,
+            'original_filename': filename,
+            'selected_sheet': result['sheet_name'],
+            'header_fingerprint': fingerprint,
+            'profile': profile
         })
+        return jsonify(response_data)
     except Exception as e:
         import traceback
         error_traceback = traceback.format_exc()
-        logger.error(f"Error processing file: {str(e)}\n{error_traceback}")
+        logger.error(f"Error analyzing and processing file: {str(e)}\n{error_traceback}")
         return jsonify({'error': f'Error processing file: {str(e)}'}), 500
 
+@app.route('/api/profiles/<fingerprint>', methods=['GET', 'DELETE'])
+def mapping_profile(fingerprint):
+    """Get or forget the mapping profile stored for a header fingerprint"""
+    try:
+        if request.method == 'DELETE':
+            if not profiles.delete(fingerprint):
+                return jsonify({'error': 'Profile not found'}), 404
+            return jsonify({'success': True})
+        profile = profiles.get(fingerprint)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if not profile:
+        return jsonify({'error': 'Profile not found'}), 404
+    return jsonify(profile)
+
 @app.route('/api/view/<path:file_path>')
 def view_file(file_path):
     # Security check to prevent directory traversal
@@ -533,7 +781,8 @@ def download_all_files(folder_path):
                     file_path = os.path.join(root, file)
                     # Add the file to the ZIP with a relative path
                     arcname = os.path.relpath(file_path, full_folder_path)
-                    zipf.write(file_path, arcname)
+                    # Workbooks and Parquet files are already compressed, so they are stored as they are
+                    zipf.write(file_path, arcname, zipfile.ZIP_STORED if file.lower().endswith(('.xlsx', '.parquet')) else None)
 
         # Seek to the beginning of the BytesIO object
         memory_file.seek(0)
@@ -566,7 +815,7 @@ def view_folder(folder_path):
 
     files = []
     for file in os.listdir(full_path):
-        if file.endswith(('.xlsx', '.xls')):
+        if file.endswith(('.xlsx', '.xls', '.csv', '.jsonl', '.parquet')):
             rel_path = os.path.join(folder_path, file)
             files.append({
                 'name': file,
@@ -0,0 +1,144 @@
+import re
+import numpy as np
+
+# Characters that separate the words of a header, such as the slash in "Option/ Answer 1"
+HEADER_SEPARATORS = re.compile(r'[^0-9a-z]+')
+
+# Length of the character n-grams compared between headers
+NGRAM_SIZE = 3
+
+# Share of the score that comes from whole words; the rest comes from character n-grams
+TOKEN_WEIGHT = 0.5
+
+# Lowest score at which a header is suggested for a column
+MATCH_THRESHOLD = 0.5
+
+def normalize_header(name):
+    """Lowercase a header and reduce it to its words separated by single spaces"""
+    text = str(name).lower().replace('\xa0', ' ')
+    return ' '.join(word for word in HEADER_SEPARATORS.split(text) if word)
+
+def header_tokens(normalized):
+    """Words of a normalized header, with plural endings dropped so "Topics" matches "Topic" """
+    return {word[:-1] if len(word) > 3 and word.endswith('s') else word for word in normalized.split()}
+
+def header_ngrams(normalized):
+    """Character n-grams of a normalized header, padded so short headers still have one"""
+    padded = f' {normalized} '
+    if len(padded) <= NGRAM_SIZE:
+        return {padded}
+    return {padded[i:i + NGRAM_SIZE] for i in range(len(padded) - NGRAM_SIZE + 1)}
+
+def _dice_matrix(left_sets, right_sets):
+    """Dice coefficient between every left and every right feature set"""
+    vocabulary = {}
+    for features in left_sets + right_sets:
+        for feature in features:
+            vocabulary.setdefault(feature, len(vocabulary))
+
+    def incidence(feature_sets):
+        matrix = np.zeros((len(feature_sets), len(vocabulary)), dtype=np.float64)
+        for row, features in enumerate(feature_sets):
+            matrix[row, [vocabulary[feature] for feature in features]] = 1
+        return matrix
+
+    left = incidence(left_sets)
+    right = incidence(right_sets)
+    shared = left @ right.T
+    sizes = left.sum(axis=1)[:, None] + right.sum(axis=1)[None, :]
+    return np.divide(2 * shared, sizes, out=np.zeros_like(shared), where=sizes > 0)
+
+def similarity_matrix(names, columns):
+    """Score every name against every input column from 0 to 1
+
+    The score blends word overlap with character n-gram overlap, and headers that
+    normalize to the same text, ignoring spaces, score 1.
+    """
+    left = [normalize_header(name) for name in names]
+    right = [normalize_header(col) for col in columns]
+    if not left or not right:
+        return np.zeros((len(left), len(right)))
+    tokens = _dice_matrix([header_tokens(name) for name in left], [header_tokens(col) for col in right])
+    ngrams = _dice_matrix([header_ngrams(name) for name in left], [header_ngrams(col) for col in right])
+    scores = TOKEN_WEIGHT * tokens + (1 - TOKEN_WEIGHT) * ngrams
+    compact_left = np.array([name.replace(' ', '') for name in left], dtype=object)
+    compact_right = np.array([col.replace(' ', '') for col in right], dtype=object)
+    scores[compact_left[:, None] == compact_right[None, :]] = 1.0
+    return scores
+
+def linear_assignment(cost):
+    """Assign rows to distinct columns with the least total cost (Hungarian algorithm)
+
+    Returns a list of (row, column) pairs. Every row is assigned when there are
+    at least as many columns as rows; otherwise every column is.
+    """
+    cost = np.asarray(cost, dtype=np.float64)
+    if cost.shape[0] > cost.shape[1]:
+        return sorted((row, col) for col, row in linear_assignment(cost.T))
+    n, m = cost.shape
+    # Row and column potentials, and the row matched to each column (1-based, 0 for none)
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    match = np.zeros(m + 1, dtype=int)
+    way = np.zeros(m + 1, dtype=int)
+    for row in range(1, n + 1):
+        match[0] = row
+        col0 = 0
+        min_reduced = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        # Grow a shortest augmenting path from the new row to a free column
+        while True:
+            used[col0] = True
+            reduced = cost[match[col0] - 1] - u[match[col0]] - v[1:]
+            free = ~used[1:]
+            better = free & (reduced < min_reduced[1:])
+            min_reduced[1:][better] = reduced[better]
+            way[1:][better] = col0
+            candidates = np.where(free, min_reduced[1:], np.inf)
+            col1 = int(np.argmin(candidates)) + 1
+            delta = candidates[col1 - 1]
+            u[match[used]] += delta
+            v[used] -= delta
+            min_reduced[1:][free] -= delta
+            col0 = col1
+            if match[col0] == 0:
+                break
+        # Flip the matching along the path
+        while col0:
+            col1 = way[col0]
+            match[col0] = match[col1]
+            col0 = col1
+    return sorted((int(match[col]) - 1, col - 1) for col in range(1, m + 1) if match[col])
+
+def match_headers(targets, columns, aliases=None, threshold=MATCH_THRESHOLD):
+    """Suggest one distinct input column for each target name
+
+    All targets are scored against all columns at once, each target taking the
+    best score of its own name and its aliases, and the pairs are chosen to
+    maximize the total score. Returns {target: {'column': ..., 'confidence': ...}}
+    for the targets whose best assignment scores at least threshold.
+    """
+    targets = list(targets)
+    columns = list(columns)
+    if not targets or not columns:
+        return {}
+    aliases = aliases or {}
+
+    # Score every alias at once, then keep each target's best alias per column
+    names = []
+    owners = []
+    for position, target in enumerate(targets):
+        for name in [target] + list(aliases.get(target, [])):
+            names.append(name)
+            owners.append(position)
+    alias_scores = similarity_matrix(names, columns)
+    scores = np.zeros((len(targets), len(columns)))
+    np.maximum.at(scores, np.array(owners), alias_scores)
+
+    # Pairs below the threshold are never worth taking a column for
+    gains = np.where(scores >= threshold, scores, 0.0)
+    suggestions = {}
+    for row, col in linear_assignment(-gains):
+        if scores[row, col] >= threshold:
+            suggestions[targets[row]] = {'column': columns[col], 'confidence': round(float(scores[row, col]), 3)}
+    return suggestions
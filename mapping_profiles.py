@@ -0,0 +1,108 @@
+import os
+import json
+import hashlib
+import re
+import logging
+import tempfile
+import threading
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Folder holding one JSON profile per header fingerprint
+MAPPING_PROFILES_DIR = os.environ.get('MAPPING_PROFILES_DIR', 'Mapping-Profiles')
+
+# Name pandas gives a column whose header cell is empty
+UNNAMED_COLUMN = re.compile(r'^Unnamed: \d+$')
+
+def normalize_profile_header(name):
+    """Lowercase and strip a header name as column mappings are matched"""
+    return str(name).lower().strip().replace('\xa0', ' ')
+
+def header_fingerprint(columns):
+    """Fingerprint a cleaned header row
+
+    Names are compared as column mappings resolve them, ignoring case and
+    surrounding spaces, and their order does not matter since mappings refer
+    to columns by name. Unnamed columns after the last named one are left out,
+    since whether a header includes them depends on how many rows were read.
+    """
+    columns = list(columns)
+    while columns and UNNAMED_COLUMN.match(str(columns[-1])):
+        columns.pop()
+    names = sorted(normalize_profile_header(col) for col in columns)
+    return hashlib.sha1(json.dumps(names, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+class ProfileStore:
+    """Confirmed mappings of previously processed files, keyed by header fingerprint
+
+    Each profile is a JSON file in the store's folder holding the mapping,
+    custom values and split configuration last used for files with that header.
+    Files are replaced atomically, so several workers can share the folder.
+    """
+
+    def __init__(self, directory=None):
+        """Use directory, defaulting to MAPPING_PROFILES_DIR, creating it if needed"""
+        self.directory = directory or MAPPING_PROFILES_DIR
+        self.lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, fingerprint):
+        """Path of the profile file of a fingerprint"""
+        if not fingerprint or not all(c in '0123456789abcdef' for c in fingerprint):
+            raise ValueError(f"Invalid header fingerprint: '{fingerprint}'")
+        return os.path.join(self.directory, f"{fingerprint}.json")
+
+    def get(self, fingerprint):
+        """Get the stored profile of a fingerprint, or None if there is none"""
+        path = self._path(fingerprint)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not read mapping profile '{path}': {str(e)}")
+            return None
+
+    def save(self, columns, mapping_config, custom_values=None, split_config=None, sheet_name=None):
+        """Store the confirmed configuration for a header, replacing any earlier profile
+
+        Returns the saved profile.
+        """
+        fingerprint = header_fingerprint(columns)
+        path = self._path(fingerprint)
+        with self.lock:
+            previous = self.get(fingerprint)
+            now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            profile = {
+                'fingerprint': fingerprint,
+                'columns': list(columns),
+                'mapping': mapping_config,
+                'custom_values': custom_values or {},
+                'split_config': split_config,
+                'sheet_name': sheet_name,
+                'created': previous['created'] if previous else now,
+                'updated': now,
+                'uses': (previous.get('uses', 0) if previous else 0) + 1
+            }
+            # Write to a temporary file first so readers never see a partial profile
+            fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(profile, f, indent=2, ensure_ascii=False, default=str)
+                os.replace(temp_path, path)
+            except Exception:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+        logger.info(f"Saved mapping profile {fingerprint} for {len(profile['columns'])} columns")
+        return profile
+
+    def delete(self, fingerprint):
+        """Remove the profile of a fingerprint, returning whether one existed"""
+        try:
+            os.remove(self._path(fingerprint))
+            return True
+        except FileNotFoundError:
+            return False
@@ -0,0 +1,117 @@
+import os
+import json
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Rule file read by every normalizer; edits are picked up without restarting the workers
+NORMALIZATION_RULES_PATH = os.environ.get(
+    'NORMALIZATION_RULES_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'normalization_rules.json')
+)
+
+# Seconds between checks of the rule file's modification time
+RULES_RELOAD_INTERVAL = float(os.environ.get('RULES_RELOAD_INTERVAL', 2))
+
+# Rules used when the rule file is missing: each rule set maps a standard value
+# to the spellings accepted for it
+DEFAULT_RULES = {
+    'question_type': {
+        'MCQ': ['mcq', 'single', 'one answer', 'single choice', 'single select'],
+        'MAQ': ['maq', 'multiple', 'multiple answers', 'multiple choice', 'multi select'],
+        'True/False': ['true/false', 'true or false', 'yes or no', 't/f', 'yes/no'],
+        'FIB': ['fib', 'fill in the blank', 'fill in blank', 'fill blank', 'fill-in-the-blank'],
+        'DESC': ['desc', 'descriptive', 'long answer', 'essay', 'paragraph', 'long', 'descriptive question']
+    },
+    'difficulty_level': {
+        'Easy': ['easy', 'beginner', 'basic', 'e'],
+        'Medium': ['medium', 'intermediate', 'moderate', 'm'],
+        'Hard': ['hard', 'difficult', 'advanced', 'expert', 'h']
+    }
+}
+
+def compile_rules(rules):
+    """Compile rule sets into lookups from lowercased, stripped spelling to standard value
+
+    Raises ValueError when the rules are not shaped as rule set -> standard
+    value -> list of spellings.
+    """
+    if not isinstance(rules, dict):
+        raise ValueError("Normalization rules must be an object of rule sets")
+    lookups = {}
+    for name, rule_set in rules.items():
+        if not isinstance(rule_set, dict):
+            raise ValueError(f"Rule set '{name}' must map standard values to lists of spellings")
+        lookup = {}
+        for standard, spellings in rule_set.items():
+            if not isinstance(spellings, list) or not all(isinstance(spelling, str) for spelling in spellings):
+                raise ValueError(f"Spellings of '{standard}' in rule set '{name}' must be a list of strings")
+            # The standard value is always accepted for itself
+            for spelling in [standard] + spellings:
+                lookup.setdefault(spelling.strip().lower(), standard)
+        lookups[name] = lookup
+    return lookups
+
+class RuleRegistry:
+    """Normalization rules loaded from a JSON file and compiled into lookup tables
+
+    The file is checked for changes at most every RULES_RELOAD_INTERVAL seconds
+    and recompiled when it was modified, so each worker picks up edited rules on
+    its own. A file that cannot be read or compiled leaves the last good rules
+    in place.
+    """
+
+    def __init__(self, path=None):
+        """Load the rules from path, defaulting to NORMALIZATION_RULES_PATH"""
+        self.path = path or NORMALIZATION_RULES_PATH
+        self.lock = threading.Lock()
+        self.lookups = compile_rules(DEFAULT_RULES)
+        self.mtime = None
+        self.checked_at = None
+        self.reload()
+
+    def reload(self):
+        """Recompile the rules if the file changed since it was last loaded"""
+        with self.lock:
+            self.checked_at = time.monotonic()
+            try:
+                mtime = os.path.getmtime(self.path)
+            except OSError:
+                if self.mtime is None:
+                    logger.warning(f"Normalization rules file '{self.path}' not found, using the default rules")
+                    self.mtime = 0
+                return
+            if mtime == self.mtime:
+                return
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    rules = json.load(f)
+                # Rule sets missing from the file keep their defaults
+                lookups = compile_rules(DEFAULT_RULES)
+                lookups.update(compile_rules(rules))
+            except (OSError, ValueError) as e:
+                logger.error(f"Could not load normalization rules from '{self.path}', keeping the current rules: {str(e)}")
+                self.mtime = mtime
+                return
+            self.lookups = lookups
+            self.mtime = mtime
+            logger.info(f"Loaded normalization rules from '{self.path}': {', '.join(sorted(lookups))}")
+
+    def lookup(self, name):
+        """Get the compiled lookup of a rule set, reloading the rules if they are due a check"""
+        if time.monotonic() - self.checked_at >= RULES_RELOAD_INTERVAL:
+            self.reload()
+        return self.lookups.get(name, {})
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+def get_rule_registry(path=None):
+    """Get the registry of a rule file, shared by every standardizer in the process"""
+    path = path or NORMALIZATION_RULES_PATH
+    with _registries_lock:
+        if path not in _registries:
+            _registries[path] = RuleRegistry(path)
+        return _registries[path]
@@ -0,0 +1,72 @@
+import sys
+import numpy as np
+import pandas as pd
+from excel_standardizer_improved import ExcelStandardizer
+
+# Correct Answer values covering every branch of _standardize_correct_answer
+SAMPLE_ANSWERS = [
+    'a', 'B', ' c ', 'A,B', 'a, c', ' b ,d ', 'a,,b', ',a', 'a,', ',', '',
+    '1', '2', '26', '27', '0', '00', '01', '026', '100', ' 3 ', '1,2', '1, 3 ,26',
+    '2,27', '0,1', 'a,2', '1,b,30', 'option a', 'A and C', 'true', 'nan',
+    '1.0', '-1', '+2', '1 2', '1\t,\t2', '1\n,2', 'a\xa0,b', 'é', 'É,1', '١', '１', '１,２,x',
+    1, 2.0, 27, np.nan, None
+]
+
+def check_equivalent(series):
+    """Assert that the Series normalizer matches the scalar normalizer row by row"""
+    standardizer = ExcelStandardizer()
+    expected = [standardizer._standardize_correct_answer(value) for value in series]
+    values, error_mask = standardizer._standardize_correct_answers(series)
+    assert len(values) == len(series)
+    assert list(values.index) == list(series.index)
+    for position, (expected_value, expected_error) in enumerate(expected):
+        assert values.iloc[position] == expected_value, (series.iloc[position], values.iloc[position], expected_value)
+        assert bool(error_mask[position]) == expected_error, (series.iloc[position], error_mask[position], expected_error)
+
+def test_sample_answers():
+    """Every sample value standardizes as it does one at a time"""
+    check_equivalent(pd.Series(SAMPLE_ANSWERS, dtype=object))
+
+def test_string_values():
+    """Text read from a workbook, where missing cells are empty strings"""
+    check_equivalent(pd.Series([str(value) for value in SAMPLE_ANSWERS if value is not None], dtype=str))
+
+def test_random_answers():
+    """A large random mix, including values built from random option numbers"""
+    rng = np.random.default_rng(0)
+    values = list(rng.choice(np.array(SAMPLE_ANSWERS, dtype=object), 5000))
+    for _ in range(2000):
+        parts = [str(number) for number in rng.integers(0, 30, rng.integers(1, 5))]
+        values.append((',' + ' ' * int(rng.integers(0, 2))).join(parts))
+    check_equivalent(pd.Series(values, dtype=object))
+
+def test_equal_numbers():
+    """Numbers that compare equal but are written differently are standardized separately"""
+    check_equivalent(pd.Series([1, 1.0, True, '1', 2, 2.0, '2.0'], dtype=object))
+
+def test_offset_index():
+    """Chunks of a streamed sheet keep their own index"""
+    check_equivalent(pd.Series(SAMPLE_ANSWERS, index=range(1000, 1000 + len(SAMPLE_ANSWERS)), dtype=object))
+
+def test_empty_series():
+    """An empty column has no values and no errors"""
+    values, error_mask = ExcelStandardizer()._standardize_correct_answers(pd.Series([], dtype=object))
+    assert len(values) == 0
+    assert len(error_mask) == 0
+
+def test_all_missing():
+    """A column with only missing values has no distinct values and an error in every row"""
+    check_equivalent(pd.Series([None, np.nan, None], index=[4, 5, 6], dtype=object))
+
+if __name__ == "__main__":
+    tests = [test_sample_answers, test_string_values, test_random_answers, test_equal_numbers, test_offset_index, test_empty_series,
+             test_all_missing]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"PASS {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"FAIL {test.__name__}: {e}")
+    sys.exit(1 if failed else 0)
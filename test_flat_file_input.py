@@ -0,0 +1,75 @@
+import os
+import sys
+import pandas as pd
+from excel_standardizer_improved import ExcelStandardizer, SURVEY_SAMPLE_ROWS
+
+STANDARD_COLUMNS = ['Question Type', 'Difficulty Level', 'Question Text', 'Topics']
+MAPPING = {'Question Type': 'Type', 'Difficulty Level': 'Level', 'Question Text': 'Question'}
+HEADER = ['Id', 'Question', 'Reviewer', 'Type', 'Notes', 'Level', 'Topic']
+
+def make_standardizer(tmp_path):
+    """A standardizer writing to tmp_path, with the standard format of STANDARD_COLUMNS"""
+    standardizer = ExcelStandardizer()
+    standardizer.standard_format_path = str(tmp_path / 'standard.xlsx')
+    pd.DataFrame(columns=STANDARD_COLUMNS).to_excel(standardizer.standard_format_path, index=False)
+    standardizer.output_dir = str(tmp_path / 'output')
+    return standardizer
+
+def write_csv(tmp_path, rows):
+    """Write a question bank CSV of rows rows with columns the mapping does not use"""
+    lines = [','.join(HEADER)]
+    for i in range(rows):
+        lines.append(f"{i},What is {i}?,someone,mcq,,{('easy', 'medium', 'hard')[i % 3]},Topic {i % 4}")
+    path = tmp_path / 'bank.csv'
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    return str(path)
+
+def spy_flat_reads(standardizer):
+    """Record the chunksize, usecols and nrows of every flat file read"""
+    calls = []
+    read_flat_file = standardizer._read_flat_file
+
+    def spy(session, chunksize=None, usecols=None, nrows=None):
+        calls.append((chunksize, usecols, nrows))
+        return read_flat_file(session, chunksize=chunksize, usecols=usecols, nrows=nrows)
+    standardizer._read_flat_file = spy
+    return calls
+
+def test_survey_does_not_load(tmp_path):
+    """Analysis without loading reads the header, sample rows and a row count, and caches no frame"""
+    path = write_csv(tmp_path, 40)
+    standardizer = make_standardizer(tmp_path)
+    calls = spy_flat_reads(standardizer)
+    columns_info, shape, _, sheet, _ = standardizer.analyze_file(path, load=False)
+    assert [col['name'] for col in columns_info] == HEADER
+    assert shape == (40, len(HEADER))
+    assert all(chunksize is not None or nrows == SURVEY_SAMPLE_ROWS for chunksize, _, nrows in calls)
+    assert standardizer.get_session(path).frames == {}
+
+def test_streaming_reads_chunks(tmp_path):
+    """Streamed processing of a CSV goes through the chunked reader"""
+    path = write_csv(tmp_path, 40)
+    standardizer = make_standardizer(tmp_path)
+    calls = spy_flat_reads(standardizer)
+    result = standardizer.process_file(path, MAPPING, streaming=True, chunk_size=15)
+    chunked = [call for call in calls if call[0] == 15]
+    assert len(chunked) == 1
+    assert all(nrows is not None or chunksize is not None for chunksize, _, nrows in calls)
+    assert standardizer.get_session(path).frames == {}
+    output = pd.read_excel(result['output_files'][0], dtype=str)
+    assert len(output) == 40
+    assert output['Question Text'].tolist() == [f"What is {i}?" for i in range(40)]
+
+def test_reads_only_mapped_columns(tmp_path):
+    """Processing reads only the mapped columns and the split column of a CSV"""
+    path = write_csv(tmp_path, 40)
+    standardizer = make_standardizer(tmp_path)
+    calls = spy_flat_reads(standardizer)
+    result = standardizer.process_file(path, MAPPING, {'column': 'Topic'}, streaming=False)
+    full_reads = [usecols for chunksize, usecols, nrows in calls if chunksize is None and nrows is None]
+    assert full_reads == [[HEADER.index(col) for col in ('Question', 'Type', 'Level', 'Topic')]]
+    assert len(result['output_files']) == 4
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))
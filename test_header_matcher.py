@@ -0,0 +1,113 @@
+import sys
+import itertools
+import numpy as np
+from header_matcher import linear_assignment, match_headers, similarity_matrix, normalize_header
+from excel_standardizer_improved import ExcelStandardizer
+
+# Columns of the iMocha standard format, as get_standard_columns reads them
+STANDARD_COLUMNS = [
+    'Question Type', 'Difficulty Level', 'Question Text', 'Option (A)', 'Option (B)', 'Option (C)',
+    'Option (D)', 'Option (E)', 'Correct Answer', 'Answer Explanation', 'Score', 'Topics', 'Author',
+    'Recording Time Limit:(Upto 5 mins)', 'Retake Allowed:(Upto 5 mins)', 'Set Prep Time (0.5 to 5 mins)',
+    'Proofreading Status', 'Editor Email', 'Differential Scoring'
+]
+
+def brute_force_cost(cost):
+    """Least total cost of assigning the smaller side of a matrix to distinct members of the other"""
+    if cost.shape[0] > cost.shape[1]:
+        cost = cost.T
+    rows, cols = cost.shape
+    return min(sum(cost[row, col] for row, col in zip(range(rows), perm))
+               for perm in itertools.permutations(range(cols), rows))
+
+def check_assignment(cost):
+    """Assert that an assignment is complete, distinct and as cheap as the best one"""
+    pairs = linear_assignment(cost)
+    assert len(pairs) == min(cost.shape)
+    assert len({row for row, _ in pairs}) == len(pairs)
+    assert len({col for _, col in pairs}) == len(pairs)
+    assert np.isclose(sum(cost[row, col] for row, col in pairs), brute_force_cost(cost)), (cost, pairs)
+
+def test_assignment_is_optimal():
+    """Random square and rectangular matrices, checked against every permutation"""
+    rng = np.random.default_rng(0)
+    for _ in range(300):
+        rows, cols = rng.integers(1, 7, 2)
+        check_assignment(rng.random((rows, cols)))
+
+def test_assignment_with_ties():
+    """Repeated and negative costs, like the negated scores match_headers assigns"""
+    rng = np.random.default_rng(1)
+    for _ in range(200):
+        rows, cols = rng.integers(1, 7, 2)
+        check_assignment(-rng.choice([0.0, 0.0, 0.5, 0.75, 1.0], (rows, cols)))
+    check_assignment(np.zeros((4, 6)))
+
+def test_assignment_prefers_total_over_greedy():
+    """Taking the single best pair first would cost more in total"""
+    cost = np.array([[1.0, 2.0], [1.1, 10.0]])
+    assert linear_assignment(cost) == [(0, 1), (1, 0)]
+
+def test_similarity():
+    """Headers that differ only in case, spacing or separators score 1, unrelated ones low"""
+    scores = similarity_matrix(['Question Text', 'Topics'], ['question_text', 'QUESTION  TEXT', 'Topic', 'Marks'])
+    assert scores[0, 0] == 1.0 and scores[0, 1] == 1.0
+    assert scores[1, 2] > 0.5
+    assert scores[0, 3] < 0.2 and scores[1, 3] < 0.2
+    assert normalize_header('Option/\xa0Answer 1') == 'option answer 1'
+
+def test_match_headers_threshold():
+    """Targets without a column scoring above the threshold get no suggestion"""
+    assert match_headers(['Score'], ['Question', 'Level']) == {}
+    suggestions = match_headers(['Topics'], ['Topic'], threshold=0.99)
+    assert suggestions == {}
+    assert match_headers(['Topics'], ['Topic'])['Topics']['column'] == 'Topic'
+
+def check_mapping(header, expected):
+    """Assert the mapping suggested for a header row"""
+    suggestions = ExcelStandardizer().suggest_mapping(header, STANDARD_COLUMNS)
+    assert {std_col: match['column'] for std_col, match in suggestions.items()} == expected
+    assert all(0.5 <= match['confidence'] <= 1 for match in suggestions.values())
+
+def test_mapping_sample_header():
+    """The header of the sample question bank"""
+    check_mapping(
+        ['Q type', 'Level', 'q text', 'Option/ Answer 1', 'Option/ Answer 2', 'Option/ Answer 3',
+         'Option/ Answer 4', 'Option/ Answer 5', 'Correct Answer', 'Topic', 'Author'],
+        {'Question Type': 'Q type', 'Difficulty Level': 'Level', 'Question Text': 'q text',
+         'Option (A)': 'Option/ Answer 1', 'Option (B)': 'Option/ Answer 2', 'Option (C)': 'Option/ Answer 3',
+         'Option (D)': 'Option/ Answer 4', 'Option (E)': 'Option/ Answer 5', 'Correct Answer': 'Correct Answer',
+         'Topics': 'Topic', 'Author': 'Author'})
+
+def test_mapping_spelling_variants():
+    """Upper case, underscores, letters for options and synonyms"""
+    check_mapping(
+        ['QUESTION_TEXT', 'Question Type', 'Difficulty', 'Option A', 'Option B', 'Option C', 'Option D',
+         'Correct_Answer', 'Explanation', 'Marks', 'Topics', 'Created By'],
+        {'Question Type': 'Question Type', 'Difficulty Level': 'Difficulty', 'Question Text': 'QUESTION_TEXT',
+         'Option (A)': 'Option A', 'Option (B)': 'Option B', 'Option (C)': 'Option C', 'Option (D)': 'Option D',
+         'Correct Answer': 'Correct_Answer', 'Answer Explanation': 'Explanation', 'Score': 'Marks',
+         'Topics': 'Topics', 'Author': 'Created By'})
+
+def test_mapping_shared_words():
+    """Headers sharing words ('Question', 'Answer') are each suggested once"""
+    check_mapping(
+        ['Sr No', 'Question', 'Type', 'Answer 1', 'Answer 2', 'Answer 3', 'Answer 4', 'Right Answer',
+         'Subject', 'Solution', 'Points', 'Author Email'],
+        {'Question Type': 'Type', 'Question Text': 'Question', 'Option (A)': 'Answer 1', 'Option (B)': 'Answer 2',
+         'Option (C)': 'Answer 3', 'Option (D)': 'Answer 4', 'Correct Answer': 'Right Answer',
+         'Answer Explanation': 'Solution', 'Score': 'Points', 'Topics': 'Subject', 'Author': 'Author Email'})
+
+if __name__ == "__main__":
+    tests = [test_assignment_is_optimal, test_assignment_with_ties, test_assignment_prefers_total_over_greedy,
+             test_similarity, test_match_headers_threshold, test_mapping_sample_header,
+             test_mapping_spelling_variants, test_mapping_shared_words]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"PASS {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"FAIL {test.__name__}: {e}")
+    sys.exit(1 if failed else 0)
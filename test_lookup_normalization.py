@@ -0,0 +1,83 @@
+import sys
+import numpy as np
+import pandas as pd
+from excel_standardizer_improved import ExcelStandardizer
+
+# Question Type values: standard values, synonyms, spacing and case variants and unknown values
+SAMPLE_QUESTION_TYPES = [
+    'MCQ', 'mcq', ' Mcq ', 'single', 'Single Choice', 'MAQ', 'multiple', 'Multi Select', 'True/False',
+    't/f', 'YES/NO', 'true or false', 'FIB', 'fill-in-the-blank', 'Fill in blank', 'DESC', 'essay',
+    'Descriptive Question', 'single\xa0choice', 'mcq\t', 'true', 'multi', 'matching', '', ' ', 'nan',
+    'None', 'É', '1', 1, 1.0, True, np.nan, None
+]
+
+# Difficulty Level values, including the one-letter spellings and numbers
+SAMPLE_DIFFICULTY_LEVELS = [
+    'Easy', 'easy', ' EASY ', 'e', 'E', 'beginner', 'Basic', 'Medium', 'm', 'intermediate', 'Moderate',
+    'Hard', 'h', 'difficult', 'Advanced', 'expert', 'easy\xa0', 'very easy', 'med', 'x', '', ' ', 'nan',
+    '1', '2', 1, 2.0, 3, False, np.nan, None
+]
+
+def check_equivalent(series, scalar_name, series_name):
+    """Assert that a Series normalizer matches its scalar normalizer row by row"""
+    standardizer = ExcelStandardizer()
+    expected = [getattr(standardizer, scalar_name)(value) for value in series]
+    for categorical in (False, True):
+        values, error_mask = getattr(standardizer, series_name)(series, categorical=categorical)
+        assert len(values) == len(series)
+        assert list(values.index) == list(series.index)
+        for position, (expected_value, expected_error) in enumerate(expected):
+            value = values.iloc[position]
+            if expected_value is None:
+                assert pd.isna(value), (series.iloc[position], value)
+            else:
+                assert value == expected_value, (series.iloc[position], value, expected_value)
+            assert bool(error_mask[position]) == expected_error, (series.iloc[position], error_mask[position], expected_error)
+
+def check_question_types(series):
+    check_equivalent(series, '_standardize_question_type', '_standardize_question_types')
+
+def check_difficulty_levels(series):
+    check_equivalent(series, '_standardize_difficulty_level', '_standardize_difficulty_levels')
+
+def test_sample_question_types():
+    """Every sample Question Type standardizes as it does one at a time"""
+    check_question_types(pd.Series(SAMPLE_QUESTION_TYPES, dtype=object))
+
+def test_sample_difficulty_levels():
+    """Every sample Difficulty Level standardizes as it does one at a time"""
+    check_difficulty_levels(pd.Series(SAMPLE_DIFFICULTY_LEVELS, dtype=object))
+
+def test_string_values():
+    """Text read from a workbook, where missing cells are empty strings"""
+    check_question_types(pd.Series([str(value) for value in SAMPLE_QUESTION_TYPES if value is not None], dtype=str))
+    check_difficulty_levels(pd.Series([str(value) for value in SAMPLE_DIFFICULTY_LEVELS if value is not None], dtype=str))
+
+def test_random_values():
+    """A large random mix with a shuffled, offset index, as a streamed chunk has"""
+    rng = np.random.default_rng(0)
+    index = rng.permutation(5000) + 1000
+    check_question_types(pd.Series(list(rng.choice(np.array(SAMPLE_QUESTION_TYPES, dtype=object), 5000)), index=index, dtype=object))
+    check_difficulty_levels(pd.Series(list(rng.choice(np.array(SAMPLE_DIFFICULTY_LEVELS, dtype=object), 5000)), index=index, dtype=object))
+
+def test_equal_numbers():
+    """Numbers that compare equal but are written differently are standardized separately"""
+    check_difficulty_levels(pd.Series([1, 1.0, True, '1', 'e', 'E '], dtype=object))
+
+def test_all_missing():
+    """A column with only missing values has no distinct values and an error in every row"""
+    check_question_types(pd.Series([None, np.nan], index=[7, 8], dtype=object))
+    check_difficulty_levels(pd.Series([np.nan] * 3, dtype=float))
+
+if __name__ == "__main__":
+    tests = [test_sample_question_types, test_sample_difficulty_levels, test_string_values, test_random_values, test_equal_numbers,
+             test_all_missing]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"PASS {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"FAIL {test.__name__}: {e}")
+    sys.exit(1 if failed else 0)
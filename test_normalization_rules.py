@@ -0,0 +1,103 @@
+import os
+import sys
+import json
+import pytest
+import normalization_rules
+from normalization_rules import RuleRegistry, compile_rules, DEFAULT_RULES
+
+# Rules with a renamed level and a rule set the defaults do not have
+CUSTOM_RULES = {
+    'difficulty_level': {
+        'Easy': ['simple'],
+        'Hard': ['tough']
+    },
+    'score_band': {
+        'High': ['top']
+    }
+}
+
+def write_rules(path, content, mtime):
+    """Write a rule file, as JSON unless given as text, with a set modification time"""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content if isinstance(content, str) else json.dumps(content))
+    os.utime(path, (mtime, mtime))
+
+def test_compile_rules():
+    """Spellings and standard values are matched lowercased and stripped"""
+    lookups = compile_rules({'question_type': {'MCQ': [' Single Choice ', 'mcq']}})
+    assert lookups == {'question_type': {'mcq': 'MCQ', 'single choice': 'MCQ'}}
+    assert compile_rules(DEFAULT_RULES)['difficulty_level']['e'] == 'Easy'
+
+def test_compile_rules_rejects_bad_shapes():
+    """Rules not shaped as rule set -> standard value -> list of spellings raise ValueError"""
+    for rules in [[], {'question_type': ['mcq']}, {'question_type': {'MCQ': 'mcq'}},
+                  {'question_type': {'MCQ': ['mcq', 1]}}]:
+        with pytest.raises(ValueError):
+            compile_rules(rules)
+
+def test_missing_file(tmp_path):
+    """Without a rule file the default rules are used"""
+    registry = RuleRegistry(str(tmp_path / 'missing.json'))
+    assert registry.lookups == compile_rules(DEFAULT_RULES)
+    assert registry.lookup('question_type')['t/f'] == 'True/False'
+    assert registry.lookup('unknown') == {}
+
+def test_missing_rule_sets_keep_defaults(tmp_path):
+    """Rule sets in the file replace the defaults, the others keep them"""
+    path = tmp_path / 'rules.json'
+    write_rules(path, CUSTOM_RULES, 1000)
+    registry = RuleRegistry(str(path))
+    assert registry.lookup('difficulty_level') == {'easy': 'Easy', 'simple': 'Easy', 'hard': 'Hard', 'tough': 'Hard'}
+    assert registry.lookup('question_type') == compile_rules(DEFAULT_RULES)['question_type']
+    assert registry.lookup('score_band') == {'high': 'High', 'top': 'High'}
+
+def test_reload_after_edit(tmp_path, monkeypatch):
+    """An edited file is picked up once the reload interval has passed"""
+    path = tmp_path / 'rules.json'
+    write_rules(path, DEFAULT_RULES, 1000)
+    monkeypatch.setattr(normalization_rules, 'RULES_RELOAD_INTERVAL', 3600)
+    registry = RuleRegistry(str(path))
+    assert registry.lookup('difficulty_level')['basic'] == 'Easy'
+
+    write_rules(path, CUSTOM_RULES, 2000)
+    assert 'simple' not in registry.lookup('difficulty_level')
+    monkeypatch.setattr(normalization_rules, 'RULES_RELOAD_INTERVAL', 0)
+    assert registry.lookup('difficulty_level')['simple'] == 'Easy'
+    assert 'basic' not in registry.lookup('difficulty_level')
+
+def test_malformed_file_keeps_last_rules(tmp_path):
+    """A file that is not valid JSON or not shaped as rules leaves the last good rules in place"""
+    path = tmp_path / 'rules.json'
+    write_rules(path, CUSTOM_RULES, 1000)
+    registry = RuleRegistry(str(path))
+    loaded = registry.lookups
+
+    write_rules(path, '{"difficulty_level": {"Easy": ["simple"]', 2000)
+    registry.reload()
+    assert registry.lookups == loaded
+
+    write_rules(path, {'difficulty_level': {'Easy': 'simple'}}, 3000)
+    registry.reload()
+    assert registry.lookups == loaded
+
+    write_rules(path, DEFAULT_RULES, 4000)
+    registry.reload()
+    assert registry.lookups == compile_rules(DEFAULT_RULES)
+
+def test_malformed_file_at_start(tmp_path):
+    """A registry whose file is malformed from the start uses the default rules"""
+    path = tmp_path / 'rules.json'
+    write_rules(path, 'not json', 1000)
+    assert RuleRegistry(str(path)).lookups == compile_rules(DEFAULT_RULES)
+
+def test_deleted_file_keeps_last_rules(tmp_path):
+    """Removing the file after loading it keeps the rules it had"""
+    path = tmp_path / 'rules.json'
+    write_rules(path, CUSTOM_RULES, 1000)
+    registry = RuleRegistry(str(path))
+    os.remove(path)
+    registry.reload()
+    assert registry.lookup('score_band') == {'high': 'High', 'top': 'High'}
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,48 @@
+import io
+import sys
+import zipfile
+from excel_standardizer_improved import OutputArchive
+
+def archive_members(files):
+    """Add (name, data) files to an archive in memory, returning the member names and the archive's members"""
+    buffer = io.BytesIO()
+    archive = OutputArchive(buffer)
+    names = [archive.add(name, data) for name, data in files]
+    archive.close()
+    return names, {info.filename: info for info in zipfile.ZipFile(buffer).infolist()}
+
+def test_compression_by_extension():
+    """Workbooks and Parquet files are stored, other files deflated"""
+    names, members = archive_members([('a.xlsx', b'x' * 100), ('b.PARQUET', b'x' * 100), ('c.csv', b'x' * 100), ('log.json', b'{}')])
+    assert [members[name].compress_type for name in names] == [zipfile.ZIP_STORED, zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED, zipfile.ZIP_DEFLATED]
+
+def test_name_made_only_of_extension():
+    """A member named only by its extension is stored and renamed before its extension"""
+    names, members = archive_members([('.xlsx', b'x' * 100), ('.xlsx', b'y' * 100), ('.csv', b'z' * 100)])
+    assert names == ['.xlsx', ' (2).xlsx', '.csv']
+    assert [members[name].compress_type for name in names] == [zipfile.ZIP_STORED, zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED]
+
+def test_file_objects_and_renaming():
+    """File objects are copied from their start, and taken names are numbered"""
+    data = io.BytesIO(b'0123456789' * 1000)
+    data.seek(500)
+    buffer = io.BytesIO()
+    archive = OutputArchive(buffer)
+    names = [archive.add('Java.csv', data), archive.add('Java.csv', b'second')]
+    archive.close()
+    zf = zipfile.ZipFile(buffer)
+    assert names == ['Java.csv', 'Java (2).csv']
+    assert zf.read('Java.csv') == b'0123456789' * 1000
+    assert zf.read('Java (2).csv') == b'second'
+
+if __name__ == "__main__":
+    tests = [test_compression_by_extension, test_name_made_only_of_extension, test_file_objects_and_renaming]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"PASS {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"FAIL {test.__name__}: {e}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,50 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+from excel_standardizer_improved import ExcelStandardizer, UNNAMED_SPLIT_STEM
+
+STANDARD_COLUMNS = ['Question Type', 'Question Text', 'Topics']
+MAPPING = {'Question Type': 'Type', 'Question Text': 'Question', 'Topics': 'Topic'}
+TOPICS = ['Java', '', 'SQL', '', 'java', '???', ' ', 'SQL']
+
+def test_split_groups_blank_values():
+    """Blank values form a group, missing values belong to none"""
+    values = pd.Series(['Java', '', np.nan, 'SQL', '', 'java', None], dtype=object)
+    order, groups = ExcelStandardizer()._split_groups(values)
+    assert [(key, start, stop) for key, _, start, stop in groups] == [('Java', 0, 1), ('', 1, 3), ('SQL', 3, 4), ('java', 4, 5)]
+    assert order.tolist() == [0, 1, 4, 3, 5]
+    order, groups = ExcelStandardizer()._split_groups(values, case_insensitive=True)
+    assert [(value, stop - start) for _, value, start, stop in groups] == [('Java', 2), ('', 2), ('SQL', 1)]
+
+def test_split_file_stem():
+    """Values without a character safe in a file name get the unnamed stem"""
+    standardizer = ExcelStandardizer()
+    assert standardizer._split_file_stem('C/C++') == 'C_C'
+    for value in ['', ' ', '???', '**']:
+        assert standardizer._split_file_stem(value) == UNNAMED_SPLIT_STEM
+
+@pytest.mark.parametrize('streaming', [False, True])
+def test_blank_split_values_are_written(tmp_path, streaming):
+    """Blank split values get the unnamed file, and values sharing a file name are numbered"""
+    standardizer = ExcelStandardizer()
+    standardizer.standard_format_path = str(tmp_path / 'standard.xlsx')
+    pd.DataFrame(columns=STANDARD_COLUMNS).to_excel(standardizer.standard_format_path, index=False)
+    standardizer.output_dir = str(tmp_path / 'output')
+    path = tmp_path / 'bank.csv'
+    path.write_text('Question,Type,Topic\n' + ''.join(f"Q{i},mcq,{topic}\n" for i, topic in enumerate(TOPICS)), encoding='utf-8')
+
+    result = standardizer.process_file(str(path), MAPPING, {'column': 'Topic'}, streaming=streaming)
+    names = [os.path.basename(output) for output in result['output_files']]
+    assert names == ['Java.xlsx', f"{UNNAMED_SPLIT_STEM}.xlsx", 'SQL.xlsx', 'java.xlsx',
+                     f"{UNNAMED_SPLIT_STEM} (2).xlsx", f"{UNNAMED_SPLIT_STEM} (3).xlsx"]
+    rows = {name: pd.read_excel(output, dtype=str)['Question Text'].tolist()
+            for name, output in zip(names, result['output_files'])}
+    assert rows['Java.xlsx'] == ['Q0']
+    assert rows[f"{UNNAMED_SPLIT_STEM}.xlsx"] == ['Q1', 'Q3']
+    assert rows[f"{UNNAMED_SPLIT_STEM} (2).xlsx"] == ['Q5']
+    assert rows[f"{UNNAMED_SPLIT_STEM} (3).xlsx"] == ['Q6']
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-q']))
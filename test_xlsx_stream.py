@@ -0,0 +1,204 @@
+import io
+import sys
+import zipfile
+import xlsx_stream
+from xlsx_stream import XlsxReader, scan_sheet_extent
+from excel_standardizer_improved import ExcelStandardizer
+
+SPREADSHEET_NAMESPACE = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+
+# Package parts shared by every test workbook; cell styles 1-3 are a date, a date
+# with time and a time format
+PACKAGE_PARTS = {
+    '[Content_Types].xml': (
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '<Override PartName="/xl/sharedStrings.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>'
+        '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        '</Types>'),
+    '_rels/.rels': (
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'),
+    'xl/workbook.xml': (
+        f'<workbook xmlns="{SPREADSHEET_NAMESPACE}" xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Questions" sheetId="1" r:id="rId1"/></sheets></workbook>'),
+    'xl/_rels/workbook.xml.rels': (
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/sharedStrings" Target="sharedStrings.xml"/>'
+        '<Relationship Id="rId3" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+        '</Relationships>'),
+    'xl/styles.xml': (
+        f'<styleSheet xmlns="{SPREADSHEET_NAMESPACE}">'
+        '<fonts count="1"><font/></fonts><fills count="1"><fill><patternFill patternType="none"/></fill></fills><borders count="1"><border/></borders>'
+        '<cellStyleXfs count="1"><xf/></cellStyleXfs>'
+        '<cellXfs count="4"><xf numFmtId="0"/><xf numFmtId="14" applyNumberFormat="1"/>'
+        '<xf numFmtId="22" applyNumberFormat="1"/><xf numFmtId="20" applyNumberFormat="1"/></cellXfs>'
+        '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+        '</styleSheet>')
+}
+
+# Shared strings, including rich text runs and a phonetic hint that is not part of the text
+SHARED_STRINGS = [
+    '<si><t>Question</t></si>',
+    '<si><t>Answer</t></si>',
+    '<si><t>Notes</t></si>',
+    '<si><t>What is 2 + 2?</t></si>',
+    '<si><r><rPr><b/></rPr><t>Bold</t></r><r><t xml:space="preserve"> and plain</t></r></si>',
+    '<si><t>Kanji</t><rPh sb="0" eb="1"><t>kana</t></rPh></si>',
+    '<si><t>A &amp; B &lt;tag&gt;</t></si>',
+    '<si><t>007</t></si>',
+    '<si><t>Line_x000D_break</t></si>',
+    '<si><t>Under_x005F_x000D_score</t></si>'
+]
+
+def write_workbook(path, rows, dimension=None):
+    """Write an xlsx package whose sheet holds rows of raw cell XML, one string per row"""
+    sheet = [f'<worksheet xmlns="{SPREADSHEET_NAMESPACE}">']
+    if dimension:
+        sheet.append(f'<dimension ref="{dimension}"/>')
+    sheet.append('<sheetData>')
+    for number, cells in enumerate(rows, start=1):
+        sheet.append(f'<row r="{number}">{cells}</row>')
+    sheet.append('</sheetData></worksheet>')
+    shared = f'<sst xmlns="{SPREADSHEET_NAMESPACE}" count="{len(SHARED_STRINGS)}">{"".join(SHARED_STRINGS)}</sst>'
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for name, data in PACKAGE_PARTS.items():
+            zf.writestr(name, data)
+        zf.writestr('xl/worksheets/sheet1.xml', ''.join(sheet))
+        zf.writestr('xl/sharedStrings.xml', shared)
+    return path
+
+def load_sheet(path, engine, usecols=None):
+    """Load the test sheet as the standardizer does with an xlsx engine"""
+    standardizer = ExcelStandardizer()
+    session = standardizer.get_session(str(path))
+    standardizer._set_xlsx_engine(session, engine)
+    standardizer._get_sheet_names(session)
+    return standardizer._load_sheet(session, 'Questions', usecols=usecols)
+
+def check_same_frames(path, usecols=None):
+    """Assert that the native reader loads a sheet exactly as the openpyxl reader does"""
+    expected = load_sheet(path, 'openpyxl', usecols)
+    actual = load_sheet(path, 'native', usecols)
+    assert actual.columns.tolist() == expected.columns.tolist(), (actual.columns.tolist(), expected.columns.tolist())
+    for col in expected.columns:
+        assert actual[col].tolist() == expected[col].tolist(), (col, actual[col].tolist(), expected[col].tolist())
+    return actual
+
+def test_strings(tmp_path):
+    """Shared, inline, rich, escaped and formula strings"""
+    rows = [
+        '<c r="A1" t="s"><v>0</v></c><c r="B1" t="s"><v>1</v></c><c r="C1" t="s"><v>2</v></c>',
+        '<c r="A2" t="s"><v>3</v></c><c r="B2" t="inlineStr"><is><t>inline</t></is></c><c r="C2" t="s"><v>4</v></c>',
+        '<c r="A3" t="s"><v>5</v></c><c r="B3" t="inlineStr"><is><r><t>rich</t></r><r><t> inline</t></r></is></c><c r="C3" t="s"><v>6</v></c>',
+        '<c r="A4" t="s"><v>7</v></c><c r="B4" t="str"><f>A4&amp;"x"</f><v>007x</v></c><c r="C4" t="s"><v>8</v></c>',
+        '<c r="A5" t="inlineStr"><is><t xml:space="preserve">  spaced text </t></is></c><c r="B5" t="s"><v>3</v></c>',
+        '<c r="A6" t="s"><v>9</v></c><c r="B6" t="inlineStr"><is><t>in_x000D_line</t></is></c><c r="C6" t="str"><v>x &amp;amp; y</v></c>'
+    ]
+    frame = check_same_frames(write_workbook(tmp_path / 'strings.xlsx', rows))
+    assert frame['Question'].tolist()[2] == '007'
+    assert frame['Question'].tolist()[4] == 'Under_x000D_score'
+
+def test_numbers_booleans_and_errors(tmp_path):
+    """Columns pandas types as numbers are formatted as it formats them"""
+    header = '<c r="A1" t="inlineStr"><is><t>whole</t></is></c>' + ''.join(
+        f'<c r="{letter}1" t="inlineStr"><is><t>{name}</t></is></c>'
+        for letter, name in zip('BCDEFGHI', ['fraction', 'booleans', 'mixed', 'errors', 'text', 'blank', 'large', 'bool_error']))
+    values = [
+        ('1', '1', 'b:1', 'b:1', '3', '1', '1', '12345678901234567', 'b:1'),
+        ('2', '2.5', 'b:0', '2', 'e:#N/A', 's:3', '', '1E+20', 'e:#DIV/0!'),
+        ('-3', '-0', 'b:1', '3', '4.25', '3', '3', '1E-7', 'b:0'),
+        ('4.0', '4', 'b:0', '4', '5', '2.5', '4.5', '0.1', 'b:1')
+    ]
+    rows = [header]
+    for number, row in enumerate(values, start=2):
+        cells = []
+        for letter, value in zip('ABCDEFGHI', row):
+            if value.startswith('b:'):
+                cells.append(f'<c r="{letter}{number}" t="b"><v>{value[2:]}</v></c>')
+            elif value.startswith('e:'):
+                cells.append(f'<c r="{letter}{number}" t="e"><v>{value[2:]}</v></c>')
+            elif value.startswith('s:'):
+                cells.append(f'<c r="{letter}{number}" t="s"><v>{value[2:]}</v></c>')
+            elif value:
+                cells.append(f'<c r="{letter}{number}"><v>{value}</v></c>')
+        rows.append(''.join(cells))
+    frame = check_same_frames(write_workbook(tmp_path / 'numbers.xlsx', rows))
+    assert frame['whole'].tolist() == ['1', '2', '-3', '4']
+    assert frame['fraction'].tolist() == ['1.0', '2.5', '0.0', '4.0']
+    assert frame['booleans'].tolist() == ['True', 'False', 'True', 'False']
+    assert frame['errors'].tolist() == ['3.0', '', '4.25', '5.0']
+
+def test_numeric_text_is_kept(tmp_path):
+    """Unlike pandas, the native reader keeps text that looks numeric as written"""
+    rows = ['<c r="A1" t="s"><v>0</v></c>',
+            '<c r="A2"><v>1</v></c>', '<c r="A3" t="s"><v>7</v></c>', '<c r="A4"><v>2.5</v></c>']
+    path = write_workbook(tmp_path / 'numeric_text.xlsx', rows)
+    assert load_sheet(path, 'openpyxl')['Question'].tolist() == ['1.0', '7.0', '2.5']
+    assert load_sheet(path, 'native')['Question'].tolist() == ['1', '007', '2.5']
+
+def test_dates_and_times(tmp_path):
+    """Date, date-time and time styles, in columns that also hold text or blanks"""
+    rows = [
+        '<c r="A1" t="inlineStr"><is><t>date</t></is></c><c r="B1" t="inlineStr"><is><t>datetime</t></is></c>'
+        '<c r="C1" t="inlineStr"><is><t>time</t></is></c><c r="D1" t="inlineStr"><is><t>iso</t></is></c>',
+        '<c r="A2" s="1"><v>45292</v></c><c r="B2" s="2"><v>45292.4375</v></c><c r="C2" s="3"><v>0.5</v></c>'
+        '<c r="D2" t="d"><v>2024-01-01T10:30:00</v></c>',
+        '<c r="A3" t="inlineStr"><is><t>n/a</t></is></c><c r="B3" s="2"><v>45293</v></c><c r="C3" s="3"><v>0.75</v></c>'
+        '<c r="D3" t="inlineStr"><is><t>later</t></is></c>',
+        '<c r="A4" s="1"><v>45294</v></c><c r="C4" s="3"><v>0.125</v></c><c r="D4" t="d"><v>2024-03-01T00:00:00</v></c>'
+    ]
+    check_same_frames(write_workbook(tmp_path / 'dates.xlsx', rows))
+
+def test_phantom_range(tmp_path):
+    """Formatting-only cells and a declared dimension past the data are ignored"""
+    rows = ['<c r="A1" t="s"><v>0</v></c><c r="B1" t="s"><v>1</v></c>']
+    rows += [f'<c r="A{n}" t="inlineStr"><is><t>q{n}</t></is></c><c r="B{n}"><v>{n}</v></c><c r="F{n}" s="1"/>' for n in range(2, 12)]
+    rows += [f'<c r="A{n}" s="1"/><c r="Z{n}" s="2"></c>' for n in range(12, 200)]
+    path = write_workbook(tmp_path / 'phantom.xlsx', rows, dimension='A1:Z1000')
+    extent = scan_sheet_extent(str(path), 'Questions')
+    assert (extent['declared_range'], extent['rows'], extent['columns']) == ('A1:Z1000', 11, 2)
+    frame = check_same_frames(path)
+    assert len(frame) == 10
+
+def test_rows_beyond_read_columns(tmp_path):
+    """Trailing rows holding values only in columns that are not read are kept"""
+    rows = ['<c r="A1" t="s"><v>0</v></c><c r="B1" t="s"><v>1</v></c><c r="C1" t="s"><v>2</v></c>']
+    rows += [f'<c r="A{n}" t="inlineStr"><is><t>q{n}</t></is></c><c r="B{n}"><v>1</v></c>' for n in range(2, 6)]
+    rows += [f'<c r="C{n}" t="inlineStr"><is><t>note</t></is></c>' for n in range(6, 9)]
+    frame = check_same_frames(write_workbook(tmp_path / 'trailing.xlsx', rows), usecols=[0, 1])
+    assert len(frame) == 7
+    positions, _, columns = XlsxReader(str(tmp_path / 'trailing.xlsx')).read_columns('Questions', usecols=[0])
+    assert positions == [0] and len(columns[0]) == 7
+
+def test_block_boundaries(tmp_path, monkeypatch):
+    """The tokenizer reads the same cells as the XML parser wherever the blocks split the rows"""
+    rows = ['<c r="A1" t="s"><v>0</v></c><c r="B1" t="s"><v>1</v></c><c r="C1" t="s"><v>2</v></c>']
+    for n in range(2, 60):
+        rows.append(f'<c r="A{n}" t="inlineStr"><is><t>question &amp; {n}</t></is></c>'
+                    + (f'<c r="B{n}" s="1"><v>{45000 + n}</v></c>' if n % 10 else f'<c r="B{n}" t="inlineStr"><is><t>n/a</t></is></c>')
+                    + f'<c r="C{n}" t="s"><v>{n % len(SHARED_STRINGS)}</v></c>'
+                    + (f'<c r="D{n}" t="b"><v>1</v></c>' if n % 3 else ''))
+    path = write_workbook(tmp_path / 'blocks.xlsx', rows)
+    reader = XlsxReader(str(path))
+    with zipfile.ZipFile(path) as zf:
+        part = zf.read(reader.parts['Questions'])
+    expected = list(reader._parse_cells(io.BytesIO(part), None, None))
+    assert len(expected) > 150
+    for block_size in (7, 64, 100, 333, 1000, len(part)):
+        monkeypatch.setattr(xlsx_stream, 'SCAN_BLOCK_SIZE', block_size)
+        actual = [(column, row, kind, style, raw.decode() if isinstance(raw, bytes) else raw)
+                  for column, row, kind, style, raw in reader._tokenize_cells(io.BytesIO(part), None, None)]
+        assert actual == expected, block_size
+        kept = list(reader._tokenize_cells(io.BytesIO(part), 20, {0, 2}))
+        assert {column for column, *_ in kept} == {0, 2} and max(row for _, row, *_ in kept) == 20
+    check_same_frames(path)
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))
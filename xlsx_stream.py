@@ -0,0 +1,546 @@
+import posixpath
+import re
+import html
+from operator import itemgetter
+import zipfile
+import xml.etree.ElementTree as ET
+from openpyxl.styles.numbers import BUILTIN_FORMATS, is_date_format, is_timedelta_format
+from openpyxl.utils.datetime import from_excel, from_ISO8601, CALENDAR_WINDOWS_1900, CALENDAR_MAC_1904
+
+# SpreadsheetML namespaces of transitional and strict Office Open XML packages
+SPREADSHEET_NAMESPACES = (
+    'http://schemas.openxmlformats.org/spreadsheetml/2006/main',
+    'http://purl.oclc.org/ooxml/spreadsheetml/main'
+)
+RELATIONSHIP_NAMESPACES = (
+    'http://schemas.openxmlformats.org/officeDocument/2006/relationships',
+    'http://purl.oclc.org/ooxml/officeDocument/relationships'
+)
+PACKAGE_RELATIONSHIP_NAMESPACE = 'http://schemas.openxmlformats.org/package/2006/relationships'
+
+def _tags(name):
+    """Qualified tag names of a SpreadsheetML element in every supported namespace"""
+    return {f'{{{ns}}}{name}' for ns in SPREADSHEET_NAMESPACES}
+
+ROW_TAGS = _tags('row')
+CELL_TAGS = _tags('c')
+VALUE_TAGS = _tags('v')
+INLINE_STRING_TAGS = _tags('is')
+SHEET_DATA_TAGS = _tags('sheetData')
+DIMENSION_TAGS = _tags('dimension')
+SHARED_STRING_TAGS = _tags('si')
+TEXT_TAGS = _tags('t')
+RUN_TAGS = _tags('r')
+
+CELL_REFERENCE = re.compile(r'([A-Z]+)(\d+)')
+
+# Cells that hold a value: an opening tag that is not self-closing, an optional formula,
+# then a non-empty cached value or inline string. Formatting-only cells don't match.
+VALUE_CELL = re.compile(
+    rb'<c\s[^>]*?\br="([A-Z]+)(\d+)"[^>/]*>'
+    rb'(?:<f\b[^>]*?/>|<f\b[^>]*>[^<]*</f>)?'
+    rb'(?:<v(?:\s[^>]*)?>[^<]|<is>(?:(?!</is>).)*?<t(?:\s[^>]*)?>[^<])',
+    re.DOTALL)
+# Cell tags without a reference, which the fast scan cannot place
+UNREFERENCED_CELL = re.compile(rb'<c(?=[\s/>])(?![^>]*\br=")')
+DIMENSION_REF = re.compile(rb'<dimension\s+ref="([^"]*)"')
+
+# Size of the decompressed blocks read by the fast scan
+SCAN_BLOCK_SIZE = 1 << 20
+
+# Any cell: its column and row, the rest of its attributes, its cached value after an optional
+# formula or its plain inline string, and any other content such as rich text. Self-closing cells
+# match with no content. Excel and the usual writers put the reference first; other markup is read
+# with the XML parser.
+CELL = re.compile(
+    rb'<c r="([A-Z]+)(\d+)"([^>]*?)'
+    rb'(?:/>|>(?:<f\b[^>]*?(?:/>|>[^<]*</f>))?(?:<v>([^<]*)</v>|<is><t>([^<]*)</t></is>)?(.*?)</c>)',
+    re.DOTALL)
+CELL_TYPE = re.compile(rb'\bt="(\w+)"')
+CELL_STYLE = re.compile(rb'\bs="(\d+)"')
+CELL_VALUE = re.compile(rb'<v(?:\s[^>]*)?>([^<]*)</v>')
+CELL_TEXT = re.compile(rb'<t(?:\s[^>]*)?>([^<]*)</t>')
+PHONETIC_RUN = re.compile(rb'<rPh\b.*?</rPh>', re.DOTALL)
+# Cell tags that don't start with their reference
+UNORDERED_CELL = re.compile(rb'<c(?=[\s/>])(?! r=")')
+
+# Kinds of numeric cell values, which decide how pandas would type their column
+NUMBER_WHOLE, NUMBER_FRACTION, NUMBER_DATE = range(3)
+# Booleans as they read in float and integer columns
+BOOLEAN_FLOATS = {'True': '1.0', 'False': '0.0'}
+BOOLEAN_INTEGERS = {'True': '1', 'False': '0'}
+
+def column_index(letters):
+    """Convert column letters such as 'AB' to a 1-based column number"""
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - 64
+    return index
+
+def column_letters(index):
+    """Convert a 1-based column number to column letters such as 'AB'"""
+    letters = ''
+    while index > 0:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+def sheet_parts(zf):
+    """Map each sheet name of an open xlsx package to the path of its worksheet part"""
+    workbook = ET.fromstring(zf.read('xl/workbook.xml'))
+    rels = ET.fromstring(zf.read('xl/_rels/workbook.xml.rels'))
+    targets = {rel.get('Id'): rel.get('Target') for rel in rels.iter(f'{{{PACKAGE_RELATIONSHIP_NAMESPACE}}}Relationship')}
+
+    parts = {}
+    for tag in _tags('sheet'):
+        for sheet in workbook.iter(tag):
+            rel_id = next((sheet.get(f'{{{ns}}}id') for ns in RELATIONSHIP_NAMESPACES if sheet.get(f'{{{ns}}}id')), None)
+            target = targets.get(rel_id)
+            if target is None:
+                continue
+            # Targets are relative to the xl/ folder unless they are absolute package paths
+            parts[sheet.get('name')] = target.lstrip('/') if target.startswith('/') else posixpath.normpath(posixpath.join('xl', target))
+    return parts
+
+def _has_value(cell):
+    """Check whether a cell element holds a value rather than only formatting"""
+    for child in cell:
+        if child.tag in VALUE_TAGS:
+            if child.text:
+                return True
+        elif child.tag in INLINE_STRING_TAGS:
+            if any(child.itertext()):
+                return True
+    return False
+
+def _scan_extent_fast(f):
+    """Scan a worksheet part as bytes, or return None if its markup needs the XML parser
+
+    Only parts that use the default namespace and reference every cell can be
+    scanned this way, which covers the files written by Excel and the usual
+    libraries.
+    """
+    head = f.read(SCAN_BLOCK_SIZE)
+    if b'<sheetData' not in head or UNREFERENCED_CELL.search(head):
+        return None
+    match = DIMENSION_REF.search(head)
+    declared = match.group(1).decode() if match else None
+
+    last_row = 0
+    column_names = set()
+    buffer = head
+    while True:
+        block = f.read(SCAN_BLOCK_SIZE)
+        # Only scan up to the last complete row, and carry the rest over to the next block
+        end = buffer.rfind(b'</row>') + len(b'</row>') if block else len(buffer)
+        if end < len(b'</row>'):
+            end = 0
+        cells = VALUE_CELL.findall(buffer, 0, end)
+        if cells:
+            last_row = int(cells[-1][1])
+            column_names.update(map(itemgetter(0), cells))
+        if not block:
+            break
+        buffer = buffer[end:] + block
+
+    last_column = max((column_index(letters.decode()) for letters in column_names), default=0)
+    return declared, last_row, last_column
+
+def _scan_extent_xml(f):
+    """Scan a worksheet part element by element with the XML parser"""
+    declared = None
+    last_row = 0
+    last_column = 0
+    row_number = 0
+    sheet_data = None
+    for event, elem in ET.iterparse(f, events=('start', 'end')):
+        if event == 'start':
+            if elem.tag in SHEET_DATA_TAGS:
+                sheet_data = elem
+            continue
+        if elem.tag in ROW_TAGS:
+            # Rows and cells may omit their reference, then they follow the previous one
+            row_number = int(elem.get('r')) if elem.get('r') else row_number + 1
+            column_number = 0
+            row_last_column = 0
+            for cell in elem:
+                if cell.tag not in CELL_TAGS:
+                    continue
+                reference = cell.get('r')
+                match = CELL_REFERENCE.match(reference) if reference else None
+                column_number = column_index(match.group(1)) if match else column_number + 1
+                if _has_value(cell):
+                    row_last_column = column_number
+            if row_last_column:
+                last_row = row_number
+                last_column = max(last_column, row_last_column)
+            # Drop parsed rows so memory stays flat on large sheets
+            sheet_data.clear()
+        elif elem.tag in DIMENSION_TAGS:
+            declared = elem.get('ref')
+        elif elem.tag in SHEET_DATA_TAGS:
+            break
+    return declared, last_row, last_column
+
+def scan_sheet_extent(file_path, sheet_name):
+    """Find the last row and column holding a value in a worksheet with a streaming pass
+
+    Cells that carry only formatting are ignored, so a sheet whose declared
+    dimension covers the whole grid reports the extent of its real data. Returns
+    a dict with the declared range and the 1-based last data row and column.
+    """
+    with zipfile.ZipFile(file_path) as zf:
+        parts = sheet_parts(zf)
+        if sheet_name not in parts:
+            raise KeyError(f"Worksheet '{sheet_name}' not found in {file_path}")
+        with zf.open(parts[sheet_name]) as f:
+            extent = _scan_extent_fast(f)
+        if extent is None:
+            with zf.open(parts[sheet_name]) as f:
+                extent = _scan_extent_xml(f)
+
+    declared, last_row, last_column = extent
+    return {
+        'declared_range': declared,
+        'rows': last_row,
+        'columns': last_column,
+        'data_range': f'A1:{column_letters(last_column)}{last_row}' if last_row else None
+    }
+
+
+def _string_item_text(si):
+    """Text of a shared or inline string item, joining its rich text runs and skipping phonetic hints
+
+    Escapes such as _x000D_ are kept as written, as openpyxl keeps them.
+    """
+    parts = []
+    for child in si:
+        if child.tag in TEXT_TAGS:
+            parts.append(child.text or '')
+        elif child.tag in RUN_TAGS:
+            for t in child:
+                if t.tag in TEXT_TAGS:
+                    parts.append(t.text or '')
+    return ''.join(parts)
+
+class XlsxReader:
+    """Read the worksheets of an xlsx package straight from its XML parts
+
+    Cells are converted to text without building a cell object per cell: strings
+    as written, numbers in their shortest form (integral values without a
+    decimal point), dates and times as str() of the datetime openpyxl would
+    return, booleans as 'True'/'False', and error values as empty cells.
+    Columns that pandas would read as numeric are then formatted as it does,
+    see _format_numeric_column. Unlike pandas, text that looks numeric is kept
+    as written. Dates match pandas in columns that also hold text; pandas types
+    columns of dates alone and may then drop midnight times, depending on its
+    version and the column, while they are always kept here.
+
+    clean is applied to every string value; shared strings are cleaned once
+    when the table is loaded, not once per cell that uses them.
+    """
+
+    def __init__(self, file_path, clean=None):
+        """Read the workbook structure and styles of a package"""
+        self.file_path = file_path
+        self.clean = clean
+        with zipfile.ZipFile(file_path) as zf:
+            self.parts = sheet_parts(zf)
+            names = set(zf.namelist())
+            workbook = ET.fromstring(zf.read('xl/workbook.xml'))
+            epoch = CALENDAR_WINDOWS_1900
+            for tag in _tags('workbookPr'):
+                for pr in workbook.iter(tag):
+                    if pr.get('date1904') in ('1', 'true'):
+                        epoch = CALENDAR_MAC_1904
+            self.epoch = epoch
+            self.date_styles, self.timedelta_styles = self._read_date_styles(zf, names)
+            self._shared_strings_part = 'xl/sharedStrings.xml' if 'xl/sharedStrings.xml' in names else None
+        self._shared_strings = None
+
+    @property
+    def sheet_names(self):
+        """Names of the worksheets in workbook order"""
+        return list(self.parts)
+
+    def _read_date_styles(self, zf, names):
+        """Find the cell styles whose number format shows a date or a duration"""
+        if 'xl/styles.xml' not in names:
+            return set(), set()
+        styles = ET.fromstring(zf.read('xl/styles.xml'))
+        formats = dict(BUILTIN_FORMATS)
+        for tag in _tags('numFmt'):
+            for fmt in styles.iter(tag):
+                formats[int(fmt.get('numFmtId'))] = fmt.get('formatCode')
+        date_styles = set()
+        timedelta_styles = set()
+        for tag in _tags('cellXfs'):
+            for cell_xfs in styles.iter(tag):
+                for index, xf in enumerate(cell_xfs):
+                    code = formats.get(int(xf.get('numFmtId', 0)))
+                    if code and is_date_format(code):
+                        date_styles.add(index)
+                        if is_timedelta_format(code):
+                            timedelta_styles.add(index)
+        return date_styles, timedelta_styles
+
+    @property
+    def shared_strings(self):
+        """The shared string table, read and cleaned on first use"""
+        if self._shared_strings is None:
+            strings = []
+            if self._shared_strings_part:
+                with zipfile.ZipFile(self.file_path) as zf, zf.open(self._shared_strings_part) as f:
+                    root = None
+                    for event, elem in ET.iterparse(f, events=('start', 'end')):
+                        if event == 'start':
+                            if root is None:
+                                root = elem
+                        elif elem.tag in SHARED_STRING_TAGS:
+                            # openpyxl only drops the escape of a literal underscore from shared strings
+                            strings.append(_string_item_text(elem).replace('x005F_', ''))
+                            root.clear()
+            if self.clean is not None:
+                strings = [self.clean(text) for text in strings]
+            self._shared_strings = strings
+        return self._shared_strings
+
+    def _convert(self, kind, style, raw):
+        """Convert the raw value of a cell to its text, or None for an empty cell
+
+        String values arrive decoded; other values may still be bytes.
+        """
+        if kind == 's':
+            return self.shared_strings[int(raw)]
+        if kind in ('str', 'inlineStr'):
+            return self.clean(raw) if self.clean is not None else raw
+        if isinstance(raw, bytes):
+            raw = raw.decode('ascii')
+        if kind == 'b':
+            return 'True' if raw in ('1', 'true') else 'False'
+        if kind == 'e':
+            return None
+        if kind == 'd':
+            return str(from_ISO8601(raw))
+        if style in self.date_styles:
+            return str(from_excel(float(raw), self.epoch, timedelta=style in self.timedelta_styles))
+        if '.' in raw or 'E' in raw or 'e' in raw:
+            value = float(raw)
+            return str(int(value)) if value.is_integer() else repr(value)
+        return str(int(raw))
+
+    def _iter_cells(self, zf, part, max_row, keep):
+        """Yield (column, row, kind, style, raw value) for the value cells of a worksheet part
+
+        Columns are 0-based and rows 1-based, and only columns in keep are read
+        unless it is None. String values are fully decoded.
+        """
+        with zf.open(part) as f:
+            head = f.read(SCAN_BLOCK_SIZE)
+        if b'<sheetData' in head and not UNORDERED_CELL.search(head):
+            return self._iter_cells_fast(zf, part, max_row, keep)
+        return self._iter_cells_xml(zf, part, max_row, keep)
+
+    def _iter_cells_fast(self, zf, part, max_row, keep):
+        """Tokenize the cells of a worksheet part with a regular expression, block by block"""
+        with zf.open(part) as f:
+            yield from self._tokenize_cells(f, max_row, keep)
+
+    def _tokenize_cells(self, f, max_row, keep):
+        """Yield the value cells of an open worksheet part found by the cell pattern"""
+        columns = {}
+        attributes = {}
+        buffer = b''
+        while True:
+            block = f.read(SCAN_BLOCK_SIZE)
+            # Only tokenize complete rows, and carry the rest over to the next block
+            end = buffer.rfind(b'</row>') + len(b'</row>') if block else len(buffer)
+            if end < len(b'</row>'):
+                end = 0
+            for letters, row, attrs, raw, inline, rest in CELL.findall(buffer, 0, end):
+                if not raw and not inline and not rest:
+                    # Empty or formatting-only cell
+                    continue
+                if max_row is not None and int(row) > max_row:
+                    return
+                column = columns.get(letters)
+                if column is None:
+                    column = columns[letters] = column_index(letters.decode()) - 1
+                if keep is not None and column not in keep:
+                    continue
+                if inline:
+                    raw = inline
+                elif not raw:
+                    if b'<is>' in rest:
+                        if b'<rPh' in rest:
+                            rest = PHONETIC_RUN.sub(b'', rest)
+                        raw = b''.join(CELL_TEXT.findall(rest))
+                    else:
+                        # A value written with attributes
+                        match = CELL_VALUE.search(rest)
+                        raw = match.group(1) if match else None
+                    if not raw:
+                        continue
+                row = int(row)
+                parsed = attributes.get(attrs)
+                if parsed is None:
+                    kind = CELL_TYPE.search(attrs)
+                    style = CELL_STYLE.search(attrs)
+                    parsed = attributes[attrs] = (kind.group(1).decode() if kind else 'n',
+                                                  int(style.group(1)) if style else 0)
+                kind, style = parsed
+                if kind == 'str' or kind == 'inlineStr':
+                    raw = raw.decode('utf-8')
+                    if '&' in raw:
+                        raw = html.unescape(raw)
+                yield column, row, kind, style, raw
+            if not block:
+                return
+            buffer = buffer[end:] + block
+
+    def _iter_cells_xml(self, zf, part, max_row, keep):
+        """Parse the cells of a worksheet part with the XML parser, for markup the tokenizer can't read"""
+        with zf.open(part) as f:
+            yield from self._parse_cells(f, max_row, keep)
+
+    def _parse_cells(self, f, max_row, keep):
+        """Yield the value cells of an open worksheet part found by the XML parser"""
+        sheet_data = None
+        row_number = 0
+        for event, elem in ET.iterparse(f, events=('start', 'end')):
+            if event == 'start':
+                if elem.tag in SHEET_DATA_TAGS:
+                    sheet_data = elem
+                continue
+            if elem.tag not in ROW_TAGS:
+                if elem.tag in SHEET_DATA_TAGS:
+                    return
+                continue
+            # Rows and cells may omit their reference, then they follow the previous one
+            row_number = int(elem.get('r')) if elem.get('r') else row_number + 1
+            if max_row is not None and row_number > max_row:
+                return
+            column = -1
+            for cell in elem:
+                if cell.tag not in CELL_TAGS:
+                    continue
+                reference = cell.get('r')
+                match = CELL_REFERENCE.match(reference) if reference else None
+                column = column_index(match.group(1)) - 1 if match else column + 1
+                if keep is not None and column not in keep:
+                    continue
+                kind = cell.get('t', 'n')
+                raw = None
+                for child in cell:
+                    if child.tag in VALUE_TAGS:
+                        raw = child.text
+                    elif child.tag in INLINE_STRING_TAGS:
+                        raw = _string_item_text(child)
+                if raw:
+                    yield column, row_number, kind, int(cell.get('s', 0)), raw
+            sheet_data.clear()
+
+    def read_columns(self, sheet_name, max_row=None, max_col=None, usecols=None):
+        """Read a worksheet into a header and one list of cell texts per column
+
+        The first row is the header; its missing cells are None. Data rows run up
+        to the last row holding a value, and empty cells are ''. max_row and
+        max_col bound the rows and columns read (1-based, header included);
+        usecols keeps only the columns at the given 0-based positions. Rows with
+        values only in columns that are not kept still count, so with usecols the
+        rows run up to max_row, which should then be the last row of the sheet's
+        extent, or up to the scanned extent without it.
+        Returns (positions, header, columns).
+        """
+        if sheet_name not in self.parts:
+            raise KeyError(f"Worksheet '{sheet_name}' not found in {self.file_path}")
+        if usecols is not None:
+            keep = {column for column in usecols if max_col is None or column < max_col}
+        else:
+            keep = set(range(max_col)) if max_col is not None else None
+        shared_strings = self.shared_strings
+        # Numbers repeat a lot (scores, ids), so each distinct value and style is converted
+        # once, along with whether it is a date, a whole number or a fraction
+        converted = {}
+        data = {}
+        # Data cells of each column that pandas would read as numbers, booleans and errors,
+        # and the columns holding any other value
+        numeric = {}
+        other = set()
+        with zipfile.ZipFile(self.file_path) as zf:
+            for column, row, kind, style, raw in self._iter_cells(zf, self.parts[sheet_name], max_row, keep):
+                if kind == 's':
+                    text = shared_strings[int(raw)]
+                    if row > 1:
+                        other.add(column)
+                elif kind == 'n':
+                    key = (raw, style)
+                    entry = converted.get(key)
+                    if entry is None:
+                        text = self._convert(kind, style, raw)
+                        number_class = NUMBER_DATE if style in self.date_styles else (
+                            NUMBER_FRACTION if '.' in text or 'e' in text else NUMBER_WHOLE)
+                        entry = converted[key] = (text, number_class)
+                    text, number_class = entry
+                    if row > 1:
+                        if number_class == NUMBER_DATE:
+                            other.add(column)
+                        else:
+                            counts = numeric.setdefault(column, [0, 0, 0, False])
+                            counts[0] += 1
+                            if number_class == NUMBER_FRACTION:
+                                counts[3] = True
+                else:
+                    text = self._convert(kind, style, raw)
+                    if row > 1:
+                        if kind == 'b':
+                            numeric.setdefault(column, [0, 0, 0, False])[1] += 1
+                        elif kind == 'e':
+                            numeric.setdefault(column, [0, 0, 0, False])[2] += 1
+                        else:
+                            other.add(column)
+                    if text is None:
+                        continue
+                values = data.get(column)
+                if values is None:
+                    values = data[column] = []
+                # Rows arrive in order, so pad the column up to this row
+                if len(values) < row - 1:
+                    values.extend([''] * (row - 1 - len(values)))
+                values.append(text)
+
+        rows = max((len(values) for values in data.values()), default=0)
+        if usecols is not None:
+            last_row = max_row if max_row is not None else scan_sheet_extent(self.file_path, sheet_name)['rows']
+            rows = max(rows, last_row)
+            positions = sorted(set(usecols))
+        else:
+            positions = list(range(max(data) + 1 if data else 0))
+        header = []
+        columns = []
+        for position in positions:
+            values = data.get(position, [])
+            values.extend([''] * (rows - len(values)))
+            header.append(values[0] if rows and values[0] != '' else None)
+            column = values[1:]
+            if position in numeric and position not in other:
+                column = self._format_numeric_column(column, *numeric[position])
+            columns.append(column)
+        return positions, header, columns
+
+    def _format_numeric_column(self, column, numbers, booleans, errors, fractional):
+        """Format a column of numbers, booleans and errors as pandas formats its numeric columns
+
+        pandas only infers a numeric dtype when no data cell of the column is
+        blank or text. Error cells are missing values, and with them or with any
+        fraction the column is float, so whole numbers read '1.0' and booleans
+        '1.0' or '0.0'. Booleans among whole numbers read '1' or '0', while a
+        column of booleans alone keeps 'True' and 'False'.
+        """
+        if numbers + booleans + errors != len(column):
+            return column
+        if errors or fractional:
+            return [BOOLEAN_FLOATS.get(text) or (str(float(text)) if text else text) for text in column]
+        if numbers and booleans:
+            return [BOOLEAN_INTEGERS.get(text, text) for text in column]
+        return column